@@ -4,12 +4,25 @@ Linux Store - Application Database
 قاعدة بيانات التطبيقات والحزم
 """
 
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import hashlib
 import json
 import os
+import sys
+import threading
 
-@dataclass
+# slots متاحة في dataclass بدءاً من Python 3.10
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# حقول أسماء الحزم في AppEntry
+PACKAGE_FIELDS = ('pacman', 'apt', 'dnf', 'zypper', 'flatpak', 'snap')
+
+@dataclass(**_DATACLASS_SLOTS)
 class AppEntry:
     """إدخال تطبيق في قاعدة البيانات"""
     id: str
@@ -30,10 +43,65 @@ class AppEntry:
     snap: str = ""
     
     # معلومات إضافية
-    keywords: List[str] = field(default_factory=list)
+    keywords: Tuple[str, ...] = field(default_factory=tuple)
     featured: bool = False
     popular: bool = False
 
+    def __post_init__(self):
+        # القيم المتكررة بكثرة تُشارك كنسخة واحدة في الذاكرة
+        self.category = sys.intern(self.category)
+        self.icon = sys.intern(self.icon)
+        for field_name in PACKAGE_FIELDS:
+            value = getattr(self, field_name)
+            if value:
+                setattr(self, field_name, sys.intern(value))
+        self.keywords = tuple(sys.intern(kw) for kw in self.keywords)
+
+
+@dataclass
+class AppPage:
+    """صفحة من نتائج استعلام مع مؤشر الصفحة التالية"""
+    items: Sequence
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    # عدد النتائج لكل تصنيف ومدير ونوع وحالة تثبيت (عند طلبها)
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+    # المؤشر الممرر من جيل قديم للقاعدة: الصفحة من بداية النتائج
+    restarted: bool = False
+
+
+def entry_digest(app: AppEntry) -> int:
+    """بصمة 64 بت لمحتوى تطبيق لا تعتمد على ترتيب الإدخال"""
+    values = [getattr(app, name) for name in AppEntry.__dataclass_fields__]
+    data = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return int.from_bytes(hashlib.blake2b(data.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class AppListView(Sequence):
+    """عرض خفيف لقائمة تطبيقات يحمل أرقام الصفوف فقط
+    
+    يحتفظ بقائمة معرفات الصفوف وقت إنشائه، فضغط الصفوف لاحقاً (الذي يستبدل
+    القائمة) لا يجعل أرقامه تشير لتطبيقات أخرى.
+    """
+    __slots__ = ('_db', '_rows', '_ids')
+
+    def __init__(self, db: 'AppDatabase', rows: List[int], ids: Optional[List[str]] = None):
+        self._db = db
+        self._rows = rows
+        self._ids = db._row_ids if ids is None else ids
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return AppListView(self._db, self._rows[index], self._ids)
+        return self._db.apps[self._ids[self._rows[index]]]
+
+    def __repr__(self) -> str:
+        return f"AppListView({len(self._rows)} apps)"
+
+
 class AppDatabase:
     """قاعدة بيانات التطبيقات"""
     
@@ -53,9 +121,80 @@ class AppDatabase:
         'packages': {'name': 'Packages', 'name_ar': 'الحزم', 'icon': '📦'},
     }
     
-    def __init__(self):
+    # عدد نتائج الاستعلامات المحفوظة لتقسيم الصفحات
+    QUERY_CACHE_SIZE = 8
+    
+    # مفاتيح الفرز المدعومة في query_apps
+    SORT_KEYS = ('row', 'name', '-name', 'popular')
+    
+    # البحث الكامل يتم بمسح القاعدة على دفعات في خيط البحث
+    chunked_search = True
+    
+    # مطابقة النص بالسلاسل الجزئية: نتائج نص يحتوي نصاً سابقاً مجموعة جزئية
+    # من نتائجه، فيمكن تضييقها بدل البحث من جديد
+    narrows_search = True
+    
+    # بتات عمود الخصائص
+    FLAG_APP = 1
+    FLAG_FEATURED = 2
+    FLAG_POPULAR = 4
+    # صف محذوف يبقى في الأعمدة حتى لا تتغير أرقام الصفوف الأخرى
+    FLAG_REMOVED = 128
+    REMOVED_CATEGORY = 0xFFFF
+    # تُضغط الأعمدة حين تزيد الصفوف المحذوفة عن هذا العدد وعن ربع الصفوف الحية
+    COMPACT_MIN_REMOVED = 256
+    
+    def __init__(self, load_defaults: bool = True):
         self.apps: Dict[str, AppEntry] = {}
-        self._load_default_apps()
+        
+        # يزداد مع كل تعديل حتى تعرف الفهارس الخارجية أنها قديمة
+        self.generation = 0
+        self.callbacks: Dict[str, Optional[Callable]] = {
+            'on_change': None,
+        }
+        # بصمة المحتوى (XOR لبصمات التطبيقات) تُحسب عند أول طلب
+        self._content_hash: Optional[int] = None
+        
+        # تخزين عمودي: لكل تطبيق رقم صف ثابت
+        self._row_of: Dict[str, int] = {}
+        self._row_ids: List[str] = []
+        # صف كل تطبيق محذوف ما زال في الأعمدة، يعود إليه إن أُضيف من جديد
+        self._removed_rows: Dict[str, int] = {}
+        self._flags = array('B')
+        # بت لكل حقل من PACKAGE_FIELDS فيه اسم حزمة
+        self._manager_bits = array('B')
+        self._category_codes = array('H')
+        self._category_names: List[str] = []
+        self._category_code_of: Dict[str, int] = {}
+        
+        # ترتيب الصفوف لكل مفتاح فرز: (الجيل، رتبة كل صف)
+        self._sort_ranks: Dict[str, Tuple[int, array]] = {}
+        
+        # نتائج query_apps المفلترة والمرتبة لآخر الاستعلامات، لكل جيل:
+        # المفتاح -> [الصفوف، مفتاح الترتيب لكل صف، الأوجه]
+        self._query_cache: 'OrderedDict[tuple, list]' = OrderedDict()
+        self._query_lock = threading.Lock()
+        # يزداد مع كل تغيير في الحزم المثبتة (لا يغير generation)
+        self._installed_version = 0
+        
+        # الحزم المثبتة لكل حقل (من PackageManager.get_installed_packages)
+        self.installed_packages: Dict[str, Set[str]] = {}
+        self.installed_known = False
+        # فهرس حقل -> اسم حزمة -> صفوف، يُبنى عند أول طلب
+        self._package_rows: Optional[Dict[str, Dict[str, List[int]]]] = None
+        # صفوف التطبيقات المثبتة، تُبنى عند أول طلب. المجموعة لا تُعدل بعد
+        # نشرها بل تُستبدل، لأن خيط فحص التثبيت يحدثها وخيط الواجهة يقرؤها
+        self._installed_rows: Optional[Set[int]] = None
+        # يحمي بناء الفهرسين وتحديثهما
+        self._installed_lock = threading.RLock()
+        
+        # عدادات الأوجه: لكل رقم تصنيف، لكل حقل حزم، وعدد التطبيقات
+        self._category_counts: List[int] = []
+        self._manager_counts: List[int] = [0] * len(PACKAGE_FIELDS)
+        self._app_count = 0
+        
+        if load_defaults:
+            self._load_default_apps()
     
     def _load_default_apps(self):
         """تحميل التطبيقات الافتراضية"""
@@ -1606,104 +1745,660 @@ class AppDatabase:
     
     def _add_app(self, app: AppEntry):
         """إضافة تطبيق للقاعدة"""
+        flags = (
+            (self.FLAG_APP if app.is_app else 0)
+            | (self.FLAG_FEATURED if app.featured else 0)
+            | (self.FLAG_POPULAR if app.popular else 0)
+        )
+        managers = 0
+        for bit, field_name in enumerate(PACKAGE_FIELDS):
+            if getattr(app, field_name):
+                managers |= 1 << bit
+        
+        old = self.apps.get(app.id)
+        row = self._row_of.get(app.id)
+        if row is None and app.id in self._removed_rows:
+            # العودة لصف التطبيق المحذوف (مثل استرجاع تحديث فاشل)
+            row = self._removed_rows.pop(app.id)
+            self._row_of[app.id] = row
+            self._flags[row] = flags
+            self._manager_bits[row] = managers
+            self._category_codes[row] = self._category_code(app.category)
+        elif row is None:
+            row = len(self._row_ids)
+            self._row_of[app.id] = row
+            self._row_ids.append(app.id)
+            self._flags.append(flags)
+            self._manager_bits.append(managers)
+            self._category_codes.append(self._category_code(app.category))
+        else:
+            # استبدال تطبيق موجود في نفس الصف
+            self._count_row(row, -1)
+            self._index_packages(row, old, False)
+            self._flags[row] = flags
+            self._manager_bits[row] = managers
+            self._category_codes[row] = self._category_code(app.category)
+        self._count_row(row, 1)
+        self._index_packages(row, app, True)
+        
+        if self._content_hash is not None:
+            if old is not None:
+                self._content_hash ^= entry_digest(old)
+            self._content_hash ^= entry_digest(app)
+        
         self.apps[app.id] = app
+        if self._installed_rows is not None:
+            self._refresh_installed_rows((row,))
+        self.generation += 1
+    
+    def _remove_app(self, app_id: str) -> bool:
+        """حذف تطبيق من القاعدة وأعمدتها"""
+        app = self.apps.pop(app_id, None)
+        if app is None:
+            return False
+        
+        row = self._row_of.pop(app_id)
+        self._removed_rows[app_id] = row
+        self._count_row(row, -1)
+        self._index_packages(row, app, False)
+        if self._installed_rows is not None:
+            self._refresh_installed_rows((row,))
+        self._flags[row] = self.FLAG_REMOVED
+        self._manager_bits[row] = 0
+        self._category_codes[row] = self.REMOVED_CATEGORY
+        
+        if self._content_hash is not None:
+            self._content_hash ^= entry_digest(app)
+        self.generation += 1
+        return True
+    
+    def _compact_if_needed(self) -> bool:
+        """حذف الصفوف المحذوفة من الأعمدة إن كثرت
+        
+        أرقام الصفوف تتغير، فتُفرغ الفهارس المبنية عليها وتُبنى عند الطلب،
+        ويزداد generation حتى تُهمل المؤشرات والنتائج المحفوظة.
+        """
+        removed = len(self._removed_rows)
+        if removed <= max(self.COMPACT_MIN_REMOVED, len(self._row_of) // 4):
+            return False
+        
+        with self._installed_lock, self._query_lock:
+            live = sorted(self._row_of.values())
+            # قوائم جديدة بدل التعديل في المكان، فالعروض الحالية تبقى صحيحة
+            self._row_ids = [self._row_ids[row] for row in live]
+            self._flags = array('B', (self._flags[row] for row in live))
+            self._manager_bits = array('B', (self._manager_bits[row] for row in live))
+            self._category_codes = array('H', (self._category_codes[row] for row in live))
+            self._row_of = {app_id: row for row, app_id in enumerate(self._row_ids)}
+            self._removed_rows = {}
+            self._sort_ranks = {}
+            self._query_cache.clear()
+            self._package_rows = None
+            self._installed_rows = None
+            self.generation += 1
+        return True
+    
+    def set_callback(self, event: str, callback: Callable):
+        """تعيين callback لحدث معين"""
+        if event in self.callbacks:
+            self.callbacks[event] = callback
+    
+    def _notify(self, event: str, *args, **kwargs):
+        """إرسال إشعار"""
+        if self.callbacks.get(event):
+            self.callbacks[event](*args, **kwargs)
+    
+    def content_hash(self) -> str:
+        """بصمة محتوى الكتالوج التي تُبنى عليها التحديثات التفاضلية"""
+        if self._content_hash is None:
+            value = 0
+            for app in self.apps.values():
+                value ^= entry_digest(app)
+            self._content_hash = value
+        return f"{self._content_hash:016x}"
+    
+    def apply_delta(self, delta) -> int:
+        """تطبيق تحديث تفاضلي على الكتالوج والفهارس في مكانها
+        
+        يعيد عدد العمليات المنفذة. يُرفع DeltaMismatchError إذا لم تطابق
+        بصمة القاعدة الأساس المطلوب، أو إذا لم تطابق النتيجة الهدف
+        (وحينها تُسترجع الحالة السابقة).
+        """
+        from catalog_delta import DeltaMismatchError
+        
+        if delta.base != self.content_hash():
+            raise DeltaMismatchError(
+                f"بصمة الكتالوج {self.content_hash()} لا تطابق أساس التحديث {delta.base}"
+            )
+        delta.check_against(self.apps)
+        
+        # حفظ الحالة السابقة للتطبيقات المتأثرة فقط
+        undo = {app_id: self.apps.get(app_id) for app_id in delta.touched_ids()}
+        
+        for app_id in delta.removed:
+            self._remove_app(app_id)
+        for app in delta.added + delta.modified:
+            self._add_app(app)
+        
+        if delta.target and self.content_hash() != delta.target:
+            for app_id, old in undo.items():
+                if old is None:
+                    self._remove_app(app_id)
+                else:
+                    self._add_app(old)
+            self._compact_if_needed()
+            raise DeltaMismatchError(
+                f"نتيجة التحديث لا تطابق البصمة الهدف {delta.target}"
+            )
+        
+        self._compact_if_needed()
+        self._notify('on_change', [app.id for app in delta.added + delta.modified], list(delta.removed))
+        return delta.operation_count()
+    
+    def _category_code(self, category: str) -> int:
+        """رقم التصنيف في عمود التصنيفات"""
+        code = self._category_code_of.get(category)
+        if code is None:
+            code = len(self._category_names)
+            self._category_names.append(category)
+            self._category_code_of[category] = code
+        return code
+    
+    def _entry_at(self, row: int) -> AppEntry:
+        """الحصول على التطبيق في صف معين"""
+        return self.apps[self._row_ids[row]]
+    
+    def _rows_with_flag(self, flag: int, expected: bool = True) -> List[int]:
+        """مسح عمود الخصائص مع تخطي الصفوف المحذوفة"""
+        mask = flag | self.FLAG_REMOVED
+        wanted = flag if expected else 0
+        return [
+            row for row, flags in enumerate(self._flags)
+            if flags & mask == wanted
+        ]
+    
+    def _manager_mask(self, managers: Iterable[str]) -> int:
+        """قناع بتات حقول الحزم لقائمة مديرين"""
+        mask = 0
+        for field_name in managers:
+            if field_name not in PACKAGE_FIELDS:
+                raise ValueError(f"حقل مدير حزم غير معروف: {field_name}")
+            mask |= 1 << PACKAGE_FIELDS.index(field_name)
+        return mask
+    
+    def set_installed_packages(self, packages: Dict[str, Set[str]]):
+        """تعيين الحزم المثبتة التي يعتمد عليها مرشح installed
+        
+        إذا كان فهرس التثبيت مبنياً يُحدّث فقط للأسماء التي تغيرت
+        بين الحالة السابقة والجديدة.
+        """
+        if packages is self.installed_packages:
+            return
+        with self._installed_lock:
+            old = self.installed_packages
+            self.installed_packages = packages
+            self.installed_known = True
+            self._installed_version += 1
+            
+            if self._installed_rows is None:
+                return
+            
+            index = self._package_index()
+            affected: Set[int] = set()
+            for field_name in set(old) | set(packages):
+                changed = old.get(field_name, set()) ^ packages.get(field_name, set())
+                by_name = index.get(field_name, {})
+                for name in changed:
+                    affected.update(by_name.get(name, ()))
+            self._refresh_installed_rows(affected)
+    
+    def _is_installed(self, app: AppEntry) -> bool:
+        """هل التطبيق مثبت بأي من حقول الحزم"""
+        for field_name, names in self.installed_packages.items():
+            value = getattr(app, field_name, '')
+            if value and value in names:
+                return True
+        return False
+    
+    def _refresh_installed_rows(self, rows: Iterable[int]):
+        """إعادة حساب حالة تثبيت صفوف في فهرس التثبيت
+        
+        تُنشر مجموعة جديدة إن تغير شيء، فمن يمر على المجموعة السابقة في
+        خيط آخر لا يراها تتغير أثناء المرور.
+        """
+        with self._installed_lock:
+            current = self._installed_rows
+            if current is None:
+                return
+            updated = None
+            for row in rows:
+                app_id = self._row_ids[row]
+                app = self.apps.get(app_id) if self._row_of.get(app_id) == row else None
+                now = app is not None and self._is_installed(app)
+                if (row in current) == now:
+                    continue
+                if updated is None:
+                    updated = set(current)
+                if now:
+                    updated.add(row)
+                else:
+                    updated.discard(row)
+            if updated is not None:
+                self._installed_rows = updated
+    
+    def _index_packages(self, row: int, app: AppEntry, add: bool,
+                        index: Optional[Dict[str, Dict[str, List[int]]]] = None):
+        """إضافة أسماء حزم تطبيق لفهرس الحزم أو حذفها منه"""
+        if index is None:
+            index = self._package_rows
+            if index is None:
+                return
+        with self._installed_lock:
+            for field_name in PACKAGE_FIELDS:
+                value = getattr(app, field_name)
+                if not value:
+                    continue
+                rows = index[field_name].setdefault(value, [])
+                if add:
+                    rows.append(row)
+                elif row in rows:
+                    rows.remove(row)
+                    if not rows:
+                        del index[field_name][value]
+    
+    def _package_index(self) -> Dict[str, Dict[str, List[int]]]:
+        """فهرس أسماء الحزم إلى الصفوف لكل حقل، يُبنى عند أول طلب ثم يُحدّث مع كل تعديل"""
+        with self._installed_lock:
+            if self._package_rows is None:
+                # يُنشر بعد اكتماله فقط
+                index = {name: {} for name in PACKAGE_FIELDS}
+                for app_id, row in self._row_of.items():
+                    self._index_packages(row, self.apps[app_id], True, index)
+                self._package_rows = index
+            return self._package_rows
+    
+    def _installed_row_set(self) -> Set[int]:
+        """صفوف التطبيقات المثبتة بأي مدير، من تقاطع الفهرس مع الحزم المثبتة"""
+        rows = self._installed_rows
+        if rows is not None:
+            return rows
+        
+        with self._installed_lock:
+            if self._installed_rows is not None:
+                return self._installed_rows
+            index = self._package_index()
+            rows = set()
+            for field_name, names in self.installed_packages.items():
+                by_name = index.get(field_name)
+                if not by_name:
+                    continue
+                # المرور على المجموعة الأصغر
+                if len(names) < len(by_name):
+                    for name in names:
+                        rows.update(by_name.get(name, ()))
+                else:
+                    for name, name_rows in by_name.items():
+                        if name in names:
+                            rows.update(name_rows)
+            self._installed_rows = rows
+            return rows
+    
+    def _count_row(self, row: int, delta: int):
+        """تعديل عدادات الأوجه بقيم صف واحد"""
+        flags = self._flags[row]
+        if flags & self.FLAG_REMOVED:
+            return
+        code = self._category_codes[row]
+        while len(self._category_counts) <= code:
+            self._category_counts.append(0)
+        self._category_counts[code] += delta
+        bits = self._manager_bits[row]
+        for bit in range(len(PACKAGE_FIELDS)):
+            if bits >> bit & 1:
+                self._manager_counts[bit] += delta
+        if flags & self.FLAG_APP:
+            self._app_count += delta
+    
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """عدد التطبيقات لكل تصنيف ومدير حزم ونوع وحالة تثبيت
+        
+        العدادات تُحدّث مع كل إضافة وحذف، فلا يحتاج الطلب لمسح القاعدة.
+        حالة التثبيت تظهر فقط بعد set_installed_packages.
+        """
+        categories = {category_id: 0 for category_id in self.CATEGORIES}
+        for code, count in enumerate(self._category_counts):
+            if count:
+                categories[self._category_names[code]] = count
+        
+        facets = {
+            'category': categories,
+            'manager': dict(zip(PACKAGE_FIELDS, self._manager_counts)),
+            'kind': {'app': self._app_count, 'package': len(self.apps) - self._app_count},
+        }
+        if self.installed_known:
+            installed = len(self._installed_row_set())
+            facets['installed'] = {'yes': installed, 'no': len(self.apps) - installed}
+        return facets
+    
+    def _facets_of_rows(self, rows: Iterable[int]) -> Dict[str, Dict[str, int]]:
+        """حساب الأوجه لمجموعة صفوف من الأعمدة مباشرة"""
+        categories: Dict[str, int] = {}
+        managers = [0] * len(PACKAGE_FIELDS)
+        apps = 0
+        total = 0
+        installed_rows = self._installed_row_set() if self.installed_known else None
+        installed = 0
+        
+        names = self._category_names
+        codes = self._category_codes
+        flags = self._flags
+        bits = self._manager_bits
+        for row in rows:
+            total += 1
+            name = names[codes[row]]
+            categories[name] = categories.get(name, 0) + 1
+            row_bits = bits[row]
+            if row_bits:
+                for bit in range(len(PACKAGE_FIELDS)):
+                    if row_bits >> bit & 1:
+                        managers[bit] += 1
+            if flags[row] & self.FLAG_APP:
+                apps += 1
+            if installed_rows is not None and row in installed_rows:
+                installed += 1
+        
+        facets = {
+            'category': categories,
+            'manager': {name: count for name, count in zip(PACKAGE_FIELDS, managers) if count},
+            'kind': {'app': apps, 'package': total - apps},
+        }
+        if installed_rows is not None:
+            facets['installed'] = {'yes': installed, 'no': total - installed}
+        return facets
+    
+    def count_facets(self, apps: Iterable[AppEntry]) -> Dict[str, Dict[str, int]]:
+        """حساب الأوجه لقائمة تطبيقات (مثل نتائج بحث نصي)"""
+        row_of = self._row_of
+        return self._facets_of_rows(row_of[app.id] for app in apps if app.id in row_of)
+    
+    def get_installed_apps(self) -> AppListView:
+        """الحصول على التطبيقات المثبتة حسب آخر حالة تثبيت معروفة"""
+        return AppListView(self, sorted(self._installed_row_set()))
     
     def get_app(self, app_id: str) -> Optional[AppEntry]:
         """الحصول على تطبيق بالمعرف"""
         return self.apps.get(app_id)
     
+    def find_by_package(self, field_name: str, name: str) -> List[AppEntry]:
+        """التطبيقات التي اسم حزمتها في حقل معين يساوي name"""
+        rows = self._package_index().get(field_name, {}).get(name, ())
+        return [self.apps[self._row_ids[row]] for row in rows]
+    
     def get_all_apps(self) -> List[AppEntry]:
         """الحصول على جميع التطبيقات"""
         return list(self.apps.values())
     
-    def get_apps_by_category(self, category: str) -> List[AppEntry]:
+    def get_apps_by_category(self, category: str) -> AppListView:
         """الحصول على تطبيقات حسب التصنيف"""
-        return [app for app in self.apps.values() if app.category == category]
+        code = self._category_code_of.get(category)
+        if code is None:
+            return AppListView(self, [])
+        return AppListView(self, [
+            row for row, value in enumerate(self._category_codes) if value == code
+        ])
     
-    def get_featured_apps(self) -> List[AppEntry]:
+    def get_featured_apps(self) -> AppListView:
         """الحصول على التطبيقات المميزة"""
-        return [app for app in self.apps.values() if app.featured]
+        return AppListView(self, self._rows_with_flag(self.FLAG_FEATURED))
     
-    def get_popular_apps(self) -> List[AppEntry]:
+    def get_popular_apps(self) -> AppListView:
         """الحصول على التطبيقات الشائعة"""
-        return [app for app in self.apps.values() if app.popular]
+        return AppListView(self, self._rows_with_flag(self.FLAG_POPULAR))
     
-    def get_applications(self) -> List[AppEntry]:
+    def get_applications(self) -> AppListView:
         """الحصول على التطبيقات فقط (ليس الحزم)"""
-        return [app for app in self.apps.values() if app.is_app]
+        return AppListView(self, self._rows_with_flag(self.FLAG_APP))
     
-    def get_packages(self) -> List[AppEntry]:
+    def get_packages(self) -> AppListView:
         """الحصول على الحزم فقط"""
-        return [app for app in self.apps.values() if not app.is_app]
+        return AppListView(self, self._rows_with_flag(self.FLAG_APP, expected=False))
+    
+    def _sort_rank(self, sort_key: str) -> array:
+        """رتبة كل صف حسب مفتاح فرز، تُبنى مرة لكل جيل من القاعدة"""
+        cached = self._sort_ranks.get(sort_key)
+        if cached is not None and cached[0] == self.generation:
+            return cached[1]
+        
+        def name_of(row: int) -> str:
+            app_id = self._row_ids[row]
+            return self.apps[app_id].name.lower() if app_id in self.apps else ''
+        
+        rows = range(len(self._row_ids))
+        if sort_key == 'name':
+            order = sorted(rows, key=lambda row: (name_of(row), row))
+        elif sort_key == '-name':
+            order = sorted(rows, key=lambda row: (name_of(row), row), reverse=True)
+        elif sort_key == 'popular':
+            weight = self.FLAG_FEATURED | self.FLAG_POPULAR
+            order = sorted(rows, key=lambda row: (
+                -bin(self._flags[row] & weight).count('1'), name_of(row), row
+            ))
+        else:
+            raise ValueError(f"مفتاح فرز غير مدعوم: {sort_key}")
+        
+        rank = array('I', bytes(4 * len(order)))
+        for position, row in enumerate(order):
+            rank[row] = position
+        self._sort_ranks[sort_key] = (self.generation, rank)
+        return rank
+    
+    def query_apps(self, text: Optional[str] = None, category: Optional[str] = None,
+                   featured: Optional[bool] = None, popular: Optional[bool] = None,
+                   is_app: Optional[bool] = None,
+                   managers: Optional[Iterable[str]] = None,
+                   installed: Optional[bool] = None, sort_key: str = 'row',
+                   limit: int = 50, offset: int = 0,
+                   cursor: Optional[str] = None,
+                   facets: bool = False) -> AppPage:
+        """استعلام مقسم لصفحات فوق أعمدة القاعدة
+        
+        تُختار الصفوف من أعمدة الخصائص والتصنيف ومديري الحزم بدون لمس
+        التطبيقات، ومع installed=True يبدأ التقاطع من صفوف التطبيقات
+        المثبتة فقط. النص يُطابق أخيراً على الصفوف المتبقية.
+        الصفحة المعادة AppListView لا تنشئ إلا ما يُطلب منها، والمؤشر
+        يحدد موضع آخر عنصر في الصفحة السابقة حسب مفتاح الفرز ويحمل جيل
+        القاعدة: مؤشر من جيل أقدم يعيد الصفحة الأولى مع restarted=True.
+        الصفوف المفلترة المرتبة تُحفظ لكل جيل، فالصفحات التالية تكلف بحثاً
+        ثنائياً عن المؤشر فقط.
+        مع facets=True تُحسب الأوجه من صفوف النتيجة نفسها قبل التقسيم
+        (مع الصفحة الأولى فقط مثل العدد الكلي في قاعدة SQLite).
+        """
+        mask = self.FLAG_REMOVED
+        wanted = 0
+        for flag, value in ((self.FLAG_FEATURED, featured),
+                            (self.FLAG_POPULAR, popular),
+                            (self.FLAG_APP, is_app)):
+            if value is not None:
+                mask |= flag
+                wanted |= flag if value else 0
+        
+        code = None
+        if category is not None:
+            code = self._category_code_of.get(category)
+            if code is None:
+                return AppPage(
+                    items=AppListView(self, []), total=0,
+                    facets=self._facets_of_rows(()) if facets else None
+                )
+        
+        manager_mask = self._manager_mask(managers) if managers else 0
+        query = text.strip().lower() if text and text.strip() else None
+        
+        # كل صفحة تُقطع من نفس القائمة المرتبة حتى يتغير جيل القاعدة
+        cache_key = (query, code, mask, wanted, manager_mask, installed, sort_key, self.generation,
+                     self._installed_version if installed is not None else None)
+        with self._query_lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+        if cached is None:
+            cached = self._query_rows(query, code, mask, wanted, manager_mask, installed, sort_key)
+            with self._query_lock:
+                self._query_cache[cache_key] = cached
+                while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        rows, keys = cached[0], cached[1]
+        
+        total = len(rows)
+        page_facets = None
+        if facets and cursor is None:
+            if cached[2] is None:
+                cached[2] = self._facets_of_rows(rows)
+            page_facets = cached[2]
+        
+        # المؤشر "الجيل:المفتاح"؛ مفاتيح الترتيب تتغير مع الجيل
+        start = 0
+        restarted = False
+        if cursor is not None:
+            generation, _, after = cursor.partition(':')
+            if after and generation == str(self.generation):
+                start = bisect_right(keys, int(after))
+            else:
+                restarted = True
+        start += offset
+        
+        page_rows = rows[start:start + limit]
+        next_cursor = None
+        if start + limit < total and page_rows:
+            next_cursor = f"{self.generation}:{keys[start + len(page_rows) - 1]}"
+        
+        return AppPage(
+            items=AppListView(self, page_rows), next_cursor=next_cursor,
+            total=total, facets=page_facets, restarted=restarted
+        )
     
-    def search(self, query: str) -> List[AppEntry]:
-        """البحث في التطبيقات"""
+    def _query_rows(self, query: Optional[str], code: Optional[int], mask: int, wanted: int,
+                    manager_mask: int, installed: Optional[bool], sort_key: str) -> list:
+        """صفوف استعلام مرتبة مع مفتاح ترتيب متزايد لكل صف (للبحث الثنائي عن المؤشر)"""
+        flags = self._flags
+        codes = self._category_codes
+        bits = self._manager_bits
+        if installed:
+            # التطبيقات المثبتة قليلة عادة مقارنة بالكتالوج
+            source = sorted(self._installed_row_set())
+            excluded: Set[int] = set()
+        else:
+            source = range(len(flags))
+            excluded = self._installed_row_set() if installed is False else set()
+        rows = [
+            row for row in source
+            if flags[row] & mask == wanted
+            and (code is None or codes[row] == code)
+            and (not manager_mask or bits[row] & manager_mask)
+            and row not in excluded
+        ]
+        
+        if query:
+            rows = [row for row in rows if self.matches(self._entry_at(row), query)]
+        
+        if sort_key == 'row':
+            keys = rows
+        else:
+            rank = self._sort_rank(sort_key)
+            rows.sort(key=rank.__getitem__)
+            keys = [rank[row] for row in rows]
+        return [rows, keys, None]
+    
+    def search(self, query: str,
+               candidates: Optional[Iterable[AppEntry]] = None) -> List[AppEntry]:
+        """البحث في التطبيقات
+        
+        إذا مُررت candidates يتم البحث ضمنها فقط بدلاً من كامل القاعدة،
+        وهذا يسمح بتضييق نتائج بحث سابق عند إطالة نص الاستعلام.
+        """
         query = query.lower()
-        results = []
         
-        for app in self.apps.values():
-            # البحث في الاسم
-            if query in app.name.lower():
-                results.append(app)
-                continue
-            
-            # البحث في الوصف
-            if query in app.description.lower() or query in app.description_ar:
-                results.append(app)
-                continue
-            
-            # البحث في الكلمات المفتاحية
-            if any(query in kw.lower() for kw in app.keywords):
-                results.append(app)
-                continue
+        if candidates is None:
+            candidates = self.apps.values()
         
-        return results
+        return [app for app in candidates if self.matches(app, query)]
+    
+    @staticmethod
+    def matches(app: AppEntry, query: str) -> bool:
+        """التحقق من مطابقة تطبيق لنص بحث بأحرف صغيرة"""
+        # البحث في الاسم
+        if query in app.name.lower():
+            return True
+        
+        # البحث في الوصف
+        if query in app.description.lower() or query in app.description_ar:
+            return True
+        
+        # البحث في الكلمات المفتاحية
+        return any(query in kw.lower() for kw in app.keywords)
     
     def get_categories(self) -> Dict:
         """الحصول على التصنيفات"""
         return self.CATEGORIES
     
-    def export_to_json(self, filepath: str):
-        """تصدير القاعدة إلى JSON"""
-        data = {
-            'categories': self.CATEGORIES,
-            'apps': {
-                app_id: {
-                    'id': app.id,
-                    'name': app.name,
-                    'description': app.description,
-                    'description_ar': app.description_ar,
-                    'category': app.category,
-                    'icon': app.icon,
-                    'is_app': app.is_app,
-                    'website': app.website,
-                    'pacman': app.pacman,
-                    'apt': app.apt,
-                    'dnf': app.dnf,
-                    'zypper': app.zypper,
-                    'flatpak': app.flatpak,
-                    'snap': app.snap,
-                    'keywords': app.keywords,
-                    'featured': app.featured,
-                    'popular': app.popular,
-                }
-                for app_id, app in self.apps.items()
-            }
-        }
+    def export_to_json(self, filepath: str, compression: Optional[str] = None):
+        """تصدير القاعدة إلى JSON سجلاً بسجل
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        امتداد .jsonl يكتب سطراً لكل تطبيق، و.gz/.bz2/.xz يفعّل الضغط.
+        """
+        from catalog_io import write_catalog
+        write_catalog(filepath, self.apps.values(), self.CATEGORIES, compression)
     
-    def import_from_json(self, filepath: str):
-        """استيراد القاعدة من JSON"""
+    def import_from_json(self, filepath: str, compression: Optional[str] = None,
+                         strict: bool = False, errors: Optional[List[str]] = None) -> int:
+        """استيراد القاعدة من JSON على دفعات بذاكرة محدودة
+        
+        يُعاد عدد التطبيقات المستوردة؛ رسائل السجلات المتخطاة تُضاف إلى
+        errors إن مُررت (وتُسجل في السجل دائماً).
+        """
         if not os.path.exists(filepath):
-            return
+            return 0
+        
+        from catalog_io import iter_catalog
+        count = 0
+        changed = []
+        for batch in iter_catalog(filepath, compression=compression, strict=strict, errors=errors):
+            for app in batch:
+                self._add_app(app)
+                changed.append(app.id)
+            count += len(batch)
+        
+        self._notify('on_change', changed, [])
+        return count
+    
+    def apply_package_map(self, filepath: str) -> int:
+        """ملء أسماء الحزم الناقصة من جدول package_mapping
+        
+        الحقول الموجودة في الكتالوج لا تُستبدل أبداً.
+        """
+        if not os.path.exists(filepath):
+            return 0
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        from package_mapping import load_package_map, mapped_entries
+        entries = mapped_entries(self.apps, load_package_map(filepath))
+        for app in entries:
+            self._add_app(app)
         
-        for app_id, app_data in data.get('apps', {}).items():
-            self._add_app(AppEntry(**app_data))
+        if entries:
+            self._notify('on_change', [app.id for app in entries], [])
+        return len(entries)
+
+def open_app_database(path: Optional[str] = None):
+    """فتح قاعدة التطبيقات
+    
+    بدون مسار تُبنى القاعدة في الذاكرة، ومع مسار ملف تُستخدم
+    قاعدة SQLite دائمة تُفتح فوراً في المرات التالية.
+    """
+    if not path:
+        return AppDatabase()
+    
+    from sqlite_database import SQLiteAppDatabase
+    return SQLiteAppDatabase(path)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Linux Store - App Grid
+شبكة التطبيقات بنمط model/view: نموذج قائمة فوق نتائج AppDatabase ومفوض
+يرسم البطاقات، فلا يُنشأ أي widget لكل تطبيق ولا يُرسم إلا الظاهر منها.
+
+النموذج يعرض الصفوف على دفعات عبر canFetchMore/fetchMore: إما من قائمة
+جاهزة (نتائج البحث) أو من استعلام query_apps صفحةً بصفحة عبر المؤشر.
+الأيقونات تأتي من IconLoader المشترك، ويُرسم مكانها عنصر مؤقت حتى تجهز.
+الشبكات القابلة للتحديد ترسم مربع اختيار على البطاقة (أو Ctrl/Shift مع
+النقر)، وSelectionBar يعرض إجراءات التثبيت والإزالة للمحدد.
+"""
+
+from typing import Dict, List, Optional, Set
+
+# محاولة استخدام PyQt6 أو PyQt5
+try:
+    from PyQt6.QtWidgets import (
+        QListView, QStyledItemDelegate, QStyle, QAbstractItemView, QFrame, QHBoxLayout, QLabel, QPushButton
+    )
+    from PyQt6.QtCore import (
+        Qt, QSize, QRect, QRectF, QModelIndex, QAbstractListModel, QEvent, QItemSelectionModel, pyqtSignal
+    )
+    from PyQt6.QtGui import QFont, QColor, QPen, QPainter, QFontMetrics, QCursor
+    PYQT_VERSION = 6
+except ImportError:
+    from PyQt5.QtWidgets import (
+        QListView, QStyledItemDelegate, QStyle, QAbstractItemView, QFrame, QHBoxLayout, QLabel, QPushButton
+    )
+    from PyQt5.QtCore import (
+        Qt, QSize, QRect, QRectF, QModelIndex, QAbstractListModel, QEvent, QItemSelectionModel, pyqtSignal
+    )
+    from PyQt5.QtGui import QFont, QColor, QPen, QPainter, QFontMetrics, QCursor
+    PYQT_VERSION = 5
+
+from app_database import AppEntry
+from icon_index import default_index
+from icon_loader import IconLoader, default_loader, letter_avatar
+
+
+# أسماء القيم التي تختلف بين PyQt6 و PyQt5
+if PYQT_VERSION == 6:
+    _ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+    _ALIGN_TOP_CENTER = Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop
+    _WORD_WRAP = Qt.TextFlag.TextWordWrap
+    _ELIDE_RIGHT = Qt.TextElideMode.ElideRight
+    _ANTIALIAS = QPainter.RenderHint.Antialiasing
+    _STATE_HOVER = QStyle.StateFlag.State_MouseOver
+    _STATE_SELECTED = QStyle.StateFlag.State_Selected
+    _LEFT_BUTTON = Qt.MouseButton.LeftButton
+    _MOUSE_PRESS = QEvent.Type.MouseButtonPress
+    _MOUSE_RELEASE = QEvent.Type.MouseButtonRelease
+    _MOUSE_MOVE = QEvent.Type.MouseMove
+    _SELECT_MODIFIERS = Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier
+    _NO_UPDATE = QItemSelectionModel.SelectionFlag.NoUpdate
+    _TOGGLE = QItemSelectionModel.SelectionFlag.Toggle
+    _USER_ROLE = Qt.ItemDataRole.UserRole
+    _DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+    _TOOLTIP_ROLE = Qt.ItemDataRole.ToolTipRole
+    _NO_PEN = Qt.PenStyle.NoPen
+else:
+    _ALIGN_CENTER = Qt.AlignCenter
+    _ALIGN_TOP_CENTER = Qt.AlignHCenter | Qt.AlignTop
+    _WORD_WRAP = Qt.TextWordWrap
+    _ELIDE_RIGHT = Qt.ElideRight
+    _ANTIALIAS = QPainter.Antialiasing
+    _STATE_HOVER = QStyle.State_MouseOver
+    _STATE_SELECTED = QStyle.State_Selected
+    _LEFT_BUTTON = Qt.LeftButton
+    _MOUSE_PRESS = QEvent.MouseButtonPress
+    _MOUSE_RELEASE = QEvent.MouseButtonRelease
+    _MOUSE_MOVE = QEvent.MouseMove
+    _SELECT_MODIFIERS = Qt.ControlModifier | Qt.ShiftModifier
+    _NO_UPDATE = QItemSelectionModel.NoUpdate
+    _TOGGLE = QItemSelectionModel.Toggle
+    _USER_ROLE = Qt.UserRole
+    _DISPLAY_ROLE = Qt.DisplayRole
+    _TOOLTIP_ROLE = Qt.ToolTipRole
+    _NO_PEN = Qt.NoPen
+
+# أدوار بيانات النموذج
+APP_ROLE = _USER_ROLE + 1
+INSTALLED_ROLE = _USER_ROLE + 2
+
+# أبعاد البطاقة كما كانت في AppCard؛ العرض يتمدد حتى CARD_MAX_WIDTH لملء الصف
+CARD_WIDTH = 180
+CARD_MAX_WIDTH = 240
+CARD_HEIGHT = 220
+CARD_PADDING = 12
+CARD_SPACING = 15
+ICON_SIZE = 64
+BUTTON_HEIGHT = 32
+CHECK_SIZE = 20
+
+
+def find_icon_path(icon: str, size: int = ICON_SIZE, scale: float = 1.0) -> Optional[str]:
+    """الحصول على مسار الأيقونة من فهرس سمة الأيقونات"""
+    return default_index().lookup(icon, size, scale)
+
+
+class AppListModel(QAbstractListModel):
+    """نموذج قائمة تطبيقات يُملأ على دفعات عند التمرير"""
+
+    def __init__(self, batch_size: int = 48, parent=None):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self._apps: List[AppEntry] = []
+        # قائمة جاهزة لم يُعرض منها إلا _apps بعد
+        self._pending: List[AppEntry] = []
+        # استعلام صفحات: (القاعدة، وسائط query_apps، المؤشر التالي)
+        self._db = None
+        self._query: Dict = {}
+        self._cursor: Optional[str] = None
+        self.installed_ids: Set[str] = set()
+        self.total = 0
+
+    # --- مصادر البيانات ---
+
+    def set_apps(self, apps: List[AppEntry]):
+        """عرض قائمة جاهزة؛ الدفعة الأولى فوراً والباقي عند التمرير"""
+        self.beginResetModel()
+        self._db = None
+        self._cursor = None
+        self._apps = list(apps[:self.batch_size])
+        self._pending = list(apps[self.batch_size:])
+        self.total = len(apps)
+        self.endResetModel()
+
+    def set_query(self, app_db, **query):
+        """عرض نتائج query_apps صفحةً بصفحة"""
+        self.beginResetModel()
+        self._db = app_db
+        self._query = query
+        self._pending = []
+        page = app_db.query_apps(limit=self.batch_size, **query)
+        self._apps = list(page.items)
+        self._cursor = page.next_cursor
+        self.total = page.total
+        self.endResetModel()
+
+    def clear(self):
+        self.set_apps([])
+
+    def set_installed_ids(self, installed_ids: Set[str]):
+        """تحديث حالة التثبيت المعروضة على البطاقات"""
+        self.installed_ids = installed_ids
+        if self._apps:
+            self.dataChanged.emit(self.index(0), self.index(len(self._apps) - 1), [INSTALLED_ROLE])
+
+    def apps(self) -> List[AppEntry]:
+        """التطبيقات المعروضة حالياً"""
+        return list(self._apps)
+
+    # --- واجهة QAbstractListModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._apps)
+
+    def data(self, index: QModelIndex, role: int = _DISPLAY_ROLE):
+        if not index.isValid() or index.row() >= len(self._apps):
+            return None
+        app = self._apps[index.row()]
+        if role == APP_ROLE:
+            return app
+        if role == INSTALLED_ROLE:
+            return app.id in self.installed_ids
+        if role == _DISPLAY_ROLE:
+            return app.name
+        if role == _TOOLTIP_ROLE:
+            return app.description_ar or app.description
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return bool(self._pending) or self._cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._pending:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+        elif self._cursor is not None:
+            page = self._db.query_apps(limit=self.batch_size, cursor=self._cursor, **self._query)
+            batch = list(page.items)
+            self._cursor = page.next_cursor
+            if page.restarted:
+                # تغيرت القاعدة منذ الصفحة السابقة: القائمة تبدأ من جديد
+                self.beginResetModel()
+                self._apps = batch
+                self.total = page.total
+                self.endResetModel()
+                return
+        else:
+            return
+        if not batch:
+            return
+        start = len(self._apps)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self._apps.extend(batch)
+        self.endInsertRows()
+
+
+class AppCardDelegate(QStyledItemDelegate):
+    """رسم بطاقة التطبيق بدون widget لكل بطاقة"""
+
+    install_clicked = pyqtSignal(object)
+    clicked = pyqtSignal(object)
+
+    def __init__(self, loader: Optional[IconLoader] = None, parent=None):
+        super().__init__(parent)
+        # الأيقونات تُحمّل وتُحجّم في خيوط عاملة وتُشارك بين كل الشبكات
+        self.loader = loader if loader is not None else default_loader()
+        # يضبطه AppGridView حسب عرض العرض
+        self.card_width = CARD_WIDTH
+
+        self.name_font = QFont()
+        self.name_font.setPixelSize(14)
+        self.name_font.setBold(True)
+        self.desc_font = QFont()
+        self.desc_font.setPixelSize(11)
+        self.button_font = QFont()
+        self.button_font.setPixelSize(12)
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(self.card_width, CARD_HEIGHT)
+
+    def _card_rect(self, option) -> QRect:
+        return QRect(option.rect.x(), option.rect.y(), self.card_width, CARD_HEIGHT)
+
+    @staticmethod
+    def button_rect(card: QRect) -> QRect:
+        """موضع زر التثبيت داخل البطاقة"""
+        return QRect(
+            card.x() + CARD_PADDING,
+            card.bottom() - CARD_PADDING - BUTTON_HEIGHT + 1,
+            card.width() - 2 * CARD_PADDING,
+            BUTTON_HEIGHT,
+        )
+
+    @staticmethod
+    def check_rect(card: QRect) -> QRect:
+        """موضع مربع الاختيار في زاوية البطاقة"""
+        return QRect(card.x() + 8, card.y() + 8, CHECK_SIZE, CHECK_SIZE)
+
+    @staticmethod
+    def _selection_visible(option) -> bool:
+        view = option.widget
+        return isinstance(view, AppGridView) and view.is_selectable()
+
+    def paint(self, painter: QPainter, option, index):
+        app: AppEntry = index.data(APP_ROLE)
+        if app is None:
+            return
+        installed = bool(index.data(INSTALLED_ROLE))
+        card = self._card_rect(option)
+        hovered = bool(option.state & _STATE_HOVER)
+
+        painter.save()
+        painter.setRenderHint(_ANTIALIAS)
+
+        selected = bool(option.state & _STATE_SELECTED)
+
+        # الخلفية والإطار
+        if selected:
+            painter.setPen(QPen(QColor('#4285f4'), 2))
+            painter.setBrush(QColor('#f0f6ff'))
+            painter.drawRoundedRect(QRectF(card).adjusted(1, 1, -1, -1), 12, 12)
+        else:
+            painter.setPen(QPen(QColor('#4285f4' if hovered else '#e0e0e0'), 1))
+            painter.setBrush(QColor('#ffffff'))
+            painter.drawRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), 12, 12)
+
+        # مربع الاختيار عند المرور أو حين يوجد تحديد
+        if self._selection_visible(option) and (hovered or selected or option.widget.has_selection()):
+            check = self.check_rect(card)
+            painter.setPen(QPen(QColor('#4285f4' if selected else '#b0b0b0'), 1.5))
+            painter.setBrush(QColor('#4285f4' if selected else '#ffffff'))
+            painter.drawRoundedRect(QRectF(check).adjusted(0.5, 0.5, -0.5, -0.5), 4, 4)
+            if selected:
+                painter.setPen(QPen(QColor('white'), 2))
+                painter.drawLine(check.x() + 5, check.y() + 10, check.x() + 9, check.y() + 14)
+                painter.drawLine(check.x() + 9, check.y() + 14, check.x() + 15, check.y() + 6)
+
+        # الأيقونة، أو عنصر مؤقت حتى تجهز، أو صورة الحرف الأول
+        icon_rect = QRect(card.x() + (card.width() - ICON_SIZE) // 2, card.y() + CARD_PADDING,
+                          ICON_SIZE, ICON_SIZE)
+        scale = option.widget.devicePixelRatioF() if option.widget is not None else 1.0
+        pixmap, missing = self.loader.pixmap(app.icon, ICON_SIZE, scale)
+        if pixmap is not None:
+            width = round(pixmap.width() / scale)
+            height = round(pixmap.height() / scale)
+            x = icon_rect.x() + (ICON_SIZE - width) // 2
+            y = icon_rect.y() + (ICON_SIZE - height) // 2
+            painter.drawPixmap(x, y, pixmap)
+        elif not missing:
+            # عنصر مؤقت حتى تجهز الأيقونة
+            painter.setPen(_NO_PEN)
+            painter.setBrush(QColor('#f0f0f0'))
+            painter.drawRoundedRect(QRectF(icon_rect), 12, 12)
+        else:
+            painter.drawPixmap(icon_rect.topLeft(), letter_avatar(app.name, ICON_SIZE, scale))
+
+        text_width = card.width() - 2 * CARD_PADDING
+        y = icon_rect.bottom() + 9
+
+        # الاسم (سطران على الأكثر)
+        painter.setFont(self.name_font)
+        painter.setPen(QColor('#333333'))
+        name_metrics = QFontMetrics(self.name_font)
+        name_rect = QRect(card.x() + CARD_PADDING, y, text_width, name_metrics.height() * 2)
+        name = app.name
+        if name_metrics.horizontalAdvance(name) > text_width * 2:
+            name = name_metrics.elidedText(name, _ELIDE_RIGHT, text_width * 2 - 10)
+        bounds = painter.boundingRect(name_rect, _ALIGN_TOP_CENTER | _WORD_WRAP, name)
+        painter.drawText(name_rect, _ALIGN_TOP_CENTER | _WORD_WRAP, name)
+        y += min(bounds.height(), name_rect.height()) + 8
+
+        # الوصف المختصر
+        description = app.description_ar
+        if len(description) > 50:
+            description = description[:50] + "..."
+        button = self.button_rect(card)
+        painter.setFont(self.desc_font)
+        painter.setPen(QColor('#666666'))
+        desc_rect = QRect(card.x() + CARD_PADDING, y, text_width, max(button.top() - 8 - y, 0))
+        painter.setClipRect(desc_rect)
+        painter.drawText(desc_rect, _ALIGN_TOP_CENTER | _WORD_WRAP, description)
+        painter.setClipping(False)
+
+        # زر التثبيت/الإزالة
+        painter.setPen(_NO_PEN)
+        painter.setBrush(QColor('#ea4335' if installed else '#4285f4'))
+        painter.drawRoundedRect(QRectF(button), 6, 6)
+        painter.setPen(QColor('white'))
+        painter.setFont(self.button_font)
+        painter.drawText(button, _ALIGN_CENTER, "إزالة" if installed else "تثبيت")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        """النقر على الزر يطلب التثبيت، وعلى باقي البطاقة يفتح التفاصيل"""
+        if event.type() != _MOUSE_RELEASE or event.button() != _LEFT_BUTTON:
+            return False
+        app = index.data(APP_ROLE)
+        card = self._card_rect(option)
+        pos = event.position().toPoint() if PYQT_VERSION == 6 else event.pos()
+        if app is None or not card.contains(pos):
+            return False
+        if self._selection_visible(option) and (
+                self.check_rect(card).contains(pos) or event.modifiers() & _SELECT_MODIFIERS):
+            # نقرة تحديد، عالجها العرض عند الضغط
+            return True
+        if self.button_rect(card).contains(pos):
+            self.install_clicked.emit(app)
+        else:
+            self.clicked.emit(app)
+        return True
+
+
+class AppGridView(QListView):
+    """عرض شبكي للبطاقات يرسم الظاهر منها فقط"""
+
+    app_clicked = pyqtSignal(object)
+    install_clicked = pyqtSignal(object)
+    selection_changed = pyqtSignal()
+
+    def __init__(self, model: Optional[AppListModel] = None, wrapping: bool = True, parent=None):
+        super().__init__(parent)
+        self.setObjectName("appGrid")
+        if PYQT_VERSION == 6:
+            self.setViewMode(QListView.ViewMode.IconMode)
+            self.setFlow(QListView.Flow.LeftToRight)
+            self.setResizeMode(QListView.ResizeMode.Adjust)
+            self.setMovement(QListView.Movement.Static)
+            self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+            self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+            self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+            self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+            self.viewport().setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        else:
+            self.setViewMode(QListView.IconMode)
+            self.setFlow(QListView.LeftToRight)
+            self.setResizeMode(QListView.Adjust)
+            self.setMovement(QListView.Static)
+            self.setSelectionMode(QAbstractItemView.NoSelection)
+            self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+            self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+            self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            self.viewport().setAttribute(Qt.WA_Hover)
+            self.viewport().setCursor(QCursor(Qt.PointingHandCursor))
+        self.setWrapping(wrapping)
+        # كل البطاقات بنفس الحجم، فيُحسب التخطيط بدون سؤال المفوض عن كل عنصر
+        self.setUniformItemSizes(True)
+        self.setSpacing(CARD_SPACING // 2)
+        self.setMouseTracking(True)
+
+        self.card_delegate = AppCardDelegate(parent=self)
+        # إعادة رسم البطاقات الظاهرة عند وصول أيقونة (Qt يدمج طلبات update المتتالية)
+        self.card_delegate.loader.icon_ready.connect(self._on_icon_ready)
+        self.card_delegate.clicked.connect(self.app_clicked)
+        self.card_delegate.install_clicked.connect(self.install_clicked)
+        self.setItemDelegate(self.card_delegate)
+        self._selectable = False
+        self._app_model: Optional[AppListModel] = None
+        self.set_app_model(model if model is not None else AppListModel(parent=self))
+
+    def columns_for_width(self, width: int) -> int:
+        """عدد الأعمدة التي يتسع لها عرض معين"""
+        spacing = self.spacing()
+        return max(1, (width - spacing) // (CARD_WIDTH + spacing))
+
+    def _reflow(self):
+        """توسيع البطاقات لملء الصف؛ QListView يعيد توزيع العناصر الموجودة"""
+        if not self.isWrapping():
+            return
+        # عرض ثابت سواء ظهر شريط التمرير أم لا، حتى لا يتذبذب التخطيط؛
+        # QListView ينقل البطاقة لصف جديد إذا لامس الصف حافة العرض
+        width = self.contentsRect().width() - self.verticalScrollBar().sizeHint().width() - 1
+        spacing = self.spacing()
+        columns = self.columns_for_width(width)
+        card_width = (width - spacing) // columns - spacing
+        card_width = max(CARD_WIDTH, min(card_width, CARD_MAX_WIDTH))
+        if card_width != self.card_delegate.card_width:
+            self.card_delegate.card_width = card_width
+            self.scheduleDelayedItemsLayout()
+
+    def resizeEvent(self, event):
+        self._reflow()
+        super().resizeEvent(event)
+
+    def _on_icon_ready(self, icon: str):
+        if self.isVisible():
+            self.viewport().update()
+
+    def set_app_model(self, model: AppListModel):
+        """تبديل النموذج المعروض (نماذج الصفحات المحفوظة تُعاد بدون استعلام)"""
+        # الإشارة تُحفظ هنا لأن setModel لا يمتلك النموذج
+        self._app_model = model
+        self.setModel(model)
+        # setModel ينشئ نموذج تحديد جديداً
+        self.selectionModel().selectionChanged.connect(lambda *_: self.selection_changed.emit())
+        self.selection_changed.emit()
+
+    def reset(self):
+        # إعادة تعيين النموذج تمسح التحديد دون إرسال selectionChanged
+        super().reset()
+        self.selection_changed.emit()
+
+    # --- التحديد المتعدد ---
+
+    def set_selectable(self, selectable: bool):
+        """تفعيل التحديد بمربع الاختيار أو Ctrl/Shift مع النقر"""
+        self._selectable = selectable
+        if PYQT_VERSION == 6:
+            mode = QAbstractItemView.SelectionMode.ExtendedSelection if selectable else QAbstractItemView.SelectionMode.NoSelection
+        else:
+            mode = QAbstractItemView.ExtendedSelection if selectable else QAbstractItemView.NoSelection
+        self.setSelectionMode(mode)
+
+    def is_selectable(self) -> bool:
+        return self._selectable
+
+    def has_selection(self) -> bool:
+        return self._selectable and self.selectionModel().hasSelection()
+
+    def selected_apps(self) -> List[AppEntry]:
+        """التطبيقات المحددة بترتيب ظهورها"""
+        if not self._selectable:
+            return []
+        rows = sorted(index.row() for index in self.selectionModel().selectedIndexes())
+        return [self.model().index(row).data(APP_ROLE) for row in rows]
+
+    def selectionCommand(self, index, event=None):
+        """النقر العادي يفتح التفاصيل؛ مربع الاختيار أو Ctrl/Shift يحدد"""
+        if not self._selectable or event is None:
+            return _NO_UPDATE
+        if event.type() in (_MOUSE_PRESS, _MOUSE_RELEASE, _MOUSE_MOVE):
+            pos = event.position().toPoint() if PYQT_VERSION == 6 else event.pos()
+            card = QRect(self.visualRect(index).topLeft(), QSize(self.card_delegate.card_width, CARD_HEIGHT))
+            if event.type() == _MOUSE_PRESS and index.isValid() and self.card_delegate.check_rect(card).contains(pos):
+                return _TOGGLE
+        if event.modifiers() & _SELECT_MODIFIERS:
+            return super().selectionCommand(index, event)
+        return _NO_UPDATE
+
+    def restore_scroll(self, value: int):
+        """استعادة موضع التمرير بعد تبديل النموذج"""
+        self.doItemsLayout()
+        self.verticalScrollBar().setValue(value)
+
+    def app_model(self) -> AppListModel:
+        return self._app_model
+
+
+class SelectionBar(QFrame):
+    """شريط إجراءات التطبيقات المحددة في شبكة"""
+
+    install_requested = pyqtSignal(list)
+    remove_requested = pyqtSignal(list)
+
+    def __init__(self, view: AppGridView, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.setObjectName("selectionBar")
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(15, 8, 15, 8)
+
+        self.count_label = QLabel()
+        self.count_label.setObjectName("selectionCount")
+        layout.addWidget(self.count_label)
+        layout.addStretch()
+
+        self.install_btn = QPushButton()
+        self.install_btn.setObjectName("bulkInstallBtn")
+        self.install_btn.clicked.connect(lambda: self.install_requested.emit(self._selected(False)))
+        layout.addWidget(self.install_btn)
+
+        self.remove_btn = QPushButton()
+        self.remove_btn.setObjectName("bulkRemoveBtn")
+        self.remove_btn.clicked.connect(lambda: self.remove_requested.emit(self._selected(True)))
+        layout.addWidget(self.remove_btn)
+
+        clear_btn = QPushButton("إلغاء التحديد")
+        clear_btn.setObjectName("clearSelectionBtn")
+        clear_btn.clicked.connect(view.clearSelection)
+        layout.addWidget(clear_btn)
+
+        view.selection_changed.connect(self.refresh)
+        self.refresh()
+
+    def _selected(self, installed: bool) -> List[AppEntry]:
+        installed_ids = self.view.app_model().installed_ids
+        return [app for app in self.view.selected_apps() if (app.id in installed_ids) == installed]
+
+    def refresh(self):
+        """تحديث العدادات وإخفاء الشريط إن لم يوجد تحديد"""
+        apps = self.view.selected_apps()
+        self.setVisible(bool(apps))
+        if not apps:
+            return
+        installed_ids = self.view.app_model().installed_ids
+        to_remove = sum(1 for app in apps if app.id in installed_ids)
+        to_install = len(apps) - to_remove
+        self.count_label.setText(f"تم تحديد {len(apps)}")
+        self.install_btn.setText(f"تثبيت {to_install}")
+        self.install_btn.setVisible(to_install > 0)
+        self.remove_btn.setText(f"إزالة {to_remove}")
+        self.remove_btn.setVisible(to_remove > 0)
+        # مربعات الاختيار تظهر على كل البطاقات حين يوجد تحديد
+        self.view.viewport().update()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Linux Store - AppStream
+استيراد بيانات AppStream التي توفرها التوزيعة إلى الكتالوج
+
+المصادر:
+    /usr/share/swcatalog/{xml,yaml}   (AppStream 1.0)
+    /var/lib/app-info/{xmls,yaml}     (المسار القديم)
+
+كل ملف يُقرأ بشكل متدفق في عملية منفصلة ويُكتب الناتج إلى ملف JSONL
+في ~/.cache/linux-store/appstream. عند البدء التالي تُقرأ الملفات
+المخزنة مباشرة ما دام وقت تعديل المصدر وحجمه لم يتغيرا.
+
+بيانات مستودعات flatpak المحفوظة محلياً تُقرأ بنفس الطريقة من:
+    /var/lib/flatpak/appstream/<remote>/<arch>/active/appstream.xml.gz
+مع حفظ المرجع الكامل (app/<id>/<arch>/<branch>) لكل تطبيق.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import dataclasses
+import glob
+import hashlib
+import json
+import logging
+import lzma
+import multiprocessing
+import os
+import platform
+import xml.etree.ElementTree as ET
+import zlib
+
+from app_database import AppEntry, PACKAGE_FIELDS
+from catalog_io import (
+    COMPRESSORS, CatalogFormatError, app_to_record, detect_compression, iter_catalog, open_catalog
+)
+
+# PyYAML اختياري: بدونه تُتخطى ملفات DEP-11
+try:
+    import yaml
+    _YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+except ImportError:
+    yaml = None
+
+
+logger = logging.getLogger(__name__)
+
+# أخطاء مصدر تالف أو غير مقروء: ملف مضغوط معطوب، XML أو YAML غير صالح
+SOURCE_ERRORS = (OSError, ValueError, EOFError, zlib.error, lzma.LZMAError, ET.ParseError) + (
+    (yaml.YAMLError,) if yaml is not None else ()
+)
+
+
+SOURCE_PATTERNS = [
+    '/usr/share/swcatalog/xml/*.xml*',
+    '/usr/share/swcatalog/yaml/*.yml*',
+    '/var/lib/app-info/xmls/*.xml*',
+    '/var/lib/app-info/yaml/*.yml*',
+]
+
+# active رابط رمزي لآخر نسخة منزلة من بيانات المستودع
+FLATPAK_APPSTREAM_PATTERNS = [
+    '/var/lib/flatpak/appstream/*/{arch}/active/appstream.xml.gz',
+    os.path.expanduser('~/.local/share/flatpak/appstream/*/{arch}/active/appstream.xml.gz'),
+]
+
+# أسماء المعماريات في flatpak حين تختلف عن platform.machine
+FLATPAK_ARCHES = {
+    'amd64': 'x86_64',
+    'i686': 'i386',
+    'armv7l': 'arm',
+    'arm64': 'aarch64',
+}
+
+CACHE_DIR = os.path.expanduser('~/.cache/linux-store/appstream')
+
+# يتغير عند تغيير صيغة الناتج حتى تُهمل الملفات المخزنة القديمة
+CACHE_VERSION = 2
+
+# أنواع المكونات التي تُستورد: التطبيقات الرسومية وتطبيقات الطرفية
+APP_TYPES = frozenset(('desktop-application', 'desktop'))
+PACKAGE_TYPES = frozenset(('console-application',))
+
+# تصنيفات freedesktop إلى تصنيفات المتجر بالترتيب
+CATEGORY_MAP = [
+    ('Game', 'games'),
+    ('Development', 'development'),
+    ('Security', 'security'),
+    ('Science', 'science'),
+    ('Education', 'education'),
+    ('Office', 'office'),
+    ('Graphics', 'graphics'),
+    ('AudioVideo', 'multimedia'),
+    ('Audio', 'multimedia'),
+    ('Video', 'multimedia'),
+    ('Network', 'internet'),
+    ('WebBrowser', 'internet'),
+    ('System', 'system'),
+    ('Settings', 'system'),
+    ('Utility', 'utilities'),
+]
+
+_XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+
+def discover_sources(patterns: Iterable[str] = SOURCE_PATTERNS) -> List[str]:
+    """ملفات AppStream الموجودة على النظام"""
+    paths = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            # روابط رمزية معطلة تبقى أحياناً بعد تنظيف قوائم apt
+            if not os.path.isfile(path):
+                continue
+            # بدون PyYAML لا تُسجل ملفات DEP-11 حتى تُقرأ عند تثبيته
+            if yaml is None and '.yml' in os.path.basename(path):
+                continue
+            paths.append(path)
+    return paths
+
+
+def flatpak_arch() -> str:
+    """معمارية الجهاز كما تسميها flatpak"""
+    machine = platform.machine()
+    return FLATPAK_ARCHES.get(machine, machine)
+
+
+def discover_flatpak_sources(patterns: Iterable[str] = FLATPAK_APPSTREAM_PATTERNS) -> List[str]:
+    """ملفات appstream لمستودعات flatpak المضافة (لمعمارية الجهاز فقط)"""
+    arch = flatpak_arch()
+    return discover_sources([pattern.format(arch=arch) for pattern in patterns])
+
+
+def flatpak_remote_of(path: str) -> Optional[str]:
+    """اسم مستودع flatpak من مسار <remote>/<arch>/active/appstream.xml.gz"""
+    parts = path.split(os.sep)
+    if len(parts) >= 5 and parts[-2] == 'active' and parts[-5] == 'appstream':
+        return parts[-4]
+    return None
+
+
+def map_category(categories: Iterable[str]) -> str:
+    """أقرب تصنيف في المتجر لتصنيفات AppStream"""
+    categories = set(categories)
+    for name, category in CATEGORY_MAP:
+        if name in categories:
+            return category
+    return 'utilities'
+
+
+def _make_entry(component_type: str, data: Dict, package_field: Optional[str]) -> Optional[AppEntry]:
+    """إنشاء AppEntry من حقول مكون مستخرجة"""
+    if component_type in APP_TYPES:
+        is_app = True
+    elif component_type in PACKAGE_TYPES:
+        is_app = False
+    else:
+        return None
+
+    app_id = data.get('id', '')
+    name = data.get('name', '')
+    if not app_id or not name:
+        return None
+    app_id = _strip_desktop(app_id)
+
+    fields = {}
+    if data.get('flatpak'):
+        fields['flatpak'] = data['flatpak']
+    if package_field and data.get('pkgname'):
+        fields[package_field] = data['pkgname']
+
+    return AppEntry(
+        id=app_id,
+        name=name,
+        description=data.get('summary', ''),
+        description_ar=data.get('summary_ar', ''),
+        # أدوات الطرفية تُعرض مع الحزم كما في الكتالوج المدمج
+        category=map_category(data.get('categories', ())) if is_app else 'packages',
+        icon=data.get('icon', '') or 'application-x-executable',
+        is_app=is_app,
+        website=data.get('homepage', ''),
+        keywords=list(dict.fromkeys(data.get('keywords', ()))),
+        **fields,
+    )
+
+
+def _strip_desktop(component_id: str) -> str:
+    """المعرفات القديمة تنتهي بـ .desktop"""
+    if component_id.endswith('.desktop'):
+        return component_id[:-len('.desktop')]
+    return component_id
+
+
+def _flatpak_id(ref: str) -> str:
+    """معرف التطبيق من مرجع flatpak مثل app/org.gimp.GIMP/x86_64/stable"""
+    parts = ref.split('/')
+    return parts[1] if len(parts) >= 2 and parts[0] == 'app' else ref
+
+
+def _localized(element, lang: Optional[str]) -> bool:
+    """هل العنصر باللغة المطلوبة (None للنص الافتراضي)"""
+    value = element.get(_XML_LANG)
+    if lang is None:
+        return value in (None, 'C', 'en')
+    return value == lang or (value or '').startswith(lang + '_')
+
+
+def iter_xml_components(f, package_field: Optional[str] = None,
+                        flatpak_refs: Optional[Dict[str, str]] = None) -> Iterator[AppEntry]:
+    """قراءة مكونات ملف AppStream XML واحداً تلو الآخر
+
+    مع flatpak_refs (لبيانات مستودع flatpak) كل مكون تطبيق flatpak، ويُسجل
+    فيها المرجع الكامل لكل معرف.
+    """
+    root = None
+    for event, element in ET.iterparse(f, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            continue
+        if element.tag != 'component':
+            continue
+
+        data: Dict = {'categories': [], 'keywords': []}
+        for child in element:
+            tag = child.tag
+            text = (child.text or '').strip()
+            if tag == 'id':
+                data['id'] = text
+            elif tag == 'pkgname':
+                data.setdefault('pkgname', text)
+            elif tag in ('name', 'summary'):
+                if _localized(child, None):
+                    data.setdefault(tag, text)
+                elif tag == 'summary' and _localized(child, 'ar'):
+                    data.setdefault('summary_ar', text)
+            elif tag == 'categories':
+                data['categories'] = [item.text or '' for item in child]
+            elif tag == 'keywords':
+                data['keywords'] = [
+                    (item.text or '').strip() for item in child
+                    if _localized(item, None) and item.text
+                ]
+            elif tag == 'url' and child.get('type') == 'homepage':
+                data['homepage'] = text
+            elif tag == 'icon':
+                icon_type = child.get('type')
+                if icon_type == 'stock':
+                    data['icon'] = text
+                elif icon_type == 'cached' and 'icon' not in data:
+                    data['icon'] = text.rsplit('.', 1)[0]
+            elif tag == 'bundle' and child.get('type') == 'flatpak':
+                data['flatpak'] = _flatpak_id(text)
+                data['ref'] = text
+            elif tag == 'launchable' and 'id' not in data:
+                data['id'] = text
+
+        if flatpak_refs is not None and data.get('id'):
+            flatpak_id = data.setdefault('flatpak', _strip_desktop(data['id']))
+            flatpak_refs[flatpak_id] = data.get('ref') or f"app/{flatpak_id}"
+
+        entry = _make_entry(element.get('type', ''), data, package_field)
+        if entry is not None:
+            yield entry
+
+        # تحرير المكون المعالج حتى تبقى الذاكرة محدودة
+        element.clear()
+        if root is not None:
+            root.clear()
+
+
+def _yaml_text(value, lang: Optional[str] = None) -> str:
+    """نص مترجم من قاموس DEP-11 مثل {C: ..., ar: ...}"""
+    if isinstance(value, str):
+        return value if lang is None else ''
+    if not isinstance(value, dict):
+        return ''
+    if lang is None:
+        return value.get('C') or value.get('en') or ''
+    return value.get(lang, '')
+
+
+def iter_yaml_components(f, package_field: Optional[str] = None) -> Iterator[AppEntry]:
+    """قراءة مستندات DEP-11 YAML واحداً تلو الآخر"""
+    if yaml is None:
+        return
+
+    for document in yaml.load_all(f, Loader=_YamlLoader):
+        if not isinstance(document, dict) or 'ID' not in document:
+            continue
+
+        icon = document.get('Icon') or {}
+        icon_name = icon.get('stock', '')
+        if not icon_name and icon.get('cached'):
+            icon_name = str(icon['cached'][0].get('name', '')).rsplit('.', 1)[0]
+
+        flatpak = ''
+        for bundle in document.get('Bundles') or ():
+            if bundle.get('type') == 'flatpak':
+                flatpak = _flatpak_id(bundle.get('id', ''))
+
+        keywords = document.get('Keywords') or {}
+        data = {
+            'id': document['ID'],
+            'pkgname': document.get('Package', ''),
+            'name': _yaml_text(document.get('Name')),
+            'summary': _yaml_text(document.get('Summary')),
+            'summary_ar': _yaml_text(document.get('Summary'), 'ar'),
+            'categories': document.get('Categories') or [],
+            'keywords': keywords.get('C', []) if isinstance(keywords, dict) else [],
+            'homepage': (document.get('Url') or {}).get('homepage', ''),
+            'icon': icon_name,
+            'flatpak': flatpak,
+        }
+        entry = _make_entry(document.get('Type', ''), data, package_field)
+        if entry is not None:
+            yield entry
+
+
+def _open_source(path: str):
+    """فتح ملف مصدر ثنائياً مع فك الضغط"""
+    compression = detect_compression(path)
+    if compression:
+        return COMPRESSORS[compression].open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_source(path: str, package_field: Optional[str] = None,
+                flatpak_refs: Optional[Dict[str, str]] = None) -> Iterator[AppEntry]:
+    """قراءة ملف AppStream حسب صيغته"""
+    name = os.path.basename(path).lower()
+    is_yaml = '.yml' in name or '.yaml' in name
+    if is_yaml and yaml is None:
+        return
+    with _open_source(path) as f:
+        if is_yaml:
+            try:
+                yield from iter_yaml_components(f, package_field)
+            except yaml.YAMLError as e:
+                raise CatalogFormatError(f"{path}: {e}") from e
+        else:
+            try:
+                yield from iter_xml_components(f, package_field, flatpak_refs)
+            except ET.ParseError as e:
+                raise CatalogFormatError(f"{path}: {e}") from e
+
+
+def _cache_key(path: str, package_field: Optional[str]) -> str:
+    """اسم ملف التخزين لمصدر"""
+    digest = hashlib.sha1(f"{path}\0{package_field}".encode('utf-8')).hexdigest()[:16]
+    return f"{digest}.jsonl"
+
+
+def _source_stamp(path: str) -> List:
+    """الملف الفعلي ووقت تعديله وحجمه لمعرفة تغير المصدر
+
+    الملف الفعلي يتغير عندما يشير رابط active في flatpak لنسخة جديدة.
+    """
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def _convert_source(task: Tuple[str, Optional[str], str]) -> Tuple[str, int, Optional[Dict[str, str]]]:
+    """تحويل مصدر واحد إلى ملف JSONL مخزن (في عملية منفصلة)"""
+    path, package_field, cache_path = task
+    # الحزم في مستودعات flatpak ليست حزم النظام
+    flatpak_refs = None
+    if flatpak_remote_of(path) is not None:
+        flatpak_refs = {}
+        package_field = None
+    temp_path = cache_path + '.tmp'
+    count = 0
+    try:
+        with open_catalog(temp_path, 'w') as out:
+            for entry in iter_source(path, package_field, flatpak_refs):
+                out.write(json.dumps(app_to_record(entry), ensure_ascii=False))
+                out.write('\n')
+                count += 1
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        # مصدر تالف لا يترك ملفاً مؤقتاً نصف مكتوب
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path, count, flatpak_refs
+
+
+class AppStreamCache:
+    """ملفات JSONL مخزنة لكل مصدر AppStream مع فهرس أوقات التعديل"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.index: Dict[str, Dict] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data.get('sources', {})
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'sources': self.index}, f)
+        os.replace(temp_path, self.index_path)
+
+    def is_fresh(self, path: str, package_field: Optional[str]) -> bool:
+        """هل الملف المخزن يطابق المصدر الحالي"""
+        entry = self.index.get(path)
+        if entry is None or entry.get('package_field') != package_field:
+            return False
+        try:
+            stamp = _source_stamp(path)
+        except OSError:
+            return False
+        return entry.get('stamp') == stamp and os.path.exists(
+            os.path.join(self.cache_dir, entry['cache'])
+        )
+
+    def update(self, sources: List[str], package_field: Optional[str] = None,
+               max_workers: Optional[int] = None) -> Dict[str, int]:
+        """تحويل المصادر المتغيرة فقط، بالتوازي عبر عدة عمليات"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stale = [path for path in sources if not self.is_fresh(path, package_field)]
+
+        # مصادر لم تعد موجودة
+        for path in list(self.index):
+            if path not in sources:
+                self._remove(path)
+
+        if not stale:
+            return {}
+
+        stamps = {path: _source_stamp(path) for path in stale}
+        tasks = [
+            (path, package_field, os.path.join(self.cache_dir, _cache_key(path, package_field)))
+            for path in stale
+        ]
+
+        counts = {}
+        refs = {}
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+        if workers == 1:
+            for task in tasks:
+                try:
+                    _, counts[task[0]], refs[task[0]] = _convert_source(task)
+                except SOURCE_ERRORS as e:
+                    logger.warning("تعذر قراءة %s: %s", task[0], e)
+        else:
+            # spawn بدلاً من fork: التحميل يجري داخل خيط والواجهة محملة
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {pool.submit(_convert_source, task): task[0] for task in tasks}
+                for future, path in futures.items():
+                    try:
+                        _, counts[path], refs[path] = future.result()
+                    except (*SOURCE_ERRORS, BrokenProcessPool) as e:
+                        logger.warning("تعذر قراءة %s: %s", path, e)
+
+        for path, count in counts.items():
+            self.index[path] = {
+                'stamp': stamps[path],
+                'package_field': package_field,
+                'cache': _cache_key(path, package_field),
+                'count': count,
+            }
+            if refs.get(path) is not None:
+                self.index[path]['remote'] = flatpak_remote_of(path)
+                self.index[path]['refs'] = refs[path]
+        self._save_index()
+        return counts
+
+    def _remove(self, path: str):
+        entry = self.index.pop(path, None)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['cache']))
+            except OSError:
+                pass
+
+    def flatpak_refs(self, sources: List[str]) -> Dict[str, Tuple[str, str]]:
+        """(المستودع، المرجع الكامل) لكل معرف flatpak؛ المستودع الأسبق أولاً"""
+        refs: Dict[str, Tuple[str, str]] = {}
+        for path in sources:
+            entry = self.index.get(path, {})
+            remote = entry.get('remote')
+            for flatpak_id, ref in entry.get('refs', {}).items():
+                refs.setdefault(flatpak_id, (remote, ref))
+        return refs
+
+    def iter_apps(self, sources: List[str]) -> Iterator[AppEntry]:
+        """قراءة التطبيقات من الملفات المخزنة على دفعات"""
+        for path in sources:
+            entry = self.index.get(path)
+            if entry is None:
+                continue
+            cache_path = os.path.join(self.cache_dir, entry['cache'])
+            for batch in iter_catalog(cache_path):
+                yield from batch
+
+
+def known_package_ids(apps: Iterable[AppEntry]) -> Set[str]:
+    """معرفات flatpak وأسماء الحزم للتطبيقات الموجودة لتفادي التكرار"""
+    known = set()
+    for app in apps:
+        for field_name in PACKAGE_FIELDS:
+            value = getattr(app, field_name)
+            if value:
+                known.add(f"{field_name}:{value}")
+    return known
+
+
+def default_sources() -> List[str]:
+    """مصادر التوزيعة ثم مستودعات flatpak"""
+    return discover_sources() + discover_flatpak_sources()
+
+
+def merge_duplicates(apps: Iterable[AppEntry]) -> List[AppEntry]:
+    """دمج التطبيق الموجود في أكثر من مصدر (مثل حزمة apt ونسخة Flathub)
+
+    الظهور الأول يبقى، وتُكمل حقول الحزم الفارغة فيه من الظهورات التالية.
+    """
+    merged: Dict[str, AppEntry] = {}
+    for app in apps:
+        existing = merged.get(app.id)
+        if existing is None:
+            merged[app.id] = app
+            continue
+        missing = {
+            field_name: getattr(app, field_name) for field_name in PACKAGE_FIELDS
+            if getattr(app, field_name) and not getattr(existing, field_name)
+        }
+        if missing:
+            merged[app.id] = dataclasses.replace(existing, **missing)
+    return list(merged.values())
+
+
+def load_flatpak_refs(cache_dir: str = CACHE_DIR) -> Dict[str, Tuple[str, str]]:
+    """مراجع flatpak المخزنة لمستودعات الجهاز (بعد تحديثها عبر iter_appstream_apps)"""
+    return AppStreamCache(cache_dir).flatpak_refs(discover_flatpak_sources())
+
+
+def iter_appstream_apps(sources: Optional[List[str]] = None,
+                        package_field: Optional[str] = None,
+                        exclude: Optional[Set[str]] = None,
+                        cache_dir: str = CACHE_DIR,
+                        max_workers: Optional[int] = None) -> Iterator[AppEntry]:
+    """تطبيقات AppStream من التخزين (مع تحديث المصادر المتغيرة أولاً)
+
+    exclude مجموعة "حقل:اسم" من known_package_ids: أي مكون يشير لنفس
+    الحزمة أو نفس تطبيق flatpak يُتخطى.
+    """
+    sources = default_sources() if sources is None else sources
+    cache = AppStreamCache(cache_dir)
+    cache.update(sources, package_field, max_workers)
+
+    exclude = exclude or set()
+    for app in cache.iter_apps(sources):
+        if exclude and any(
+            f"{field_name}:{getattr(app, field_name)}" in exclude
+            for field_name in PACKAGE_FIELDS if getattr(app, field_name)
+        ):
+            continue
+        yield app
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    paths = sys.argv[1:] or default_sources()
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_appstream_apps(paths))
+    print(f"{len(paths)} مصدر، {count} تطبيق في {time.perf_counter() - start:.2f} s")
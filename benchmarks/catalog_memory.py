@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Catalog Memory Benchmark
+قياس حجم الكتالوج في الذاكرة عند تحميل مستودع كامل
+
+الاستخدام:
+    python3 benchmarks/catalog_memory.py [عدد الإدخالات]
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app_database import AppDatabase, AppEntry
+
+CATEGORIES = list(AppDatabase.CATEGORIES)
+KEYWORDS = ['browser', 'editor', 'media', 'server', 'database', 'game', 'tool', 'library']
+
+
+def make_record(i: int) -> str:
+    """سطر JSON يشبه إدخالات مستودعات التوزيعات"""
+    name = f"package-{i}"
+    # أغلب حزم المستودعات لها اسم في مدير واحد أو اثنين فقط
+    return json.dumps({
+        'id': name,
+        'name': name,
+        'description': f"Synthetic package number {i}",
+        'description_ar': "",
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'icon': 'application-x-executable',
+        'is_app': i % 5 == 0,
+        'pacman': name if i % 2 == 0 else "",
+        'apt': name if i % 3 == 0 else "",
+        'dnf': name if i % 4 == 0 else "",
+        'keywords': [KEYWORDS[i % len(KEYWORDS)], KEYWORDS[(i * 7) % len(KEYWORDS)]],
+        'featured': i % 1000 == 0,
+        'popular': i % 100 == 0,
+    })
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    db = AppDatabase()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(count):
+        # كل سطر يُحلل بشكل مستقل كما يحدث عند الاستيراد
+        db._add_app(AppEntry(**json.loads(make_record(i))))
+
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    catalog_bytes = current - baseline
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"entries:            {len(db.apps)}")
+    print(f"load time:          {elapsed:.2f} s")
+    print(f"catalog size:       {catalog_bytes / 1024 / 1024:.1f} MiB")
+    print(f"bytes per entry:    {catalog_bytes / count:.0f}")
+    print(f"peak traced:        {peak / 1024 / 1024:.1f} MiB")
+    print(f"max RSS:            {max_rss_kb / 1024:.1f} MiB")
+    print(f"has __dict__:       {hasattr(db.get_app('package-0'), '__dict__')}")
+
+
+if __name__ == '__main__':
+    main()
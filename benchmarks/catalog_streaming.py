@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Catalog Streaming Benchmark
+قياس الذاكرة أثناء تصدير واستيراد كتالوج كبير بشكل متدفق
+
+الاستخدام:
+    python3 benchmarks/catalog_streaming.py [عدد الإدخالات]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from catalog_io import iter_catalog, write_catalog
+from catalog_memory import CATEGORIES, KEYWORDS
+from app_database import AppDatabase, AppEntry
+
+
+def generate_apps(count: int):
+    """توليد التطبيقات واحداً تلو الآخر"""
+    for i in range(count):
+        name = f"package-{i}"
+        yield AppEntry(
+            id=name,
+            name=name,
+            description=f"Synthetic package number {i} " * 4,
+            description_ar="",
+            category=CATEGORIES[i % len(CATEGORIES)],
+            icon='application-x-executable',
+            pacman=name,
+            keywords=[KEYWORDS[i % len(KEYWORDS)]],
+        )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workdir = tempfile.mkdtemp(prefix='linux-store-bench-')
+
+    for filename in ('catalog.json', 'catalog.jsonl', 'catalog.jsonl.gz'):
+        path = os.path.join(workdir, filename)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        write_catalog(path, generate_apps(count), AppDatabase.CATEGORIES)
+        write_time = time.perf_counter() - start
+        _, write_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        records = 0
+        for batch in iter_catalog(path, strict=True):
+            records += len(batch)
+        read_time = time.perf_counter() - start
+        _, read_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"{filename:18} {size_mb:8.1f} MiB  "
+              f"write {write_time:5.2f} s (peak {write_peak / 1024 / 1024:5.1f} MiB)  "
+              f"read {records} in {read_time:5.2f} s (peak {read_peak / 1024 / 1024:5.1f} MiB)")
+        os.remove(path)
+
+    os.rmdir(workdir)
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Package Mapping Benchmark
+قياس زمن بناء جدول أسماء الحزم على بيانات مستودعات مولدة لأربع توزيعات
+
+الاستخدام:
+    python3 benchmarks/package_mapping.py [عدد التطبيقات] [عدد الحزم الإضافية لكل توزيعة]
+"""
+
+import gzip
+import io
+import lzma
+import os
+import random
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app_database import AppEntry
+from package_mapping import build_package_map
+
+
+def generate_corpus(app_count: int, noise: int, workdir: str):
+    """توليد الكتالوج وملفات المستودعات والإجابات الصحيحة"""
+    rng = random.Random(42)
+    apps = []
+    truth = {'apt': {}, 'dnf': {}, 'zypper': {}}
+    repos = {'pacman': [], 'apt': [], 'dnf': [], 'zypper': []}
+
+    for i in range(app_count):
+        base = f"tool{i}-{rng.choice(['viewer', 'editor', 'player', 'daemon'])}"
+        website = f"https://{base}.example.org"
+        apps.append(AppEntry(
+            id=base, name=base.replace('-', ' ').title(), description='', description_ar='',
+            category='utilities', icon='', website=website, pacman=base,
+        ))
+        repos['pacman'].append((base, website, base))
+
+        # أنماط مختلفة لكل توزيعة: نفس الاسم، رابط فقط، أو اسم مشابه بلا رابط
+        variants = {
+            'apt': [(base, website), (f"{base}-bin", website), (base.replace('-', ''), '')],
+            'dnf': [(base, website), (base.title(), website), (f"{base}s", '')],
+            'zypper': [(base, website), (f"{base}-main", website), (base.replace('-', '_'), '')],
+        }
+        for field_name, choices in variants.items():
+            name, url = rng.choice(choices)
+            repos[field_name].append((name, url, None))
+            truth[field_name][base] = name
+
+    for field_name, packages in repos.items():
+        for j in range(noise):
+            packages.append((f"lib{field_name}{j}-{rng.randrange(10**6)}", f"https://n{j}.example.com", None))
+        rng.shuffle(packages)
+
+    sources = {
+        'pacman': [_write_pacman(os.path.join(workdir, 'extra.db'), repos['pacman'])],
+        'apt': [_write_deb(os.path.join(workdir, 'Packages.gz'), repos['apt'])],
+        'dnf': [_write_rpm(os.path.join(workdir, 'fedora-primary.xml.gz'), repos['dnf'])],
+        'zypper': [_write_rpm(os.path.join(workdir, 'suse-primary.xml.xz'), repos['zypper'])],
+    }
+    return apps, sources, truth
+
+
+def _write_pacman(path, packages):
+    with tarfile.open(path, 'w:gz') as archive:
+        for name, url, desktop in packages:
+            text = f"%NAME%\n{name}\n\n%URL%\n{url}\n\n"
+            if desktop:
+                text += f"%FILES%\nusr/share/applications/{desktop}.desktop\n\n"
+            data = text.encode('utf-8')
+            info = tarfile.TarInfo(f"{name}-1.0-1/desc")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _write_deb(path, packages):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for name, url, _ in packages:
+            f.write(f"Package: {name}\nVersion: 1.0\n")
+            if url:
+                f.write(f"Homepage: {url}\n")
+            f.write("Description: synthetic\n\n")
+    return path
+
+
+def _write_rpm(path, packages):
+    opener = lzma.open if path.endswith('.xz') else gzip.open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0"?>\n<metadata xmlns="http://linux.duke.edu/metadata/common">\n')
+        for name, url, _ in packages:
+            f.write(f'<package type="rpm"><name>{escape(name)}</name><url>{escape(url)}</url></package>\n')
+        f.write('</metadata>\n')
+    return path
+
+
+def main():
+    app_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    noise = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    workdir = tempfile.mkdtemp(prefix='linux-store-map-')
+
+    try:
+        start = time.perf_counter()
+        apps, sources, truth = generate_corpus(app_count, noise, workdir)
+        print(f"توليد {app_count} تطبيق و{noise} حزمة إضافية لكل توزيعة: "
+              f"{time.perf_counter() - start:.2f} s")
+
+        for jobs in sorted({1, os.cpu_count() or 1, len(sources)}):
+            result = build_package_map(apps, sources, max_workers=jobs)
+            correct = sum(
+                1 for field_name, expected in truth.items()
+                for app_id, name in expected.items()
+                if result['packages'].get(app_id, {}).get(field_name, {}).get('name') == name
+            )
+            total = sum(len(expected) for expected in truth.values())
+            print(f"jobs={jobs}: {result['build_seconds']:.2f} s  "
+                  f"صحيح {correct}/{total} ({100 * correct / total:.1f}%)")
+            for field_name, stats in result['stats'].items():
+                print(f"    {field_name:7} parse {stats['parse_seconds']:.2f} s  "
+                      f"match {stats['match_seconds']:.2f} s  "
+                      f"{stats['matched']}/{stats['candidates']}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Catalog Delta
+تحديثات تفاضلية للكتالوج (إضافة/تعديل/حذف) مبنية على بصمة محتوى أساسية
+
+صيغة الملف (مع ضغط اختياري .gz/.bz2/.xz):
+    {
+      "format": "linux-store-delta",
+      "version": 1,
+      "base": "<بصمة الكتالوج قبل التحديث>",
+      "target": "<بصمة الكتالوج بعد التحديث>",
+      "add": [{سجل تطبيق}, ...],
+      "modify": [{سجل تطبيق}, ...],
+      "remove": ["app-id", ...]
+    }
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Set
+import json
+
+from app_database import AppEntry
+from catalog_io import CatalogFormatError, app_to_record, open_catalog, validate_batch
+
+
+DELTA_FORMAT = 'linux-store-delta'
+DELTA_VERSION = 1
+
+
+class DeltaMismatchError(CatalogFormatError):
+    """التحديث لا ينطبق على الكتالوج الحالي"""
+
+
+@dataclass
+class CatalogDelta:
+    """تحديث تفاضلي للكتالوج"""
+    base: str
+    target: str = ""
+    added: List[AppEntry] = field(default_factory=list)
+    modified: List[AppEntry] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def touched_ids(self) -> Set[str]:
+        """معرفات التطبيقات التي يغيرها التحديث"""
+        ids = {app.id for app in self.added}
+        ids.update(app.id for app in self.modified)
+        ids.update(self.removed)
+        return ids
+
+    def operation_count(self) -> int:
+        """عدد العمليات في التحديث"""
+        return len(self.added) + len(self.modified) + len(self.removed)
+
+    def check_against(self, apps: Mapping[str, AppEntry]):
+        """التحقق من انطباق العمليات قبل تنفيذ أي منها"""
+        errors = []
+        for app in self.added:
+            if app.id in apps:
+                errors.append(f"إضافة تطبيق موجود: {app.id}")
+        for app in self.modified:
+            if app.id not in apps:
+                errors.append(f"تعديل تطبيق غير موجود: {app.id}")
+        for app_id in self.removed:
+            if app_id not in apps:
+                errors.append(f"حذف تطبيق غير موجود: {app_id}")
+        if errors:
+            raise DeltaMismatchError('\n'.join(errors[:10]))
+
+    def to_dict(self) -> Dict:
+        """تحويل التحديث إلى قاموس قابل للتسلسل"""
+        return {
+            'format': DELTA_FORMAT,
+            'version': DELTA_VERSION,
+            'base': self.base,
+            'target': self.target,
+            'add': [app_to_record(app) for app in self.added],
+            'modify': [app_to_record(app) for app in self.modified],
+            'remove': list(self.removed),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CatalogDelta':
+        """إنشاء تحديث من قاموس مع التحقق من السجلات"""
+        if data.get('format') != DELTA_FORMAT:
+            raise CatalogFormatError("الملف ليس تحديثاً تفاضلياً للكتالوج")
+        if data.get('version') != DELTA_VERSION:
+            raise CatalogFormatError(f"إصدار تحديث غير مدعوم: {data.get('version')}")
+
+        added, add_errors = validate_batch(data.get('add', []))
+        modified, modify_errors = validate_batch(data.get('modify', []))
+        errors = add_errors + modify_errors
+        if errors:
+            raise CatalogFormatError('\n'.join(errors[:10]))
+
+        removed = data.get('remove', [])
+        if not all(isinstance(app_id, str) for app_id in removed):
+            raise CatalogFormatError("قائمة الحذف يجب أن تحتوي معرفات نصية")
+
+        return cls(
+            base=str(data.get('base', '')),
+            target=str(data.get('target', '')),
+            added=added,
+            modified=modified,
+            removed=list(removed),
+        )
+
+
+def load_delta(filepath: str, compression: Optional[str] = None) -> CatalogDelta:
+    """قراءة تحديث تفاضلي من ملف"""
+    with open_catalog(filepath, 'r', compression) as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise CatalogFormatError(str(e)) from e
+    return CatalogDelta.from_dict(data)
+
+
+def save_delta(delta: CatalogDelta, filepath: str, compression: Optional[str] = None):
+    """كتابة تحديث تفاضلي إلى ملف"""
+    with open_catalog(filepath, 'w', compression) as f:
+        json.dump(delta.to_dict(), f, ensure_ascii=False)
+
+
+def diff_catalogs(base, target) -> CatalogDelta:
+    """حساب التحديث التفاضلي بين قاعدتين"""
+    base_apps = base.apps
+    target_apps = target.apps
+
+    added = []
+    modified = []
+    for app_id, app in target_apps.items():
+        old = base_apps.get(app_id)
+        if old is None:
+            added.append(app)
+        elif old != app:
+            modified.append(app)
+
+    removed = [app_id for app_id in base_apps if app_id not in target_apps]
+
+    return CatalogDelta(
+        base=base.content_hash(),
+        target=target.content_hash(),
+        added=added,
+        modified=modified,
+        removed=removed,
+    )
+
+
+if __name__ == '__main__':
+    import sys
+    from app_database import AppDatabase
+
+    if len(sys.argv) != 3:
+        print("الاستخدام: catalog_delta.py <كتالوج أساسي> <كتالوج جديد>")
+        sys.exit(1)
+
+    # حساب التحديث بين ملفي كتالوج
+    old_db = AppDatabase(load_defaults=False)
+    new_db = AppDatabase(load_defaults=False)
+    old_db.import_from_json(sys.argv[1])
+    new_db.import_from_json(sys.argv[2])
+
+    result = diff_catalogs(old_db, new_db)
+    json.dump(result.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
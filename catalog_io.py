@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Catalog I/O
+استيراد وتصدير الكتالوج بشكل متدفق سجلاً بسجل
+
+الصيغ المدعومة حسب امتداد الملف:
+    .json   كائن {"categories": ..., "apps": {id: {...}}} يُقرأ تدريجياً
+    .jsonl  سطر JSON لكل تطبيق
+مع ضغط اختياري: .gz أو .bz2 أو .xz
+"""
+
+import bz2
+import dataclasses
+import gzip
+import json
+import logging
+import lzma
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app_database import AppEntry
+
+
+logger = logging.getLogger(__name__)
+
+# وحدات الضغط حسب الامتداد
+COMPRESSORS = {
+    'gz': gzip,
+    'bz2': bz2,
+    'xz': lzma,
+}
+
+# عدد السجلات في كل دفعة تحقق واستيراد
+BATCH_SIZE = 1000
+
+# حجم القراءة من الملف في كل مرة
+READ_SIZE = 64 * 1024
+
+_FIELDS = {f.name: f for f in dataclasses.fields(AppEntry)}
+_REQUIRED = frozenset(
+    name for name, f in _FIELDS.items()
+    if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+)
+_BOOL_FIELDS = frozenset(('is_app', 'featured', 'popular'))
+
+
+class CatalogFormatError(ValueError):
+    """خطأ في صيغة ملف الكتالوج"""
+
+
+def detect_compression(filepath: str) -> Optional[str]:
+    """اكتشاف نوع الضغط من امتداد الملف"""
+    extension = filepath.rsplit('.', 1)[-1].lower()
+    return extension if extension in COMPRESSORS else None
+
+
+def is_jsonl(filepath: str) -> bool:
+    """هل الملف بصيغة JSON Lines"""
+    name = filepath.lower()
+    if detect_compression(name):
+        name = name.rsplit('.', 1)[0]
+    return name.endswith('.jsonl') or name.endswith('.ndjson')
+
+
+def open_catalog(filepath: str, mode: str = 'r', compression: Optional[str] = None):
+    """فتح ملف كتالوج نصي مع فك أو تفعيل الضغط"""
+    compression = compression or detect_compression(filepath)
+    if compression:
+        if compression not in COMPRESSORS:
+            raise CatalogFormatError(f"نوع ضغط غير مدعوم: {compression}")
+        return COMPRESSORS[compression].open(filepath, mode + 't', encoding='utf-8')
+    return open(filepath, mode, encoding='utf-8')
+
+
+def app_to_record(app: AppEntry) -> Dict:
+    """تحويل تطبيق إلى سجل قابل للتسلسل"""
+    record = {name: getattr(app, name) for name in _FIELDS}
+    record['keywords'] = list(app.keywords)
+    return record
+
+
+def validate_batch(records: List) -> Tuple[List[AppEntry], List[str]]:
+    """التحقق من دفعة سجلات دفعة واحدة قبل إنشاء أي تطبيق
+
+    تعيد التطبيقات الصالحة وقائمة رسائل الأخطاء للسجلات المرفوضة.
+    الحقول غير المعروفة تُتجاهل للتوافق مع إصدارات أحدث، والحقول المنطقية
+    تقبل 0 و1 كما كان يقبلها AppEntry(**data) سابقاً.
+    """
+    entries = []
+    errors = []
+
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"السجل {index}: ليس كائناً")
+            continue
+
+        missing = _REQUIRED - record.keys()
+        if missing:
+            errors.append(f"السجل {record.get('id', index)}: حقول ناقصة {sorted(missing)}")
+            continue
+
+        data = {}
+        problems = []
+        for name, value in record.items():
+            if name not in _FIELDS:
+                continue
+            if name == 'keywords':
+                ok = isinstance(value, list) and all(isinstance(kw, str) for kw in value)
+            elif name in _BOOL_FIELDS:
+                ok = isinstance(value, bool) or (type(value) is int and value in (0, 1))
+                value = bool(value)
+            else:
+                ok = isinstance(value, str)
+            if ok:
+                data[name] = value
+            else:
+                problems.append(name)
+
+        if problems:
+            errors.append(f"السجل {record.get('id', index)}: أنواع غير صحيحة {problems}")
+            continue
+
+        entries.append(AppEntry(**data))
+
+    return entries, errors
+
+
+class _JsonStream:
+    """قارئ JSON تدريجي يفك قيمة واحدة في كل مرة"""
+
+    def __init__(self, f, read_size: int = READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """قراءة المزيد من الملف مع التخلص مما تمت معالجته"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """أول حرف غير فارغ"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        """استهلاك حرف متوقع"""
+        if self.peek() != char:
+            raise CatalogFormatError(f"متوقع '{char}' في ملف الكتالوج")
+        self.pos += 1
+
+    def value(self):
+        """فك قيمة JSON كاملة من الموضع الحالي"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # القيمة قد تكون مقطوعة عند نهاية المخزن المؤقت
+                if self._fill():
+                    continue
+                raise CatalogFormatError(str(e)) from e
+            # الأرقام قد تنتهي عند حد المخزن المؤقت
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_json_records(f) -> Iterator[Dict]:
+    """قراءة سجلات التطبيقات من كائن "apps" بدون تحميل الملف كاملاً"""
+    stream = _JsonStream(f)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'apps':
+            stream.expect('{')
+            if stream.peek() != '}':
+                while True:
+                    stream.value()
+                    stream.expect(':')
+                    yield stream.value()
+                    if stream.peek() != ',':
+                        break
+                    stream.pos += 1
+            stream.expect('}')
+        else:
+            # قيم أخرى مثل التصنيفات صغيرة وتُتخطى
+            stream.value()
+
+        if stream.peek() != ',':
+            break
+        stream.pos += 1
+    stream.expect('}')
+
+
+def _iter_jsonl_records(f) -> Iterator[Dict]:
+    """قراءة سطر JSON لكل سجل"""
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise CatalogFormatError(f"السطر {line_number}: {e}") from e
+
+
+def iter_catalog(filepath: str, batch_size: int = BATCH_SIZE,
+                 compression: Optional[str] = None,
+                 strict: bool = False,
+                 errors: Optional[List[str]] = None) -> Iterator[List[AppEntry]]:
+    """قراءة الكتالوج على دفعات من التطبيقات المتحقق منها
+
+    مع strict=True يُرفع CatalogFormatError عند أول دفعة فيها سجلات غير صالحة،
+    وإلا تُتخطى هذه السجلات وتُسجل في السجل، وتُضاف رسائلها إلى errors إن مُررت.
+    """
+    with open_catalog(filepath, 'r', compression) as f:
+        records = _iter_jsonl_records(f) if is_jsonl(filepath) else _iter_json_records(f)
+
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield _checked(batch, strict, filepath, errors)
+                batch = []
+        if batch:
+            yield _checked(batch, strict, filepath, errors)
+
+
+def _checked(batch: List, strict: bool, filepath: str,
+             skipped: Optional[List[str]] = None) -> List[AppEntry]:
+    """التحقق من دفعة وتطبيق وضع الصرامة"""
+    entries, errors = validate_batch(batch)
+    if errors:
+        if strict:
+            raise CatalogFormatError('\n'.join(errors[:10]))
+        logger.warning("%s: تم تخطي %d سجلاً غير صالح: %s", filepath, len(errors), '; '.join(errors[:5]))
+        if skipped is not None:
+            skipped.extend(errors)
+    return entries
+
+
+def write_catalog(filepath: str, apps: Iterable[AppEntry],
+                  categories: Optional[Dict] = None,
+                  compression: Optional[str] = None):
+    """كتابة الكتالوج سجلاً بسجل بالصيغة المناسبة لامتداد الملف"""
+    with open_catalog(filepath, 'w', compression) as f:
+        if is_jsonl(filepath):
+            for app in apps:
+                f.write(json.dumps(app_to_record(app), ensure_ascii=False))
+                f.write('\n')
+            return
+
+        f.write('{\n  "categories": ')
+        f.write(json.dumps(categories or {}, ensure_ascii=False))
+        f.write(',\n  "apps": {')
+        first = True
+        for app in apps:
+            f.write('\n    ' if first else ',\n    ')
+            f.write(json.dumps(app.id, ensure_ascii=False))
+            f.write(': ')
+            f.write(json.dumps(app_to_record(app), ensure_ascii=False))
+            first = False
+        f.write('\n  }\n}\n')
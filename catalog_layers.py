@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Catalog Layers
+طبقات الكتالوج (المورد / الموقع / المستخدم) مع عرض مدمج حسب الأولوية
+
+الطبقة ذات الأولوية الأعلى تغطي التطبيقات بنفس المعرف في الطبقات الأدنى.
+العرض المدمج قاعدة AppDatabase عادية تشير لنفس كائنات AppEntry في الطبقات
+بدون نسخها، ويُحدّث فقط للمعرفات التي تغيرت الطبقة الفائزة بها.
+تعذر قراءة طبقة (ملف تالف مثلاً) لا يوقف بقية الطبقات: تحتفظ بتطبيقاتها
+السابقة ويُسجل الخطأ في errors.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import threading
+
+from app_database import AppDatabase, AppEntry
+
+
+logger = logging.getLogger(__name__)
+
+# مسارات الطبقات الافتراضية
+SITE_CATALOG = '/etc/linux-store/catalog.json'
+USER_CATALOG = os.path.expanduser('~/.local/share/linux-store/catalog.json')
+
+# أولويات الطبقات الافتراضية
+VENDOR_PRIORITY = 0
+SITE_PRIORITY = 10
+USER_PRIORITY = 20
+# بيانات AppStream من التوزيعة أدنى من الكتالوج المدمج
+APPSTREAM_PRIORITY = -10
+
+
+@dataclass
+class CatalogLayer:
+    """طبقة كتالوج واحدة"""
+    name: str
+    priority: int
+    path: Optional[str] = None
+    loader: Optional[Callable[[], Iterable[AppEntry]]] = None
+    apps: Dict[str, AppEntry] = field(default_factory=dict)
+
+    def load(self) -> Dict[str, AppEntry]:
+        """قراءة تطبيقات الطبقة بدون تعديل الحالة الحالية"""
+        if self.loader is not None:
+            return {app.id: app for app in self.loader()}
+
+        apps = {}
+        if self.path and os.path.exists(self.path):
+            from catalog_io import iter_catalog
+            for batch in iter_catalog(self.path):
+                for app in batch:
+                    apps[app.id] = app
+        return apps
+
+
+def _vendor_loader() -> Callable[[], List[AppEntry]]:
+    """محمل الكتالوج المدمج في التطبيق
+
+    يُبنى مرة واحدة ويتشاركه محمل AppStream (لاستبعاد الحزم المكررة)
+    حتى لو طلباه معاً من خيطين.
+    """
+    apps: List[AppEntry] = []
+    lock = threading.Lock()
+
+    def load() -> List[AppEntry]:
+        with lock:
+            if not apps:
+                apps.extend(AppDatabase().apps.values())
+        return apps
+    return load
+
+
+def _appstream_loader(package_field: Optional[str],
+                      vendor_apps: Callable[[], List[AppEntry]]) -> Callable[[], Iterable[AppEntry]]:
+    """محمل طبقة AppStream (التوزيعة ومستودعات flatpak) بدون تطبيقات تكرر
+    حزم الكتالوج المدمج"""
+    def load():
+        from appstream import iter_appstream_apps, known_package_ids, merge_duplicates
+        return merge_duplicates(iter_appstream_apps(
+            package_field=package_field,
+            exclude=known_package_ids(vendor_apps()),
+        ))
+    return load
+
+
+class LayeredCatalog:
+    """كتالوج مكون من طبقات مرتبة حسب الأولوية"""
+
+    def __init__(self, db: Optional[AppDatabase] = None):
+        self.db = db if db is not None else AppDatabase(load_defaults=False)
+        self.layers: Dict[str, CatalogLayer] = {}
+        # اسم الطبقة الفائزة لكل تطبيق في العرض المدمج
+        self._winner: Dict[str, str] = {}
+        # آخر خطأ قراءة لكل طبقة فشل تحميلها
+        self.errors: Dict[str, str] = {}
+        # جدول أسماء الحزم: معرف -> حقل -> اسم، يملأ الحقول الفارغة في العرض
+        # المدمج فقط، مع نسخة مملوءة لكل تطبيق فائز (المصدر، النسخة)
+        self._package_map: Dict[str, Dict[str, str]] = {}
+        self._mapped: Dict[str, Tuple[AppEntry, AppEntry]] = {}
+
+    @classmethod
+    def with_default_layers(cls, site_path: str = SITE_CATALOG,
+                            user_path: str = USER_CATALOG,
+                            appstream: bool = True,
+                            package_field: Optional[str] = None) -> 'LayeredCatalog':
+        """إنشاء الطبقات الافتراضية وتحميلها
+
+        package_field حقل الحزمة لمدير النظام (apt, dnf ...) الذي تُملأ
+        فيه أسماء حزم AppStream.
+        """
+        catalog = cls()
+        vendor_apps = _vendor_loader()
+        if appstream:
+            catalog.add_layer(CatalogLayer(
+                'appstream', APPSTREAM_PRIORITY, loader=_appstream_loader(package_field, vendor_apps)
+            ))
+        catalog.add_layer(CatalogLayer('vendor', VENDOR_PRIORITY, loader=vendor_apps))
+        catalog.add_layer(CatalogLayer('site', SITE_PRIORITY, path=site_path))
+        catalog.add_layer(CatalogLayer('user', USER_PRIORITY, path=user_path))
+        catalog.load_all()
+        return catalog
+
+    def add_layer(self, layer: CatalogLayer):
+        """إضافة طبقة (تُحمّل لاحقاً عبر load_all أو reload_layer)"""
+        if layer.name in self.layers:
+            raise ValueError(f"الطبقة موجودة مسبقاً: {layer.name}")
+        self.layers[layer.name] = layer
+
+    def _ordered_layers(self) -> List[CatalogLayer]:
+        """الطبقات من الأعلى أولوية للأدنى"""
+        return sorted(self.layers.values(), key=lambda layer: -layer.priority)
+
+    @staticmethod
+    def _resolve(app_id: str, ordered: List[CatalogLayer]) -> Optional[CatalogLayer]:
+        """الطبقة الفائزة بتطبيق معين"""
+        for layer in ordered:
+            if app_id in layer.apps:
+                return layer
+        return None
+
+    def load_all(self, max_workers: Optional[int] = None):
+        """تحميل كل الطبقات بالتوازي ثم بناء العرض المدمج مرة واحدة"""
+        layers = list(self.layers.values())
+        if not layers:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(layers)) as pool:
+            loaded = list(pool.map(self._load_layer, layers))
+
+        for layer, apps in zip(layers, loaded):
+            if apps is not None:
+                layer.apps = apps
+
+        # ترتيب العرض المدمج يتبع ترتيب الطبقات الأدنى أولاً
+        affected = {}
+        for layer in sorted(layers, key=lambda layer: layer.priority):
+            affected.update(dict.fromkeys(layer.apps))
+        affected.update(dict.fromkeys(self._winner))
+        self._refresh(affected)
+
+    def _load_layer(self, layer: CatalogLayer) -> Optional[Dict[str, AppEntry]]:
+        """قراءة طبقة، أو None مع تسجيل الخطأ إن تعذرت (تبقى تطبيقاتها السابقة)"""
+        try:
+            apps = layer.load()
+        except Exception as e:
+            logger.warning("تعذر تحميل طبقة الكتالوج %s (%s): %s", layer.name, layer.path or 'loader', e)
+            self.errors[layer.name] = str(e)
+            return None
+        self.errors.pop(layer.name, None)
+        return apps
+
+    def reload_layer(self, name: str) -> Tuple[List[str], List[str]]:
+        """إعادة قراءة طبقة واحدة وتحديث المعرفات المتأثرة بها فقط
+
+        إن تعذرت القراءة يبقى العرض كما هو ويُسجل الخطأ في errors.
+        """
+        layer = self.layers[name]
+        old_ids = list(layer.apps)
+        apps = self._load_layer(layer)
+        if apps is None:
+            return [], []
+        layer.apps = apps
+        return self._refresh(dict.fromkeys(old_ids + list(layer.apps)))
+
+    def set_app(self, name: str, app: AppEntry) -> Tuple[List[str], List[str]]:
+        """إضافة أو استبدال تطبيق في طبقة"""
+        self.layers[name].apps[app.id] = app
+        return self._refresh([app.id])
+
+    def remove_app(self, name: str, app_id: str) -> Tuple[List[str], List[str]]:
+        """حذف تطبيق من طبقة (قد تظهر نسخة طبقة أدنى مكانه)"""
+        self.layers[name].apps.pop(app_id, None)
+        return self._refresh([app_id])
+
+    def save_layer(self, name: str):
+        """حفظ طبقة مرتبطة بملف"""
+        layer = self.layers[name]
+        if not layer.path:
+            raise ValueError(f"الطبقة {name} غير مرتبطة بملف")
+        from catalog_io import write_catalog
+        os.makedirs(os.path.dirname(layer.path) or '.', exist_ok=True)
+        write_catalog(layer.path, layer.apps.values(), AppDatabase.CATEGORIES)
+
+    def set_package_map(self, mapping: Dict[str, Dict[str, str]]) -> Tuple[List[str], List[str]]:
+        """تعيين جدول أسماء الحزم وتحديث التطبيقات التي يغطيها
+
+        الجدول جزء من الدمج نفسه، فيبقى بعد reload_layer ولا يُكتب في الطبقات.
+        """
+        affected = dict.fromkeys(list(self._package_map) + list(mapping))
+        self._package_map = mapping
+        for app_id in affected:
+            self._mapped.pop(app_id, None)
+        return self._refresh(affected)
+
+    def apply_package_map(self, filepath: str) -> int:
+        """قراءة جدول package_mapping وتطبيقه؛ يُعاد عدد التطبيقات التي مُلئت"""
+        if not os.path.exists(filepath):
+            return 0
+        from package_mapping import load_package_map
+        self.set_package_map(load_package_map(filepath))
+        return sum(1 for source, mapped in self._mapped.values() if mapped is not source)
+
+    def _with_package_map(self, app: AppEntry) -> AppEntry:
+        """التطبيق الفائز بعد ملء حقوله الفارغة من جدول الحزم"""
+        names = self._package_map.get(app.id)
+        if not names:
+            return app
+        cached = self._mapped.get(app.id)
+        # نفس النسخة ما دام المصدر لم يتغير، حتى يبقى العرض المدمج محدثاً
+        if cached is not None and cached[0] is app:
+            return cached[1]
+        from package_mapping import fill_from_map
+        mapped = fill_from_map(app, names)
+        self._mapped[app.id] = (app, mapped)
+        return mapped
+
+    def layer_of(self, app_id: str) -> Optional[str]:
+        """اسم الطبقة التي يأتي منها التطبيق في العرض المدمج"""
+        return self._winner.get(app_id)
+
+    def _refresh(self, app_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """إعادة حساب الفائز لمعرفات محددة وتحديث العرض المدمج"""
+        changed = []
+        removed = []
+        ordered = self._ordered_layers()
+
+        for app_id in app_ids:
+            layer = self._resolve(app_id, ordered)
+            if layer is None:
+                self._mapped.pop(app_id, None)
+                if self._winner.pop(app_id, None) is not None:
+                    self.db._remove_app(app_id)
+                    removed.append(app_id)
+                continue
+
+            app = self._with_package_map(layer.apps[app_id])
+            self._winner[app_id] = layer.name
+            # نفس الكائن يعني أن العرض المدمج محدث بالفعل
+            if self.db.apps.get(app_id) is not app:
+                self.db._add_app(app)
+                changed.append(app_id)
+
+        if removed:
+            self.db._compact_if_needed()
+        if changed or removed:
+            self.db._notify('on_change', changed, removed)
+        return changed, removed
+
+
+if __name__ == '__main__':
+    catalog = LayeredCatalog.with_default_layers()
+    for layer in catalog._ordered_layers():
+        print(f"{layer.name:8} أولوية {layer.priority:3}: {len(layer.apps)} تطبيق")
+    print(f"العرض المدمج: {len(catalog.db.apps)} تطبيق")
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Desktop Entries
+اكتشاف التطبيقات المثبتة من ملفات .desktop، بما فيها ما ثُبت خارج الكتالوج
+
+تُقرأ المجلدات:
+    /usr/share/applications و /usr/local/share/applications
+    ~/.local/share/applications
+    مجلدات التصدير لـ flatpak (النظام والمستخدم) و snap
+
+كل ملف يُحلل مرة واحدة في مجموعة خيوط ويُحفظ الناتج مع وقت تعديله في
+~/.cache/linux-store/desktop-entries.json، فلا يُعاد إلا ما تغير.
+الحزمة المالكة لكل ملف نظام تُعرف من قاعدة بيانات مدير الحزم مرة واحدة
+عند تحليله، ثم يُربط الملف بتطبيق الكتالوج عبر فهرس أسماء الحزم.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import glob
+import json
+import os
+import subprocess
+
+from app_database import AppEntry
+from appstream import map_category
+
+
+# (المجلد، مصدر الملفات) بالترتيب: ملف المستخدم يغطي ملف النظام بنفس الاسم
+DESKTOP_DIRS = [
+    ('/usr/share/applications', 'system'),
+    ('/usr/local/share/applications', 'local'),
+    ('/var/lib/flatpak/exports/share/applications', 'flatpak'),
+    (os.path.expanduser('~/.local/share/flatpak/exports/share/applications'), 'flatpak'),
+    ('/var/lib/snapd/desktop/applications', 'snap'),
+    (os.path.expanduser('~/.local/share/applications'), 'user'),
+]
+
+CACHE_FILE = os.path.expanduser('~/.cache/linux-store/desktop-entries.json')
+CACHE_VERSION = 1
+
+# قواعد بيانات الملفات المثبتة لكل مدير
+DPKG_INFO_DIR = '/var/lib/dpkg/info'
+PACMAN_LOCAL_DIR = '/var/lib/pacman/local'
+
+
+@dataclass
+class DesktopEntry:
+    """تطبيق من ملف .desktop"""
+    path: str
+    desktop_id: str
+    name: str
+    source: str = 'system'
+    name_ar: str = ''
+    comment: str = ''
+    comment_ar: str = ''
+    icon: str = ''
+    exec: str = ''
+    categories: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+    flatpak: str = ''
+    snap: str = ''
+    # الحزمة المالكة للملف حسب مدير النظام
+    package: str = ''
+
+
+def _split_list(value: str) -> List[str]:
+    """قيم مفصولة بـ ; كما في Categories و Keywords"""
+    return [item for item in value.split(';') if item]
+
+
+def parse_desktop_file(path: str, source: str = 'system',
+                       desktop_id: Optional[str] = None) -> Optional[DesktopEntry]:
+    """تحليل مجموعة [Desktop Entry] في ملف .desktop
+
+    يُعاد None للملفات المخفية أو التي ليست تطبيقات.
+    """
+    values: Dict[str, str] = {}
+    in_group = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('['):
+                    # المجموعة الرئيسية فقط، ومجموعات الإجراءات تأتي بعدها
+                    if in_group:
+                        break
+                    in_group = line == '[Desktop Entry]'
+                    continue
+                if in_group:
+                    key, sep, value = line.partition('=')
+                    if sep:
+                        values.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if values.get('Type') != 'Application' or not values.get('Name'):
+        return None
+    if values.get('NoDisplay') == 'true' or values.get('Hidden') == 'true':
+        return None
+
+    desktop_id = desktop_id or os.path.basename(path)[:-len('.desktop')]
+    snap = values.get('X-SnapInstanceName', '')
+    if not snap and source == 'snap':
+        # ملفات snap تسمى <snap>_<app>.desktop
+        snap = desktop_id.split('_', 1)[0]
+
+    return DesktopEntry(
+        path=path,
+        desktop_id=desktop_id,
+        name=values['Name'],
+        source=source,
+        name_ar=values.get('Name[ar]', ''),
+        comment=values.get('Comment', '') or values.get('GenericName', ''),
+        comment_ar=values.get('Comment[ar]', ''),
+        icon=values.get('Icon', ''),
+        exec=values.get('Exec', ''),
+        categories=_split_list(values.get('Categories', '')),
+        keywords=_split_list(values.get('Keywords', '')),
+        flatpak=values.get('X-Flatpak', ''),
+        snap=snap,
+    )
+
+
+def _owners_dpkg(paths: Set[str]) -> Dict[str, str]:
+    """الحزم المالكة من قوائم ملفات dpkg"""
+    owners = {}
+    for list_path in glob.glob(os.path.join(DPKG_INFO_DIR, '*.list')):
+        package = os.path.basename(list_path)[:-len('.list')].split(':')[0]
+        try:
+            with open(list_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if line in paths:
+                        owners[line] = package
+        except OSError:
+            continue
+        if len(owners) == len(paths):
+            break
+    return owners
+
+
+def _owners_pacman(paths: Set[str]) -> Dict[str, str]:
+    """الحزم المالكة من قاعدة pacman المحلية (المسارات بدون / في البداية)"""
+    wanted = {path.lstrip('/'): path for path in paths}
+    owners = {}
+    for package_dir in glob.glob(os.path.join(PACMAN_LOCAL_DIR, '*')):
+        try:
+            with open(os.path.join(package_dir, 'files'), 'r', encoding='utf-8', errors='replace') as f:
+                matched = [wanted[line.rstrip('\n')] for line in f if line.rstrip('\n') in wanted]
+        except OSError:
+            continue
+        if not matched:
+            continue
+        # اسم المجلد name-version-release، والاسم الدقيق في desc
+        name = os.path.basename(package_dir).rsplit('-', 2)[0]
+        try:
+            with open(os.path.join(package_dir, 'desc'), 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+            name = lines[lines.index('%NAME%') + 1]
+        except (OSError, ValueError, IndexError):
+            pass
+        for path in matched:
+            owners[path] = name
+    return owners
+
+
+def _owners_rpm(paths: Set[str]) -> Dict[str, str]:
+    """الحزم المالكة عبر أمر rpm واحد لكل الملفات"""
+    ordered = sorted(paths)
+    try:
+        result = subprocess.run(
+            ['rpm', '-qf', '--qf', '%{NAME}\\n'] + ordered,
+            capture_output=True, text=True, timeout=30
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return {}
+    owners = {}
+    # سطر لكل ملف بالترتيب، والملف غير المملوك يُطبع عنه سطر خطأ في stderr
+    lines = result.stdout.splitlines()
+    if len(lines) == len(ordered):
+        for path, name in zip(ordered, lines):
+            if name and ' ' not in name:
+                owners[path] = name
+    return owners
+
+
+OWNER_LOOKUPS = {
+    'apt': _owners_dpkg,
+    'pacman': _owners_pacman,
+    'dnf': _owners_rpm,
+    'zypper': _owners_rpm,
+}
+
+
+def package_owners(paths: Iterable[str], package_field: Optional[str]) -> Dict[str, str]:
+    """الحزمة المالكة لكل ملف حسب مدير حزم النظام"""
+    paths = set(paths)
+    lookup = OWNER_LOOKUPS.get(package_field)
+    if not paths or lookup is None:
+        return {}
+    return lookup(paths)
+
+
+def _list_desktop_files(dirs: List[Tuple[str, str]]) -> Dict[str, Tuple[str, List[int], str]]:
+    """ملفات .desktop مع مصدرها ووقت تعديلها وحجمها ومعرفها"""
+    files = {}
+    for directory, source in dirs:
+        # ملفات المجلدات الفرعية معرفها المسار النسبي مع - بدل / (kde4/foo -> kde4-foo)
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if not name.endswith('.desktop'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                desktop_id = os.path.relpath(path, directory)[:-len('.desktop')].replace(os.sep, '-')
+                files[path] = (source, [stat.st_mtime_ns, stat.st_size], desktop_id)
+    return files
+
+
+class DesktopScanner:
+    """قراءة ملفات .desktop مع تخزين النتائج حسب وقت تعديل كل ملف"""
+
+    def __init__(self, package_field: Optional[str] = None,
+                 dirs: Optional[List[Tuple[str, str]]] = None,
+                 cache_file: str = CACHE_FILE):
+        self.package_field = package_field
+        self.dirs = dirs if dirs is not None else DESKTOP_DIRS
+        self.cache_file = cache_file
+        # المسار -> {'stamp': [...], 'entry': {...} أو None}
+        self._files: Dict[str, Dict] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != CACHE_VERSION or data.get('package_field') != self.package_field:
+            return {}
+        return data.get('files', {})
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        temp_path = self.cache_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'package_field': self.package_field,
+                'files': self._files,
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.cache_file)
+
+    def cached_entries(self) -> List[DesktopEntry]:
+        """نتائج آخر فحص من التخزين بدون قراءة أي ملف .desktop"""
+        return self._entries()
+
+    def _entries(self) -> List[DesktopEntry]:
+        entries = {}
+        # الترتيب حسب DESKTOP_DIRS: ملف المستخدم يغطي ملف النظام بنفس المعرف
+        order = {source: index for index, (_, source) in enumerate(self.dirs)}
+        records = sorted(
+            (record['entry'] for record in self._files.values() if record.get('entry')),
+            key=lambda entry: order.get(entry['source'], 0)
+        )
+        for record in records:
+            entries[record['desktop_id']] = DesktopEntry(**record)
+        return list(entries.values())
+
+    def scan(self, max_workers: Optional[int] = None) -> List[DesktopEntry]:
+        """فحص المجلدات وتحليل الملفات الجديدة أو المعدلة فقط"""
+        files = _list_desktop_files(self.dirs)
+        stale = [
+            path for path, (_, stamp, _) in files.items()
+            if self._files.get(path, {}).get('stamp') != stamp
+        ]
+        removed = [path for path in self._files if path not in files]
+
+        if not stale and not removed:
+            return self._entries()
+
+        for path in removed:
+            del self._files[path]
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                parsed = list(pool.map(
+                    lambda path: parse_desktop_file(path, files[path][0], files[path][2]), stale
+                ))
+
+            system_paths = [
+                entry.path for entry in parsed
+                if entry is not None and entry.source in ('system', 'local')
+            ]
+            owners = package_owners(system_paths, self.package_field)
+
+            for path, entry in zip(stale, parsed):
+                if entry is not None:
+                    entry.package = owners.get(path, '')
+                self._files[path] = {
+                    'stamp': files[path][1],
+                    'entry': asdict(entry) if entry is not None else None,
+                }
+
+        try:
+            self._save_cache()
+        except OSError as e:
+            print(f"تعذر حفظ ذاكرة ملفات .desktop: {e}")
+        return self._entries()
+
+
+def _entry_to_app(entry: DesktopEntry, package_field: Optional[str]) -> AppEntry:
+    """تطبيق للكتالوج من ملف .desktop لا يقابله تطبيق معروف"""
+    fields = {}
+    if entry.flatpak:
+        fields['flatpak'] = entry.flatpak
+    if entry.snap:
+        fields['snap'] = entry.snap
+    if entry.package and package_field:
+        fields[package_field] = entry.package
+    return AppEntry(
+        id=entry.desktop_id,
+        name=entry.name,
+        description=entry.comment,
+        description_ar=entry.comment_ar,
+        category=map_category(entry.categories),
+        icon=entry.icon or 'application-x-executable',
+        keywords=entry.keywords,
+        **fields,
+    )
+
+
+def installed_apps(entries: Iterable[DesktopEntry], app_db,
+                   package_field: Optional[str] = None,
+                   installed: Optional[Dict[str, Set[str]]] = None) -> List[AppEntry]:
+    """ربط ملفات .desktop بتطبيقات الكتالوج، وإنشاء تطبيق لما ليس فيه
+
+    الربط بالترتيب: معرف flatpak، اسم snap، الحزمة المالكة، ثم معرف
+    الملف إن كان معرف تطبيق في الكتالوج أو اسم حزمة مثبتة.
+    """
+    installed = installed or {}
+    host_installed = installed.get(package_field, set()) if package_field else set()
+    apps: Dict[str, AppEntry] = {}
+
+    for entry in entries:
+        package = entry.package
+        if not package and entry.desktop_id in host_installed:
+            package = entry.desktop_id
+
+        candidates = []
+        if entry.flatpak:
+            candidates += app_db.find_by_package('flatpak', entry.flatpak)
+        if entry.snap:
+            candidates += app_db.find_by_package('snap', entry.snap)
+        if package and package_field:
+            candidates += app_db.find_by_package(package_field, package)
+        app = app_db.get_app(entry.desktop_id)
+        if app is not None:
+            candidates.append(app)
+
+        if candidates:
+            app = candidates[0]
+        else:
+            if package != entry.package:
+                entry = DesktopEntry(**{**asdict(entry), 'package': package})
+            app = _entry_to_app(entry, package_field)
+        apps.setdefault(app.id, app)
+
+    return sorted(apps.values(), key=lambda app: app.name.lower())
+
+
+if __name__ == '__main__':
+    import time
+
+    from app_database import AppDatabase
+    from distro_detector import DistroDetector
+    from package_manager import MANAGER_FIELDS
+
+    detector = DistroDetector()
+    scanner = DesktopScanner(MANAGER_FIELDS.get(detector.package_manager))
+    for label in ('الفحص الأول', 'الفحص الثاني'):
+        start = time.perf_counter()
+        entries = scanner.scan()
+        print(f"{label}: {len(entries)} ملف في {time.perf_counter() - start:.3f} s")
+    apps = installed_apps(entries, AppDatabase(), scanner.package_field)
+    print(f"{len(apps)} تطبيق مثبت")
+    for app in apps[:20]:
+        print(f"  {app.name} ({app.id})")
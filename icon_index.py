@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Icon Index
+فهرس أيقونات السمات بدلاً من فحص وجود الملفات لكل بطاقة
+
+يُقرأ index.theme لكل سمة (مع سلسلة Inherits حتى hicolor) ويُسرد كل مجلد
+أيقونات مرة واحدة. يُحفظ الفهرس في ~/.cache/linux-store/icon-index.json،
+وعند البدء يُعاد سرد المجلدات التي تغير وقت تعديلها فقط.
+
+اختيار الحجم يتبع خوارزمية مواصفة freedesktop للأيقونات: المجلد المطابق
+للحجم المطلوب (مضروباً في نسبة بكسلات الشاشة) ثم الأقرب إليه.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import configparser
+import json
+import os
+import re
+import threading
+
+
+# المجلدات الأساسية للسمات بترتيب الأولوية
+ICON_BASE_DIRS = [
+    os.path.expanduser('~/.local/share/icons'),
+    os.path.expanduser('~/.icons'),
+    os.path.expanduser('~/.local/share/flatpak/exports/share/icons'),
+    '/var/lib/flatpak/exports/share/icons',
+    '/usr/local/share/icons',
+    '/usr/share/icons',
+]
+
+# مجلدات أيقونات بلا سمة تُبحث أخيراً
+PIXMAP_DIRS = [
+    '/usr/share/pixmaps',
+    os.path.join(os.path.dirname(__file__), '..', 'icons'),
+]
+
+FALLBACK_THEME = 'hicolor'
+ICON_EXTENSIONS = ('.png', '.svg', '.xpm')
+
+CACHE_FILE = os.path.expanduser('~/.cache/linux-store/icon-index.json')
+CACHE_VERSION = 1
+
+# مجلد سمة بلا index.theme: 48x48 أو 48x48@2 أو scalable
+_SIZE_DIR = re.compile(r'^(\d+)x\d+(?:@(\d+))?$')
+
+
+@dataclass
+class IconDir:
+    """مجلد أيقونات واحد في سمة مع أحجامه وأسماء ملفاته"""
+    path: str
+    theme: str
+    size: int
+    scale: int = 1
+    type: str = 'Threshold'
+    min_size: int = 0
+    max_size: int = 0
+    threshold: int = 2
+    mtime: int = 0
+    # اسم الأيقونة -> الامتداد
+    files: Dict[str, str] = field(default_factory=dict)
+
+    def matches(self, size: int, scale: int) -> bool:
+        """هل يطابق المجلد الحجم المطلوب تماماً"""
+        if self.scale != scale:
+            return False
+        if self.type == 'Fixed':
+            return self.size == size
+        if self.type == 'Scalable':
+            return self.min_size <= size <= self.max_size
+        return self.size - self.threshold <= size <= self.size + self.threshold
+
+    def distance(self, size: int, scale: int) -> int:
+        """بعد المجلد عن الحجم المطلوب بالبكسلات الفعلية"""
+        target = size * scale
+        if self.type == 'Fixed':
+            return abs(self.size * self.scale - target)
+        if self.type == 'Scalable':
+            low, high = self.min_size, self.max_size
+        else:
+            low, high = self.size - self.threshold, self.size + self.threshold
+        if target < low * self.scale:
+            return low * self.scale - target
+        if target > high * self.scale:
+            return target - high * self.scale
+        return 0
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _list_icons(path: str) -> Dict[str, str]:
+    """أسماء الأيقونات في مجلد مع امتداداتها (png ثم svg ثم xpm)"""
+    files: Dict[str, str] = {}
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return files
+    rank = {ext: i for i, ext in enumerate(ICON_EXTENSIONS)}
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext not in rank:
+            continue
+        current = files.get(stem)
+        if current is None or rank[ext] < rank[current]:
+            files[stem] = ext
+    return files
+
+
+def _int(section, key: str, default: int) -> int:
+    try:
+        return int(section.get(key, default))
+    except ValueError:
+        return default
+
+
+def theme_roots(theme: str, base_dirs: Iterable[str] = ICON_BASE_DIRS) -> List[str]:
+    """مجلدات السمة في كل المجلدات الأساسية"""
+    return [os.path.join(base, theme) for base in base_dirs if os.path.isdir(os.path.join(base, theme))]
+
+
+def _read_index_theme(roots: List[str]) -> Optional[configparser.ConfigParser]:
+    """أول index.theme للسمة"""
+    for root in roots:
+        path = os.path.join(root, 'index.theme')
+        if os.path.isfile(path):
+            parser = configparser.ConfigParser(interpolation=None, strict=False)
+            parser.optionxform = str
+            try:
+                parser.read(path, encoding='utf-8')
+            except (configparser.Error, UnicodeDecodeError):
+                return None
+            if parser.has_section('Icon Theme'):
+                return parser
+    return None
+
+
+def theme_dirs(theme: str, base_dirs: Iterable[str] = ICON_BASE_DIRS) -> Tuple[List[IconDir], List[str]]:
+    """مجلدات أيقونات التطبيقات في سمة، والسمات التي ترث منها"""
+    roots = theme_roots(theme, base_dirs)
+    parser = _read_index_theme(roots)
+    dirs: List[IconDir] = []
+
+    if parser is not None:
+        info = parser['Icon Theme']
+        inherits = [name.strip() for name in info.get('Inherits', '').split(',') if name.strip()]
+        subdirs = []
+        for key in ('Directories', 'ScaledDirectories'):
+            subdirs.extend(name.strip() for name in info.get(key, '').split(',') if name.strip())
+        for subdir in dict.fromkeys(subdirs):
+            if not parser.has_section(subdir):
+                continue
+            section = parser[subdir]
+            # المتجر يحتاج أيقونات التطبيقات فقط
+            if section.get('Context', 'Applications') != 'Applications':
+                continue
+            size = _int(section, 'Size', 0)
+            for root in roots:
+                path = os.path.join(root, subdir)
+                if os.path.isdir(path):
+                    dirs.append(IconDir(
+                        path=path, theme=theme, size=size,
+                        scale=_int(section, 'Scale', 1),
+                        type=section.get('Type', 'Threshold'),
+                        min_size=_int(section, 'MinSize', size),
+                        max_size=_int(section, 'MaxSize', size),
+                        threshold=_int(section, 'Threshold', 2),
+                    ))
+        return dirs, inherits
+
+    # سمة بدون index.theme (مثل hicolor قبل تثبيت حزمته): الاستدلال من أسماء المجلدات
+    for root in roots:
+        try:
+            size_names = sorted(os.listdir(root))
+        except OSError:
+            continue
+        for size_name in size_names:
+            match = _SIZE_DIR.match(size_name)
+            path = os.path.join(root, size_name, 'apps')
+            if not os.path.isdir(path):
+                continue
+            if match:
+                size = int(match.group(1))
+                dirs.append(IconDir(path=path, theme=theme, size=size,
+                                    scale=int(match.group(2) or 1), min_size=size, max_size=size))
+            elif size_name == 'scalable':
+                dirs.append(IconDir(path=path, theme=theme, size=64, type='Scalable',
+                                    min_size=1, max_size=512))
+    return dirs, []
+
+
+def current_theme() -> Optional[str]:
+    """اسم سمة الأيقونات المختارة في إعدادات GTK إن وُجدت"""
+    for path in ('~/.config/gtk-4.0/settings.ini', '~/.config/gtk-3.0/settings.ini'):
+        parser = configparser.ConfigParser(interpolation=None, strict=False)
+        try:
+            parser.read(os.path.expanduser(path), encoding='utf-8')
+        except (configparser.Error, UnicodeDecodeError):
+            continue
+        if parser.has_option('Settings', 'gtk-icon-theme-name'):
+            return parser.get('Settings', 'gtk-icon-theme-name').strip() or None
+    return None
+
+
+class IconIndex:
+    """فهرس أسماء الأيقونات إلى الملفات لسلسلة سمات"""
+
+    def __init__(self, theme: Optional[str] = None,
+                 base_dirs: Optional[List[str]] = None,
+                 pixmap_dirs: Optional[List[str]] = None,
+                 cache_file: Optional[str] = CACHE_FILE):
+        self.theme = theme or current_theme() or FALLBACK_THEME
+        self.base_dirs = base_dirs if base_dirs is not None else ICON_BASE_DIRS
+        self.pixmap_dirs = pixmap_dirs if pixmap_dirs is not None else PIXMAP_DIRS
+        self.cache_file = cache_file
+        self.themes: List[str] = []
+        self.dirs: List[IconDir] = []
+        # الاسم -> فهارس المجلدات التي تحتويه بترتيب السمات
+        self._names: Dict[str, List[int]] = {}
+        self._lookups: Dict[Tuple[str, int, int], Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- البناء والتخزين ---
+
+    def _theme_chain(self) -> Tuple[List[str], List[IconDir]]:
+        """السمة ثم ما ترثه بالترتيب وأخيراً hicolor، مع مجلداتها"""
+        chain: List[str] = []
+        pending = [self.theme]
+        dirs: List[IconDir] = []
+        while pending:
+            theme = pending.pop(0)
+            if theme in chain:
+                continue
+            chain.append(theme)
+            theme_dir_list, inherits = theme_dirs(theme, self.base_dirs)
+            dirs.extend(theme_dir_list)
+            pending.extend(inherits)
+            if not pending and FALLBACK_THEME not in chain:
+                pending.append(FALLBACK_THEME)
+        return chain, dirs
+
+    def _stamps(self) -> Dict[str, int]:
+        """أوقات تعديل ملفات index.theme ومجلدات السمات الجذرية"""
+        stamps = {}
+        for theme in self.themes:
+            for base in self.base_dirs:
+                root = os.path.join(base, theme)
+                stamps[root] = _mtime(root)
+                stamps[os.path.join(root, 'index.theme')] = _mtime(os.path.join(root, 'index.theme'))
+        return stamps
+
+    def _load(self):
+        cached = self._read_cache()
+        if cached is not None:
+            self.themes = cached['themes']
+            if cached.get('stamps') == self._stamps():
+                self.dirs = [IconDir(**item) for item in cached['dirs']]
+                changed = self._refresh_changed_dirs()
+                self._pixmaps = cached.get('pixmaps', {})
+                if cached.get('pixmap_stamps') != self._pixmap_stamps():
+                    self._pixmaps = self._scan_pixmaps()
+                    changed = True
+                self._build_names()
+                if changed:
+                    self._save()
+                return
+        self.rebuild()
+
+    def rebuild(self):
+        """إعادة قراءة السمات وسرد كل مجلداتها"""
+        self.themes, self.dirs = self._theme_chain()
+        for icon_dir in self.dirs:
+            icon_dir.mtime = _mtime(icon_dir.path)
+            icon_dir.files = _list_icons(icon_dir.path)
+        self._pixmaps = self._scan_pixmaps()
+        self._build_names()
+        self._save()
+
+    def _refresh_changed_dirs(self) -> bool:
+        """إعادة سرد المجلدات التي تغير وقت تعديلها فقط"""
+        changed = False
+        for icon_dir in self.dirs:
+            mtime = _mtime(icon_dir.path)
+            if mtime != icon_dir.mtime:
+                icon_dir.mtime = mtime
+                icon_dir.files = _list_icons(icon_dir.path)
+                changed = True
+        return changed
+
+    def _pixmap_stamps(self) -> Dict[str, int]:
+        return {path: _mtime(path) for path in self.pixmap_dirs}
+
+    def _scan_pixmaps(self) -> Dict[str, str]:
+        """الاسم -> المسار في مجلدات الأيقونات بلا سمة"""
+        pixmaps: Dict[str, str] = {}
+        for path in self.pixmap_dirs:
+            for name, ext in _list_icons(path).items():
+                pixmaps.setdefault(name, os.path.join(path, name + ext))
+        return pixmaps
+
+    def _build_names(self):
+        names: Dict[str, List[int]] = {}
+        for i, icon_dir in enumerate(self.dirs):
+            for name in icon_dir.files:
+                names.setdefault(name, []).append(i)
+        with self._lock:
+            self._names = names
+            self._lookups = {}
+
+    def _read_cache(self) -> Optional[Dict]:
+        if not self.cache_file:
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (data.get('version') != CACHE_VERSION or data.get('theme') != self.theme
+                or data.get('base_dirs') != self.base_dirs
+                or data.get('pixmap_dirs') != self.pixmap_dirs):
+            return None
+        return data
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_path = self.cache_file + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': CACHE_VERSION,
+                    'theme': self.theme,
+                    'base_dirs': self.base_dirs,
+                    'pixmap_dirs': self.pixmap_dirs,
+                    'themes': self.themes,
+                    'stamps': self._stamps(),
+                    'dirs': [asdict(icon_dir) for icon_dir in self.dirs],
+                    'pixmaps': self._pixmaps,
+                    'pixmap_stamps': self._pixmap_stamps(),
+                }, f)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            print(f"تعذر حفظ فهرس الأيقونات: {e}")
+
+    # --- البحث ---
+
+    def lookup(self, name: str, size: int = 64, scale: float = 1.0) -> Optional[str]:
+        """مسار أفضل ملف للأيقونة بالحجم المطلوب ونسبة البكسلات"""
+        if not name:
+            return None
+        if os.path.isabs(name):
+            return name if os.path.isfile(name) else None
+
+        int_scale = max(1, round(scale))
+        key = (name, size, int_scale)
+        with self._lock:
+            if key in self._lookups:
+                return self._lookups[key]
+            candidates = self._names.get(name, ())
+
+        path = self._best(name, candidates, size, int_scale)
+        if path is None:
+            path = self._pixmaps.get(name)
+        with self._lock:
+            self._lookups[key] = path
+        return path
+
+    def _best(self, name: str, candidates: List[int], size: int, scale: int) -> Optional[str]:
+        """أفضل مجلد في أول سمة تحتوي الأيقونة"""
+        if not candidates:
+            return None
+        theme = self.dirs[candidates[0]].theme
+        best = None
+        best_distance = None
+        for i in candidates:
+            icon_dir = self.dirs[i]
+            if icon_dir.theme != theme:
+                break
+            # أول مجلد مطابق تماماً بترتيب السمة، وإلا الأقرب حجماً
+            if icon_dir.matches(size, scale):
+                best = icon_dir
+                break
+            distance = icon_dir.distance(size, scale)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = icon_dir, distance
+        return os.path.join(best.path, name + best.files[name])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names or name in self._pixmaps
+
+
+_default_index: Optional[IconIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> IconIndex:
+    """الفهرس المشترك لسمة المستخدم (يُبنى أو يُقرأ من التخزين عند أول طلب)"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = IconIndex()
+        return _default_index
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    start = time.perf_counter()
+    index = IconIndex()
+    print(f"السمات: {' > '.join(index.themes)}، {len(index.dirs)} مجلد، "
+          f"{len(index._names)} أيقونة في {time.perf_counter() - start:.3f} s")
+    for icon in sys.argv[1:] or ['firefox', 'gvim', 'python3']:
+        for scale in (1, 2):
+            print(f"  {icon} @{scale}x: {index.lookup(icon, 64, scale)}")
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Icon Loader
+تحميل الأيقونات وتحجيمها في مجموعة خيوط بدلاً من خيط الواجهة
+
+    1. ذاكرة pixmaps محدودة الحجم بمفتاح (الأيقونة، الحجم، نسبة البكسلات)
+    2. صور مصغرة على القرص في ~/.cache/linux-store/thumbnails بالحجم النهائي
+    3. فك الملف الأصلي (png/svg/xpm) وتحجيمه إلى QImage في خيط عامل
+
+حتى يجهز التحميل يرسم المفوض عنصراً مؤقتاً، ثم يُرسل icon_ready ليُعاد
+رسم البطاقات الظاهرة. التطبيقات بلا أيقونة تُعرض بصورة الحرف الأول، وتُرسم
+مرة واحدة لكل (حرف، لون، حجم، نسبة بكسلات).
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+import hashlib
+import os
+
+# محاولة استخدام PyQt6 أو PyQt5
+try:
+    from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QRectF, pyqtSignal
+    from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QFont
+    PYQT_VERSION = 6
+except ImportError:
+    from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QRectF, pyqtSignal
+    from PyQt5.QtGui import QImage, QPixmap, QPainter, QColor, QFont
+    PYQT_VERSION = 5
+
+from icon_index import default_index
+
+
+THUMBNAIL_DIR = os.path.expanduser('~/.cache/linux-store/thumbnails')
+
+# الحد الأقصى لذاكرة pixmaps بالبايت
+PIXMAP_CACHE_BYTES = 32 * 1024 * 1024
+
+# لون خلفية صورة الحرف الأول
+AVATAR_COLOR = '#4285f4'
+
+if PYQT_VERSION == 6:
+    _KEEP_ASPECT = Qt.AspectRatioMode.KeepAspectRatio
+    _SMOOTH = Qt.TransformationMode.SmoothTransformation
+    _ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+    _TRANSPARENT = Qt.GlobalColor.transparent
+    _NO_PEN = Qt.PenStyle.NoPen
+    _ANTIALIAS = QPainter.RenderHint.Antialiasing | QPainter.RenderHint.TextAntialiasing
+else:
+    _KEEP_ASPECT = Qt.KeepAspectRatio
+    _SMOOTH = Qt.SmoothTransformation
+    _ALIGN_CENTER = Qt.AlignCenter
+    _TRANSPARENT = Qt.transparent
+    _NO_PEN = Qt.NoPen
+    _ANTIALIAS = QPainter.Antialiasing | QPainter.TextAntialiasing
+
+IconKey = Tuple[str, int, float]
+
+
+def thumbnail_path(source: str, pixels: int, thumbnail_dir: str = THUMBNAIL_DIR) -> Optional[str]:
+    """مسار الصورة المصغرة لملف أيقونة (يتغير مع تعديل الملف الأصلي)"""
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    digest = hashlib.sha1(f"{source}\0{stat.st_mtime_ns}\0{stat.st_size}".encode('utf-8')).hexdigest()
+    return os.path.join(thumbnail_dir, f"{digest}-{pixels}.png")
+
+
+def load_scaled_image(source: str, pixels: int, thumbnail_dir: Optional[str] = THUMBNAIL_DIR) -> Optional[QImage]:
+    """قراءة الأيقونة محجمة من الصورة المصغرة أو من الملف الأصلي (آمن خارج خيط الواجهة)"""
+    thumb = thumbnail_path(source, pixels, thumbnail_dir) if thumbnail_dir else None
+    if thumb and os.path.exists(thumb):
+        image = QImage(thumb)
+        if not image.isNull():
+            return image
+
+    image = QImage(source)
+    if image.isNull():
+        return None
+    if image.width() != pixels and image.height() != pixels:
+        image = image.scaled(pixels, pixels, _KEEP_ASPECT, _SMOOTH)
+
+    if thumb:
+        try:
+            os.makedirs(thumbnail_dir, exist_ok=True)
+            temp_path = f"{thumb}.{os.getpid()}.tmp.png"
+            if image.save(temp_path, 'PNG'):
+                os.replace(temp_path, thumb)
+        except OSError:
+            pass
+    return image
+
+
+class _LoaderSignals(QObject):
+    """إشارات المهام العاملة (QRunnable ليس QObject)"""
+    loaded = pyqtSignal(object, object)
+
+
+class _LoadTask(QRunnable):
+    """مهمة تحميل أيقونة واحدة"""
+
+    def __init__(self, key: IconKey, signals: _LoaderSignals, thumbnail_dir: Optional[str]):
+        super().__init__()
+        self.key = key
+        self.signals = signals
+        self.thumbnail_dir = thumbnail_dir
+
+    def run(self):
+        icon, size, scale = self.key
+        image = None
+        path = default_index().lookup(icon, size, scale)
+        if path:
+            image = load_scaled_image(path, round(size * scale), self.thumbnail_dir)
+        self.signals.loaded.emit(self.key, image)
+
+
+class IconLoader(QObject):
+    """تحميل غير متزامن للأيقونات مع ذاكرة pixmaps مشتركة"""
+
+    # تُرسل بعد تجهيز أيقونة (أو معرفة عدم وجودها)
+    icon_ready = pyqtSignal(str)
+
+    def __init__(self, max_bytes: int = PIXMAP_CACHE_BYTES,
+                 thumbnail_dir: Optional[str] = THUMBNAIL_DIR,
+                 max_threads: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.thumbnail_dir = thumbnail_dir
+        self._cache: 'OrderedDict[IconKey, QPixmap]' = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Set[IconKey] = set()
+        # أيقونات لا ملف لها، تُرسم بالحرف الأول
+        self._missing: Set[IconKey] = set()
+
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._signals = _LoaderSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+
+    def pixmap(self, icon: str, size: int, scale: float = 1.0) -> Tuple[Optional[QPixmap], bool]:
+        """(الأيقونة إن كانت جاهزة، هل هي غير موجودة)
+
+        إذا لم تكن جاهزة يُطلب تحميلها ويُعاد (None, False).
+        """
+        if not icon:
+            return None, True
+        key = (icon, size, scale)
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+            return pixmap, False
+        if key in self._missing:
+            return None, True
+        if key not in self._pending:
+            self._pending.add(key)
+            self.pool.start(_LoadTask(key, self._signals, self.thumbnail_dir))
+        return None, False
+
+    def _on_loaded(self, key: IconKey, image: Optional[QImage]):
+        """تحويل الصورة إلى pixmap في خيط الواجهة وإضافتها للذاكرة"""
+        self._pending.discard(key)
+        if image is None:
+            self._missing.add(key)
+        else:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(key[2])
+            self._insert(key, pixmap)
+        self.icon_ready.emit(key[0])
+
+    def _insert(self, key: IconKey, pixmap: QPixmap):
+        cost = pixmap.width() * pixmap.height() * 4
+        self._cache[key] = pixmap
+        self._cache_bytes += cost
+        # إخراج الأقدم استخداماً حتى يعود الحجم تحت الحد
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.width() * old.height() * 4
+
+    def clear(self):
+        """تفريغ الذاكرة (مثلاً بعد تغيير سمة الأيقونات)"""
+        self._cache.clear()
+        self._cache_bytes = 0
+        self._missing.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'pixmaps': len(self._cache),
+            'bytes': self._cache_bytes,
+            'pending': len(self._pending),
+            'missing': len(self._missing),
+        }
+
+
+_avatars: Dict[Tuple[str, str, int, float], QPixmap] = {}
+
+
+def letter_avatar(text: str, size: int, scale: float = 1.0, color: str = AVATAR_COLOR) -> QPixmap:
+    """صورة الحرف الأول لتطبيق بلا أيقونة (تُرسم مرة واحدة لكل مفتاح)"""
+    letter = text[:1].upper()
+    key = (letter, color, size, scale)
+    pixmap = _avatars.get(key)
+    if pixmap is not None:
+        return pixmap
+
+    side = round(size * scale)
+    pixmap = QPixmap(side, side)
+    pixmap.fill(QColor(_TRANSPARENT))
+    painter = QPainter(pixmap)
+    painter.setRenderHints(_ANTIALIAS)
+    painter.setPen(_NO_PEN)
+    painter.setBrush(QColor(color))
+    radius = side * 3 / 16
+    painter.drawRoundedRect(QRectF(0, 0, side, side), radius, radius)
+    font = QFont()
+    font.setPixelSize(max(1, side * 7 // 16))
+    font.setBold(True)
+    painter.setFont(font)
+    painter.setPen(QColor('white'))
+    painter.drawText(QRectF(0, 0, side, side), _ALIGN_CENTER, letter)
+    painter.end()
+    pixmap.setDevicePixelRatio(scale)
+
+    _avatars[key] = pixmap
+    return pixmap
+
+
+_default_loader: Optional[IconLoader] = None
+
+
+def default_loader() -> IconLoader:
+    """المحمل المشترك بين كل الشبكات (يُنشأ بعد QApplication)"""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = IconLoader()
+    return _default_loader
@@ -6,7 +6,9 @@ Linux Store - Main Window
 
 import sys
 import os
-from typing import Optional, List
+import time
+import logging
+from typing import Dict, Optional, List
 
 # محاولة استخدام PyQt6 أو PyQt5
 try:
@@ -14,10 +16,10 @@ try:
         QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
         QLabel, QPushButton, QLineEdit, QScrollArea, QFrame,
         QGridLayout, QStackedWidget, QProgressBar, QMessageBox,
-        QSizePolicy, QSpacerItem, QComboBox, QToolButton
+        QSizePolicy, QSpacerItem, QComboBox, QToolButton, QCompleter
     )
-    from PyQt6.QtCore import Qt, QSize, QThread, pyqtSignal, QTimer
-    from PyQt6.QtGui import QIcon, QPixmap, QFont, QPalette, QColor, QCursor
+    from PyQt6.QtCore import Qt, QSize, QThread, pyqtSignal, QTimer, QStringListModel
+    from PyQt6.QtGui import QIcon, QPixmap, QFont, QPalette, QColor, QCursor, QKeySequence, QShortcut
     PYQT_VERSION = 6
 except ImportError:
     try:
@@ -25,10 +27,10 @@ except ImportError:
             QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
             QLabel, QPushButton, QLineEdit, QScrollArea, QFrame,
             QGridLayout, QStackedWidget, QProgressBar, QMessageBox,
-            QSizePolicy, QSpacerItem, QComboBox, QToolButton
+            QSizePolicy, QSpacerItem, QComboBox, QToolButton, QCompleter, QShortcut
         )
-        from PyQt5.QtCore import Qt, QSize, QThread, pyqtSignal, QTimer
-        from PyQt5.QtGui import QIcon, QPixmap, QFont, QPalette, QColor, QCursor
+        from PyQt5.QtCore import Qt, QSize, QThread, pyqtSignal, QTimer, QStringListModel
+        from PyQt5.QtGui import QIcon, QPixmap, QFont, QPalette, QColor, QCursor, QKeySequence
         PYQT_VERSION = 5
     except ImportError:
         print("خطأ: يرجى تثبيت PyQt6 أو PyQt5")
@@ -36,151 +38,185 @@ except ImportError:
         sys.exit(1)
 
 from distro_detector import DistroDetector
-from package_manager import PackageManager, AsyncPackageManager, PackageInfo
-from app_database import AppDatabase, AppEntry
+from package_manager import PackageManager, AsyncPackageManager, PackageInfo, MANAGER_FIELDS
+from app_database import AppDatabase, AppEntry, open_app_database
+from search_trie import AppTrie
+from search_query import SearchQuery, parse_query
+from catalog_layers import LayeredCatalog
+from appstream import load_flatpak_refs
+from resolution_table import ResolutionTable
+from package_mapping import PACKAGE_MAP_FILE
+from desktop_entries import DesktopScanner, installed_apps
+from app_grid import AppGridView, AppListModel, SelectionBar
+from icon_loader import default_loader, letter_avatar
+from navigation import Location, PageState, NavigationHistory, PageCache, HOME
+from operations import Operation, OperationScheduler, OperationState
+from operations_panel import OperationsPanel, SchedulerBridge
 
 
-class InstallThread(QThread):
-    """خيط التثبيت"""
-    progress = pyqtSignal(str)
-    finished_signal = pyqtSignal(bool, str)
-    
-    def __init__(self, pkg_manager, app_entry, action='install'):
+logger = logging.getLogger(__name__)
+
+
+class SearchThread(QThread):
+    """خيط البحث في الخلفية"""
+    # الجيل، نص الاستعلام، النتائج، أوجه النتائج
+    results_ready = pyqtSignal(int, str, list, dict)
+
+    # عدد التطبيقات التي تُفحص قبل التحقق من طلب الإلغاء
+    CHUNK_SIZE = 512
+
+    def __init__(self, app_db, query: str, generation: int, candidates=None,
+                 search_query: Optional[SearchQuery] = None, pkg_manager=None):
         super().__init__()
+        self.app_db = app_db
+        self.query = query
+        self.generation = generation
+        self.candidates = candidates
+        self.search_query = search_query
         self.pkg_manager = pkg_manager
-        self.app_entry = app_entry
-        self.action = action
-    
+
     def run(self):
-        try:
-            # إنشاء PackageInfo من AppEntry
-            pkg_info = PackageInfo(
-                name=self.app_entry.id,
-                display_name=self.app_entry.name,
-                description=self.app_entry.description,
-                category=self.app_entry.category,
-                icon=self.app_entry.icon,
-                package_names={
-                    'pacman': self.app_entry.pacman,
-                    'apt': self.app_entry.apt,
-                    'dnf': self.app_entry.dnf,
-                    'zypper': self.app_entry.zypper,
-                },
-                flatpak_id=self.app_entry.flatpak,
-                snap_name=self.app_entry.snap,
+        if self.search_query is not None:
+            self._run_filtered()
+            return
+
+        candidates = self.candidates
+        if candidates is None:
+            if not self.app_db.chunked_search:
+                # القاعدة مفهرسة: طلب واحد يكفي
+                results = self.app_db.search(self.query)
+                if not self.isInterruptionRequested():
+                    self.results_ready.emit(
+                        self.generation, self.query, results, self.app_db.count_facets(results)
+                    )
+                return
+            candidates = list(self.app_db.apps.values())
+
+        results = []
+        for start in range(0, len(candidates), self.CHUNK_SIZE):
+            # التوقف إذا أصبح الاستعلام قديماً
+            if self.isInterruptionRequested():
+                return
+            chunk = candidates[start:start + self.CHUNK_SIZE]
+            results.extend(self.app_db.search(self.query, chunk))
+
+        if not self.isInterruptionRequested():
+            self.results_ready.emit(
+                self.generation, self.query, results, self.app_db.count_facets(results)
             )
-            
-            if self.action == 'install':
-                success = self.pkg_manager.install_package(pkg_info)
-            else:
-                success = self.pkg_manager.remove_package(pkg_info)
-            
-            self.finished_signal.emit(success, self.app_entry.name)
-        except Exception as e:
-            self.finished_signal.emit(False, str(e))
 
+    def _run_filtered(self):
+        """تنفيذ استعلام بمرشحات كتقاطع لفهارس القاعدة"""
+        if self.search_query.installed is not None and self.pkg_manager is not None:
+            # تُقرأ حالة التثبيت مرة واحدة ثم تبقى محفوظة حتى تتغير
+            self.app_db.set_installed_packages(self.pkg_manager.get_installed_packages())
+        if self.isInterruptionRequested():
+            return
 
-class AppCard(QFrame):
-    """بطاقة التطبيق"""
-    
-    clicked = pyqtSignal(object)
-    install_clicked = pyqtSignal(object)
-    
-    def __init__(self, app_entry: AppEntry, is_installed: bool = False, parent=None):
-        super().__init__(parent)
-        self.app_entry = app_entry
-        self.is_installed = is_installed
-        self._setup_ui()
+        # الأوجه تُحسب من صفوف النتيجة داخل نفس الاستعلام
+        page = self.app_db.query_apps(
+            limit=max(len(self.app_db.apps), 1),
+            facets=True,
+            **self.search_query.filters()
+        )
+        results = list(page.items)
+        if not self.isInterruptionRequested():
+            self.results_ready.emit(self.generation, self.query, results, page.facets)
+
+
+class InstalledScanThread(QThread):
+    """خيط فحص ملفات .desktop وحالة التثبيت"""
+    apps_ready = pyqtSignal(list)
+
+    def __init__(self, scanner, app_db, pkg_manager):
+        super().__init__()
+        self.scanner = scanner
+        self.app_db = app_db
+        self.pkg_manager = pkg_manager
+
+    def run(self):
+        entries = self.scanner.scan()
+        installed = self.pkg_manager.get_installed_packages()
+        self.app_db.set_installed_packages(installed)
+        apps = installed_apps(entries, self.app_db, self.scanner.package_field, installed)
+        # تطبيقات الكتالوج المثبتة بلا ملف .desktop (مثل أدوات الطرفية)
+        known = {app.id for app in apps}
+        apps.extend(app for app in self.app_db.get_installed_apps() if app.id not in known)
+        self.apps_ready.emit(apps)
+
+
+class StartupThread(QThread):
+    """تهيئة المكونات البطيئة بعد ظهور النافذة
+
+    المراحل بالترتيب: اكتشاف النظام، ثم تحميل الكتالوج وفهارسه، ثم آخر
+    قائمة مثبتة محفوظة. كل مرحلة تُرسل إشارتها فتمتلئ الواجهة تدريجياً.
+    فشل مرحلة يُرسل failed ويوقف ما بعدها، وتبقى المراحل السابقة تعمل.
+    """
     
-    def _setup_ui(self):
-        self.setObjectName("appCard")
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor if PYQT_VERSION == 6 else Qt.PointingHandCursor))
-        self.setFixedSize(180, 220)
-        
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(12, 12, 12, 12)
-        layout.setSpacing(8)
-        
-        # أيقونة التطبيق
-        icon_label = QLabel()
-        icon_label.setFixedSize(64, 64)
-        icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        icon_label.setObjectName("appIcon")
-        
-        # محاولة تحميل الأيقونة
-        icon_path = self._get_icon_path()
-        if icon_path and os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path).scaled(64, 64, 
-                Qt.AspectRatioMode.KeepAspectRatio if PYQT_VERSION == 6 else Qt.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation if PYQT_VERSION == 6 else Qt.SmoothTransformation)
-            icon_label.setPixmap(pixmap)
-        else:
-            # أيقونة افتراضية نصية
-            icon_label.setText(self.app_entry.name[0].upper())
-            icon_label.setStyleSheet("""
-                QLabel {
-                    background-color: #4285f4;
-                    color: white;
-                    border-radius: 12px;
-                    font-size: 28px;
-                    font-weight: bold;
-                }
-            """)
-        
-        layout.addWidget(icon_label, alignment=Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        
-        # اسم التطبيق
-        name_label = QLabel(self.app_entry.name)
-        name_label.setObjectName("appName")
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        name_label.setWordWrap(True)
-        layout.addWidget(name_label)
-        
-        # الوصف المختصر
-        desc_label = QLabel(self.app_entry.description_ar[:50] + "..." if len(self.app_entry.description_ar) > 50 else self.app_entry.description_ar)
-        desc_label.setObjectName("appDesc")
-        desc_label.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        desc_label.setWordWrap(True)
-        layout.addWidget(desc_label)
-        
-        layout.addStretch()
-        
-        # زر التثبيت/الإزالة
-        self.action_btn = QPushButton("إزالة" if self.is_installed else "تثبيت")
-        self.action_btn.setObjectName("installBtn" if not self.is_installed else "removeBtn")
-        self.action_btn.clicked.connect(lambda: self.install_clicked.emit(self.app_entry))
-        layout.addWidget(self.action_btn)
+    detected = pyqtSignal(object, object)
+    catalog_ready = pyqtSignal(dict)
+    installed_cached = pyqtSignal(object, list)
+    failed = pyqtSignal(str)
     
-    def _get_icon_path(self) -> Optional[str]:
-        """الحصول على مسار الأيقونة"""
-        icon_dirs = [
-            '/usr/share/icons/hicolor/64x64/apps',
-            '/usr/share/icons/hicolor/48x48/apps',
-            '/usr/share/icons/hicolor/scalable/apps',
-            '/usr/share/pixmaps',
-            os.path.join(os.path.dirname(__file__), '..', 'icons'),
-        ]
-        
-        extensions = ['.png', '.svg', '.xpm', '']
+    def run(self):
+        try:
+            detector = DistroDetector()
+            pkg_manager = PackageManager(detector)
+        except Exception as e:
+            self._fail("تعذر اكتشاف النظام", e)
+            return
+        self.detected.emit(detector, pkg_manager)
+        package_field = MANAGER_FIELDS.get(detector.package_manager)
         
-        for icon_dir in icon_dirs:
-            for ext in extensions:
-                path = os.path.join(icon_dir, f"{self.app_entry.icon}{ext}")
-                if os.path.exists(path):
-                    return path
+        try:
+            parts = self._load_catalog(detector, package_field)
+        except Exception as e:
+            self._fail("تعذر تحميل الكتالوج", e)
+            return
+        self.catalog_ready.emit(parts)
         
-        return None
+        # التطبيقات المثبتة: نتائج آخر فحص محفوظة تُعرض فوراً ثم تُحدّث لاحقاً
+        try:
+            scanner = DesktopScanner(package_field)
+            apps = installed_apps(scanner.cached_entries(), parts['app_db'], package_field)
+        except Exception as e:
+            self._fail("تعذر قراءة التطبيقات المثبتة", e)
+            return
+        self.installed_cached.emit(scanner, apps)
     
-    def mousePressEvent(self, event):
-        self.clicked.emit(self.app_entry)
-        super().mousePressEvent(event)
+    def _load_catalog(self, detector, package_field: Optional[str]) -> dict:
+        # LINUX_STORE_CATALOG_DB يفعّل التخزين في ملف SQLite،
+        # وإلا يُبنى الكتالوج من طبقات AppStream والمورد والموقع والمستخدم
+        catalog_db_path = os.environ.get('LINUX_STORE_CATALOG_DB')
+        if catalog_db_path:
+            catalog_layers = None
+            app_db = open_app_database(catalog_db_path)
+        else:
+            catalog_layers = LayeredCatalog.with_default_layers(package_field=package_field)
+            app_db = catalog_layers.db
+        # أسماء الحزم الناقصة من جدول المطابقة بين التوزيعات إن وُجد؛ مع
+        # الطبقات يُطبق داخل الدمج حتى يبقى بعد إعادة تحميل أي طبقة
+        warnings = []
+        try:
+            (catalog_layers if catalog_layers is not None else app_db).apply_package_map(PACKAGE_MAP_FILE)
+        except (OSError, ValueError) as e:
+            logger.warning("تعذر تحميل جدول أسماء الحزم: %s", e)
+            warnings.append(f"جدول أسماء الحزم: {e}")
+        # اختيار مدير الحزم واسم الحزمة لكل تطبيق يُحسب مرة واحدة لهذا الجهاز
+        resolutions = ResolutionTable(detector, app_db)
+        # معرفات flatpak تُتحقق من مراجع المستودعات التي قرأتها طبقة AppStream
+        resolutions.set_flatpak_refs(load_flatpak_refs() if catalog_layers is not None else {})
+        return {
+            'catalog_layers': catalog_layers,
+            'app_db': app_db,
+            'search_trie': AppTrie.from_database(app_db),
+            'resolutions': resolutions,
+            'warnings': warnings,
+        }
     
-    def update_status(self, is_installed: bool):
-        """تحديث حالة التثبيت"""
-        self.is_installed = is_installed
-        self.action_btn.setText("إزالة" if is_installed else "تثبيت")
-        self.action_btn.setObjectName("removeBtn" if is_installed else "installBtn")
-        self.action_btn.setStyle(self.action_btn.style())
+    def _fail(self, stage: str, error: Exception):
+        logger.exception("%s", stage)
+        self.failed.emit(f"{stage}: {error}")
 
 
 class CategoryButton(QPushButton):
@@ -195,6 +231,10 @@ class CategoryButton(QPushButton):
         self.setObjectName("categoryBtn")
         self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor if PYQT_VERSION == 6 else Qt.PointingHandCursor))
         self.setCheckable(True)
+    
+    def set_count(self, count: int):
+        """عرض عدد تطبيقات التصنيف"""
+        self.setText(f"{self.category_info['icon']} {self.category_info['name_ar']} ({count})")
 
 
 class AppDetailWidget(QWidget):
@@ -203,10 +243,14 @@ class AppDetailWidget(QWidget):
     back_clicked = pyqtSignal()
     install_clicked = pyqtSignal(object)
     
+    ICON_SIZE = 128
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.app_entry = None
         self.is_installed = False
+        self.icon_loader = default_loader()
+        self.icon_loader.icon_ready.connect(self._on_icon_ready)
         self._setup_ui()
     
     def _setup_ui(self):
@@ -230,7 +274,7 @@ class AppDetailWidget(QWidget):
         
         # الأيقونة
         self.icon_label = QLabel()
-        self.icon_label.setFixedSize(128, 128)
+        self.icon_label.setFixedSize(self.ICON_SIZE, self.ICON_SIZE)
         self.icon_label.setObjectName("detailIcon")
         info_layout.addWidget(self.icon_label)
         
@@ -254,7 +298,8 @@ class AppDetailWidget(QWidget):
         btn_layout = QHBoxLayout()
         
         self.action_btn = QPushButton("تثبيت")
-        self.action_btn.setObjectName("detailInstallBtn")
+        self.action_btn.setObjectName("detailActionBtn")
+        self.action_btn.setProperty("installed", False)
         self.action_btn.setFixedWidth(150)
         self.action_btn.clicked.connect(self._on_action)
         btn_layout.addWidget(self.action_btn)
@@ -289,8 +334,7 @@ class AppDetailWidget(QWidget):
         self.desc_label.setText(app_entry.description_ar)
         
         # تحديث زر الإجراء
-        self.action_btn.setText("إزالة" if is_installed else "تثبيت")
-        self.action_btn.setObjectName("detailRemoveBtn" if is_installed else "detailInstallBtn")
+        self.update_status(is_installed)
         
         # معلومات الحزم
         pkg_info = []
@@ -307,17 +351,20 @@ class AppDetailWidget(QWidget):
         
         self.package_info.setText("أسماء الحزم:\n" + "\n".join(pkg_info))
         
-        # الأيقونة
-        self.icon_label.setText(app_entry.name[0].upper())
-        self.icon_label.setStyleSheet("""
-            QLabel {
-                background-color: #4285f4;
-                color: white;
-                border-radius: 20px;
-                font-size: 48px;
-                font-weight: bold;
-            }
-        """)
+        self._update_icon()
+    
+    def _update_icon(self):
+        """أيقونة التطبيق من المحمل المشترك، أو صورة الحرف الأول"""
+        scale = self.devicePixelRatioF()
+        pixmap, missing = self.icon_loader.pixmap(self.app_entry.icon, self.ICON_SIZE, scale)
+        if pixmap is None:
+            # حتى تجهز الأيقونة (أو إن لم توجد) تُعرض صورة الحرف الأول
+            pixmap = letter_avatar(self.app_entry.name, self.ICON_SIZE, scale)
+        self.icon_label.setPixmap(pixmap)
+    
+    def _on_icon_ready(self, icon: str):
+        if self.app_entry is not None and self.app_entry.icon == icon:
+            self._update_icon()
     
     def _on_action(self):
         if self.app_entry:
@@ -327,25 +374,75 @@ class AppDetailWidget(QWidget):
         """تحديث حالة التثبيت"""
         self.is_installed = is_installed
         self.action_btn.setText("إزالة" if is_installed else "تثبيت")
+        if self.action_btn.property("installed") != is_installed:
+            # اللون يأتي من قاعدة [installed="true"] في الأنماط العامة
+            self.action_btn.setProperty("installed", is_installed)
+            self.action_btn.style().unpolish(self.action_btn)
+            self.action_btn.style().polish(self.action_btn)
 
 
 class MainWindow(QMainWindow):
     """النافذة الرئيسية"""
-    
-    def __init__(self):
+
+    # مدة الانتظار بعد آخر ضغطة مفتاح قبل البحث
+    SEARCH_DEBOUNCE_MS = 250
+    # عدد البطاقات التي يضيفها نموذج القائمة الجاهزة في كل دفعة
+    SEARCH_FILL_BATCH = 48
+    # عدد التطبيقات في كل صفحة من صفحة التصنيف
+    CATEGORY_PAGE_SIZE = 48
+    # عدد صفحات التصنيف والبحث المحفوظة للرجوع إليها
+    PAGE_CACHE_SIZE = 12
+
+    def __init__(self, started_at: Optional[float] = None):
         super().__init__()
         
-        # تهيئة المكونات
-        self.detector = DistroDetector()
-        self.pkg_manager = PackageManager(self.detector)
-        self.app_db = AppDatabase()
+        # زمن الإقلاع يُقاس من بدء البرنامج حتى أول رسم واكتمال كل مرحلة
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.startup_timings: Dict[str, float] = {}
+        
+        # المكونات تُهيأ في StartupThread بعد ظهور النافذة
+        self.detector = None
+        self.pkg_manager = None
+        self.catalog_layers = None
+        self.app_db = None
+        self.search_trie = None
+        self.resolutions = None
+        self.desktop_scanner = None
+        self.startup_error: Optional[str] = None
+        self.installed_apps = []
+        self.installed_thread = None
+        self.installed_ids = set()
+        self.startup_thread = None
         
         self.current_category = None
-        self.install_thread = None
-        
+        # عمليات التثبيت والإزالة تُجدول بعد اكتشاف مدير الحزم
+        self.scheduler = None
+        self.scheduler_bridge = SchedulerBridge(self)
+        self.scheduler_bridge.updated.connect(self._on_operation_updated)
+        self.scheduler_bridge.finished.connect(self._on_operation_finished)
+        # فحص جديد مطلوب بعد انتهاء الفحص الجاري
+        self._rescan_installed = False
+
+        # حالة البحث الفوري
+        self.search_generation = 0
+        # QLineEdit يكتب نص الاقتراح المختار بعد معالجتنا له
+        self._applying_completion = False
+        self.search_threads = []
+        self.last_search_query = None
+        self.last_search_results = None
+        self.suggestion_ids = {}
+
+        # سجل التنقل وحالات صفحات القوائم (النموذج وموضع التمرير)
+        self.history = NavigationHistory()
+        self.page_cache = PageCache(self.PAGE_CACHE_SIZE)
+        self._navigating = False
+        self._installed_shown = None
+
         self._setup_ui()
         self._apply_styles()
-        self._load_apps()
+        self._set_catalog_enabled(False)
+        # التهيئة تبدأ بعد أول رسم، أو بعد مهلة قصيرة إن لم تُرسم النافذة
+        QTimer.singleShot(200, self._start_startup)
     
     def _setup_ui(self):
         self.setWindowTitle("Linux Store - متجر لينكس")
@@ -360,8 +457,8 @@ class MainWindow(QMainWindow):
         main_layout.setSpacing(0)
         
         # الشريط الجانبي
-        sidebar = self._create_sidebar()
-        main_layout.addWidget(sidebar)
+        self.sidebar = self._create_sidebar()
+        main_layout.addWidget(self.sidebar)
         
         # المحتوى الرئيسي
         content = QWidget()
@@ -371,8 +468,8 @@ class MainWindow(QMainWindow):
         content_layout.setSpacing(0)
         
         # شريط البحث
-        search_bar = self._create_search_bar()
-        content_layout.addWidget(search_bar)
+        self.search_bar = self._create_search_bar()
+        content_layout.addWidget(self.search_bar)
         
         # منطقة المحتوى المتغير
         self.stack = QStackedWidget()
@@ -381,22 +478,25 @@ class MainWindow(QMainWindow):
         self.home_page = self._create_home_page()
         self.stack.addWidget(self.home_page)
         
-        # صفحة التصنيف
-        self.category_page = self._create_category_page()
-        self.stack.addWidget(self.category_page)
-        
-        # صفحة التفاصيل
-        self.detail_page = AppDetailWidget()
-        self.detail_page.back_clicked.connect(self._go_back)
-        self.detail_page.install_clicked.connect(self._on_install)
-        self.stack.addWidget(self.detail_page)
-        
-        # صفحة البحث
-        self.search_page = self._create_search_page()
-        self.stack.addWidget(self.search_page)
+        # باقي الصفحات تُنشأ عند أول انتقال إليها
+        self._pages: Dict[str, QWidget] = {}
+        self._page_factories = {
+            'category': self._create_category_page,
+            'detail': self._create_detail_page,
+            'search': self._create_search_page,
+            'installed': self._create_installed_page,
+        }
         
         content_layout.addWidget(self.stack)
         
+        # لوحة العمليات، تظهر عند إضافة عملية أو من زر شريط الحالة
+        self.operations_panel = OperationsPanel()
+        self.operations_panel.cancel_requested.connect(self._cancel_operation)
+        self.operations_panel.retry_requested.connect(self._retry_operation)
+        self.operations_panel.clear_requested.connect(self._clear_finished_operations)
+        self.operations_panel.setVisible(False)
+        content_layout.addWidget(self.operations_panel)
+        
         # شريط الحالة
         status_bar = self._create_status_bar()
         content_layout.addWidget(status_bar)
@@ -420,15 +520,23 @@ class MainWindow(QMainWindow):
         layout.addWidget(logo)
         
         # معلومات النظام
-        sys_info = QLabel(f"📦 {self.detector.distro_name or 'Linux'}")
-        sys_info.setObjectName("sysInfo")
-        sys_info.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        layout.addWidget(sys_info)
-        
-        pkg_info = QLabel(f"⚙️ {self.detector.package_manager or 'N/A'}")
-        pkg_info.setObjectName("pkgInfo")
-        pkg_info.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
-        layout.addWidget(pkg_info)
+        # تُملأ بعد اكتشاف النظام
+        self.sys_info = QLabel("📦 ...")
+        self.sys_info.setObjectName("sysInfo")
+        self.sys_info.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
+        layout.addWidget(self.sys_info)
+        
+        self.pkg_info = QLabel("⚙️ ...")
+        self.pkg_info.setObjectName("pkgInfo")
+        self.pkg_info.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
+        layout.addWidget(self.pkg_info)
+        
+        # عدد المثبت يظهر بعد أول قراءة لحالة التثبيت
+        self.installed_info = QLabel()
+        self.installed_info.setObjectName("pkgInfo")
+        self.installed_info.setAlignment(Qt.AlignmentFlag.AlignCenter if PYQT_VERSION == 6 else Qt.AlignCenter)
+        self.installed_info.setVisible(False)
+        layout.addWidget(self.installed_info)
         
         layout.addSpacing(20)
         
@@ -439,16 +547,22 @@ class MainWindow(QMainWindow):
         layout.addWidget(home_btn)
         
         # زر التطبيقات
-        apps_btn = QPushButton("📱 التطبيقات")
-        apps_btn.setObjectName("navBtn")
-        apps_btn.clicked.connect(lambda: self._show_category_filter('apps'))
-        layout.addWidget(apps_btn)
+        self.apps_btn = QPushButton("📱 التطبيقات")
+        self.apps_btn.setObjectName("navBtn")
+        self.apps_btn.clicked.connect(lambda: self._show_category_filter('apps'))
+        layout.addWidget(self.apps_btn)
         
         # زر الحزم
-        pkgs_btn = QPushButton("📦 الحزم")
-        pkgs_btn.setObjectName("navBtn")
-        pkgs_btn.clicked.connect(lambda: self._show_category_filter('packages'))
-        layout.addWidget(pkgs_btn)
+        self.pkgs_btn = QPushButton("📦 الحزم")
+        self.pkgs_btn.setObjectName("navBtn")
+        self.pkgs_btn.clicked.connect(lambda: self._show_category_filter('packages'))
+        layout.addWidget(self.pkgs_btn)
+        
+        # زر المثبتة
+        self.installed_btn = QPushButton("✅ المثبتة")
+        self.installed_btn.setObjectName("navBtn")
+        self.installed_btn.clicked.connect(self._show_installed)
+        layout.addWidget(self.installed_btn)
         
         layout.addSpacing(10)
         
@@ -459,7 +573,7 @@ class MainWindow(QMainWindow):
         
         # أزرار التصنيفات
         self.category_buttons = {}
-        for cat_id, cat_info in self.app_db.get_categories().items():
+        for cat_id, cat_info in AppDatabase.CATEGORIES.items():
             btn = CategoryButton(cat_id, cat_info)
             btn.clicked.connect(lambda checked, cid=cat_id: self._show_category(cid))
             self.category_buttons[cat_id] = btn
@@ -484,11 +598,56 @@ class MainWindow(QMainWindow):
         layout = QHBoxLayout(bar)
         layout.setContentsMargins(20, 10, 20, 10)
         
+        # أزرار الرجوع والتقدم في سجل التنقل
+        self.nav_back_btn = QToolButton()
+        self.nav_back_btn.setObjectName("historyBtn")
+        self.nav_back_btn.setText("←")
+        self.nav_back_btn.setToolTip("رجوع (Alt+←)")
+        self.nav_back_btn.clicked.connect(self._go_back)
+        layout.addWidget(self.nav_back_btn)
+        
+        self.nav_forward_btn = QToolButton()
+        self.nav_forward_btn.setObjectName("historyBtn")
+        self.nav_forward_btn.setText("→")
+        self.nav_forward_btn.setToolTip("تقدم (Alt+→)")
+        self.nav_forward_btn.clicked.connect(self._go_forward)
+        layout.addWidget(self.nav_forward_btn)
+        
+        back_keys = QKeySequence.StandardKey.Back if PYQT_VERSION == 6 else QKeySequence.Back
+        forward_keys = QKeySequence.StandardKey.Forward if PYQT_VERSION == 6 else QKeySequence.Forward
+        QShortcut(QKeySequence(back_keys), self, activated=self._go_back)
+        QShortcut(QKeySequence(forward_keys), self, activated=self._go_forward)
+        self._update_nav_buttons()
+        
         self.search_input = QLineEdit()
         self.search_input.setObjectName("searchInput")
         self.search_input.setPlaceholderText("🔍 ابحث عن تطبيقات وحزم...")
+        self.search_input.setToolTip(
+            "مرشحات البحث:\n"
+            "category:development  التصنيف\n"
+            "manager:flatpak,snap  مدير الحزم\n"
+            "installed:yes|no  حالة التثبيت\n"
+            "is:app|package|featured|popular"
+        )
         self.search_input.returnPressed.connect(self._do_search)
+        self.search_input.textChanged.connect(self._on_search_text_changed)
+        self.search_input.textEdited.connect(self._update_suggestions)
         layout.addWidget(self.search_input)
+
+        # اقتراحات الإكمال التلقائي من شجرة البادئات
+        self.suggestion_model = QStringListModel(self)
+        self.completer = QCompleter(self.suggestion_model, self)
+        self.completer.setCompletionMode(
+            QCompleter.CompletionMode.UnfilteredPopupCompletion if PYQT_VERSION == 6 else QCompleter.UnfilteredPopupCompletion
+        )
+        self.completer.activated[str].connect(self._on_suggestion_selected)
+        self.search_input.setCompleter(self.completer)
+
+        # مؤقت لتأخير البحث أثناء الكتابة
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self._do_search)
         
         search_btn = QPushButton("بحث")
         search_btn.setObjectName("searchBtn")
@@ -509,44 +668,44 @@ class MainWindow(QMainWindow):
         featured_label.setObjectName("sectionTitle")
         layout.addWidget(featured_label)
         
-        self.featured_scroll = QScrollArea()
-        self.featured_scroll.setObjectName("appScroll")
-        self.featured_scroll.setWidgetResizable(True)
-        self.featured_scroll.setHorizontalScrollBarPolicy(
-            Qt.ScrollBarPolicy.ScrollBarAlwaysOff if PYQT_VERSION == 6 else Qt.ScrollBarAlwaysOff
-        )
-        self.featured_scroll.setFixedHeight(260)
-        
-        self.featured_container = QWidget()
-        self.featured_layout = QHBoxLayout(self.featured_container)
-        self.featured_layout.setContentsMargins(0, 0, 0, 0)
-        self.featured_layout.setSpacing(15)
-        self.featured_scroll.setWidget(self.featured_container)
-        
-        layout.addWidget(self.featured_scroll)
+        self.featured_view = AppGridView(wrapping=False)
+        self.featured_view.setFixedHeight(260)
+        self._connect_grid(self.featured_view)
+        layout.addWidget(self.featured_view)
         
         # التطبيقات الشائعة
         popular_label = QLabel("🔥 الأكثر شعبية")
         popular_label.setObjectName("sectionTitle")
         layout.addWidget(popular_label)
         
-        self.popular_scroll = QScrollArea()
-        self.popular_scroll.setObjectName("appScroll")
-        self.popular_scroll.setWidgetResizable(True)
-        self.popular_scroll.setHorizontalScrollBarPolicy(
-            Qt.ScrollBarPolicy.ScrollBarAlwaysOff if PYQT_VERSION == 6 else Qt.ScrollBarAlwaysOff
-        )
-        
-        self.popular_container = QWidget()
-        self.popular_layout = QGridLayout(self.popular_container)
-        self.popular_layout.setContentsMargins(0, 0, 0, 0)
-        self.popular_layout.setSpacing(15)
-        self.popular_scroll.setWidget(self.popular_container)
-        
-        layout.addWidget(self.popular_scroll, 1)
+        self.popular_view = AppGridView()
+        self._connect_grid(self.popular_view)
+        layout.addWidget(self.popular_view, 1)
         
         return page
     
+    def _page(self, name: str) -> QWidget:
+        """الصفحة المطلوبة، تُنشأ وتُضاف للمكدس عند أول طلب"""
+        page = self._pages.get(name)
+        if page is None:
+            page = self._page_factories[name]()
+            self.stack.addWidget(page)
+            self._pages[name] = page
+            for view in page.findChildren(AppGridView):
+                view.app_model().set_installed_ids(self.installed_ids)
+        return page
+    
+    def _is_current(self, name: str) -> bool:
+        page = self._pages.get(name)
+        return page is not None and self.stack.currentWidget() is page
+    
+    def _create_detail_page(self) -> QWidget:
+        """إنشاء صفحة التفاصيل"""
+        self.detail_page = AppDetailWidget()
+        self.detail_page.back_clicked.connect(self._go_back)
+        self.detail_page.install_clicked.connect(self._on_install)
+        return self.detail_page
+    
     def _create_category_page(self) -> QWidget:
         """إنشاء صفحة التصنيف"""
         page = QWidget()
@@ -558,17 +717,11 @@ class MainWindow(QMainWindow):
         self.category_title.setObjectName("sectionTitle")
         layout.addWidget(self.category_title)
         
-        self.category_scroll = QScrollArea()
-        self.category_scroll.setObjectName("appScroll")
-        self.category_scroll.setWidgetResizable(True)
-        
-        self.category_container = QWidget()
-        self.category_grid = QGridLayout(self.category_container)
-        self.category_grid.setContentsMargins(0, 0, 0, 0)
-        self.category_grid.setSpacing(15)
-        self.category_scroll.setWidget(self.category_container)
-        
-        layout.addWidget(self.category_scroll, 1)
+        # النموذج يجلب صفحات query_apps عند التمرير
+        self.category_view = AppGridView(AppListModel(self.CATEGORY_PAGE_SIZE))
+        self._connect_grid(self.category_view)
+        layout.addWidget(self.category_view, 1)
+        layout.addWidget(self._create_selection_bar(self.category_view))
         
         return page
     
@@ -583,20 +736,56 @@ class MainWindow(QMainWindow):
         self.search_title.setObjectName("sectionTitle")
         layout.addWidget(self.search_title)
         
-        self.search_scroll = QScrollArea()
-        self.search_scroll.setObjectName("appScroll")
-        self.search_scroll.setWidgetResizable(True)
+        # توزيع النتائج حسب التصنيف ومدير الحزم والتثبيت
+        self.search_facets = QLabel()
+        self.search_facets.setObjectName("sysInfo")
+        self.search_facets.setWordWrap(True)
+        layout.addWidget(self.search_facets)
+        
+        self.search_view = AppGridView(AppListModel(self.SEARCH_FILL_BATCH))
+        self._connect_grid(self.search_view)
+        layout.addWidget(self.search_view, 1)
+        layout.addWidget(self._create_selection_bar(self.search_view))
+        
+        return page
+    
+    def _create_installed_page(self) -> QWidget:
+        """إنشاء صفحة التطبيقات المثبتة"""
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
         
-        self.search_container = QWidget()
-        self.search_grid = QGridLayout(self.search_container)
-        self.search_grid.setContentsMargins(0, 0, 0, 0)
-        self.search_grid.setSpacing(15)
-        self.search_scroll.setWidget(self.search_container)
+        self.installed_title = QLabel("✅ التطبيقات المثبتة")
+        self.installed_title.setObjectName("sectionTitle")
+        layout.addWidget(self.installed_title)
         
-        layout.addWidget(self.search_scroll, 1)
+        self.installed_view = AppGridView(AppListModel(self.SEARCH_FILL_BATCH))
+        self._connect_grid(self.installed_view)
+        layout.addWidget(self.installed_view, 1)
+        layout.addWidget(self._create_selection_bar(self.installed_view))
         
         return page
     
+    def _connect_grid(self, view: AppGridView):
+        """ربط نقرات بطاقات الشبكة"""
+        view.app_clicked.connect(self._show_app_detail)
+        view.install_clicked.connect(self._on_install)
+    
+    def _create_selection_bar(self, view: AppGridView) -> SelectionBar:
+        """تفعيل التحديد المتعدد في شبكة وشريط إجراءاته"""
+        view.set_selectable(True)
+        bar = SelectionBar(view)
+        bar.install_requested.connect(lambda apps: self._on_bulk_action(view, 'install', apps))
+        bar.remove_requested.connect(lambda apps: self._on_bulk_action(view, 'remove', apps))
+        return bar
+    
+    def _grid_views(self) -> List[AppGridView]:
+        views = [self.featured_view, self.popular_view]
+        for page in self._pages.values():
+            views.extend(page.findChildren(AppGridView))
+        return views
+    
     def _create_status_bar(self) -> QWidget:
         """إنشاء شريط الحالة"""
         bar = QWidget()
@@ -612,6 +801,13 @@ class MainWindow(QMainWindow):
         
         layout.addStretch()
         
+        self.operations_btn = QPushButton("📥 العمليات")
+        self.operations_btn.setObjectName("operationsBtn")
+        self.operations_btn.clicked.connect(
+            lambda: self.operations_panel.setVisible(not self.operations_panel.isVisible())
+        )
+        layout.addWidget(self.operations_btn)
+        
         self.progress_bar = QProgressBar()
         self.progress_bar.setObjectName("progressBar")
         self.progress_bar.setFixedWidth(200)
@@ -733,13 +929,116 @@ class MainWindow(QMainWindow):
                 background-color: #3367d6;
             }
             
+            #selectionBar {
+                background-color: #e8f0fe;
+                border-radius: 10px;
+            }
+            
+            #selectionCount {
+                color: #1a73e8;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            
+            #bulkInstallBtn, #bulkRemoveBtn, #clearSelectionBtn {
+                padding: 6px 16px;
+                border-radius: 14px;
+                font-size: 13px;
+            }
+            
+            #bulkInstallBtn {
+                background-color: #4285f4;
+                color: white;
+                border: none;
+            }
+            
+            #bulkRemoveBtn {
+                background-color: #ea4335;
+                color: white;
+                border: none;
+            }
+            
+            #clearSelectionBtn {
+                background-color: transparent;
+                color: #1a73e8;
+                border: 1px solid #1a73e8;
+            }
+            
+            #operationsPanel {
+                background-color: #ffffff;
+                border-top: 1px solid #e0e0e0;
+            }
+            
+            #operationsTitle {
+                color: #333333;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            
+            #operationRow {
+                background-color: #f8f9fa;
+                border-radius: 8px;
+            }
+            
+            #operationRow[state="failed"] {
+                background-color: #fdecea;
+            }
+            
+            #operationRow[state="done"] {
+                background-color: #e6f4ea;
+            }
+            
+            #operationTitle {
+                color: #333333;
+                font-size: 13px;
+                font-weight: bold;
+            }
+            
+            #operationDetail {
+                color: #666666;
+                font-size: 11px;
+            }
+            
+            #operationCancelBtn, #operationRetryBtn, #operationClearBtn, #operationsBtn {
+                background-color: transparent;
+                color: #4285f4;
+                border: 1px solid #d0d0d0;
+                border-radius: 6px;
+                padding: 4px 10px;
+                font-size: 12px;
+            }
+            
+            #operationCancelBtn {
+                color: #ea4335;
+            }
+            
+            #operationCancelBtn:hover, #operationRetryBtn:hover, #operationClearBtn:hover, #operationsBtn:hover {
+                background-color: #f0f0f0;
+            }
+            
+            #historyBtn {
+                background-color: transparent;
+                color: #4285f4;
+                border: none;
+                font-size: 18px;
+                padding: 4px 8px;
+            }
+            
+            #historyBtn:hover {
+                color: #3367d6;
+            }
+            
+            #historyBtn:disabled {
+                color: #cccccc;
+            }
+            
             #sectionTitle {
                 color: #333333;
                 font-size: 18px;
                 font-weight: bold;
             }
             
-            #appScroll {
+            #appGrid {
                 border: none;
                 background-color: transparent;
             }
@@ -820,7 +1119,7 @@ class MainWindow(QMainWindow):
                 line-height: 1.5;
             }
             
-            #detailInstallBtn {
+            #detailActionBtn {
                 background-color: #4285f4;
                 color: white;
                 border: none;
@@ -829,17 +1128,16 @@ class MainWindow(QMainWindow):
                 font-size: 14px;
             }
             
-            #detailInstallBtn:hover {
+            #detailActionBtn:hover {
                 background-color: #3367d6;
             }
             
-            #detailRemoveBtn {
+            #detailActionBtn[installed="true"] {
                 background-color: #ea4335;
-                color: white;
-                border: none;
-                padding: 12px 30px;
-                border-radius: 8px;
-                font-size: 14px;
+            }
+            
+            #detailActionBtn[installed="true"]:hover {
+                background-color: #d33426;
             }
             
             #websiteBtn {
@@ -913,32 +1211,220 @@ class MainWindow(QMainWindow):
             }
         """)
     
+    # --- الإقلاع ---
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if 'first_paint' not in self.startup_timings:
+            self._mark('first_paint')
+            QTimer.singleShot(0, self._start_startup)
+    
+    def _mark(self, stage: str):
+        """تسجيل زمن مرحلة من الإقلاع بالمللي ثانية منذ بدء البرنامج"""
+        elapsed = (time.perf_counter() - self.started_at) * 1000
+        self.startup_timings[stage] = elapsed
+        if os.environ.get('LINUX_STORE_TIMINGS'):
+            print(f"startup {stage}: {elapsed:.1f} ms")
+    
+    def _start_startup(self):
+        if self.startup_thread is not None:
+            return
+        self.status_label.setText("جاري تحميل الكتالوج...")
+        self.startup_thread = StartupThread(self)
+        self.startup_thread.detected.connect(self._on_detected)
+        self.startup_thread.catalog_ready.connect(self._on_catalog_ready)
+        self.startup_thread.installed_cached.connect(self._on_installed_cached)
+        self.startup_thread.failed.connect(self._on_startup_failed)
+        self.startup_thread.start()
+    
+    def _set_catalog_enabled(self, enabled: bool):
+        """ما يحتاج الكتالوج يبقى معطلاً حتى يُحمّل"""
+        self.sidebar.setEnabled(enabled)
+        self.search_bar.setEnabled(enabled)
+    
+    def _on_detected(self, detector, pkg_manager):
+        """عرض معلومات النظام بعد اكتشافه"""
+        self._mark('detected')
+        self.detector = detector
+        self.pkg_manager = pkg_manager
+        self.scheduler = OperationScheduler(pkg_manager)
+        self.scheduler_bridge.attach(self.scheduler)
+        self.sys_info.setText(f"📦 {detector.distro_name or 'Linux'}")
+        self.pkg_info.setText(f"⚙️ {detector.package_manager or 'N/A'}")
+    
+    def _on_catalog_ready(self, parts: dict):
+        """ربط الكتالوج وفهارسه بالواجهة"""
+        self._mark('catalog')
+        self.catalog_layers = parts['catalog_layers']
+        self.app_db = parts['app_db']
+        self.search_trie = parts['search_trie']
+        self.resolutions = parts['resolutions']
+        self.pkg_manager.set_resolution_table(self.resolutions)
+        self.app_db.set_callback('on_change', self._on_catalog_changed)
+        self._load_apps()
+        self._set_catalog_enabled(True)
+        # طبقة تالفة أو جدول حزم تالف لا يمنع عرض بقية الكتالوج
+        problems = list(parts['warnings'])
+        if self.catalog_layers is not None:
+            problems += [f"طبقة {name}: {error}" for name, error in self.catalog_layers.errors.items()]
+        if problems:
+            self.status_label.setText(f"⚠️ {problems[0]}" + (f" (+{len(problems) - 1})" if len(problems) > 1 else ''))
+            self.status_label.setToolTip('\n'.join(problems))
+        else:
+            self.status_label.setText("جاهز")
+    
+    def _on_startup_failed(self, message: str):
+        """عرض خطأ الإقلاع؛ ما حُمّل قبل المرحلة الفاشلة يبقى متاحاً"""
+        self.startup_error = message
+        self.status_label.setText(f"⚠️ {message}")
+        self.status_label.setToolTip(message)
+    
+    def _on_installed_cached(self, scanner, apps: list):
+        """عرض آخر قائمة مثبتة محفوظة ثم بدء الفحص الفعلي"""
+        self._mark('installed_cache')
+        self.desktop_scanner = scanner
+        self._apply_installed(apps)
+        self._refresh_installed()
+    
     def _load_apps(self):
         """تحميل التطبيقات"""
         # تحميل التطبيقات المميزة
-        featured = self.app_db.get_featured_apps()
-        for app in featured:
-            card = AppCard(app)
-            card.clicked.connect(self._show_app_detail)
-            card.install_clicked.connect(self._on_install)
-            self.featured_layout.addWidget(card)
-        self.featured_layout.addStretch()
-        
-        # تحميل التطبيقات الشائعة
-        popular = self.app_db.get_popular_apps()
-        row, col = 0, 0
-        for app in popular:
-            card = AppCard(app)
-            card.clicked.connect(self._show_app_detail)
-            card.install_clicked.connect(self._on_install)
-            self.popular_layout.addWidget(card, row, col)
-            col += 1
-            if col >= 4:
-                col = 0
-                row += 1
+        self.featured_view.app_model().set_apps(list(self.app_db.get_featured_apps()))
+        
+        for view in self._grid_views():
+            view.app_model().set_installed_ids(self.installed_ids)
+        
+        self._update_facet_counts()
+        
+        # قسم الأكثر شعبية أسفل المميزة يُملأ عند خلو حلقة الأحداث
+        QTimer.singleShot(0, self._load_popular)
+    
+    def _load_popular(self):
+        """تحميل التطبيقات الشائعة"""
+        self.popular_view.app_model().set_apps(list(self.app_db.get_popular_apps()))
+    
+    def _update_facet_counts(self):
+        """عرض عدادات الأوجه في الشريط الجانبي"""
+        facets = self.app_db.facet_counts()
+        
+        for cat_id, btn in self.category_buttons.items():
+            btn.set_count(facets['category'].get(cat_id, 0))
+        
+        self.apps_btn.setText(f"📱 التطبيقات ({facets['kind']['app']})")
+        self.pkgs_btn.setText(f"📦 الحزم ({facets['kind']['package']})")
+        
+        # عدد ما يوفره كل مدير متاح على النظام
+        managers = []
+        for manager in self.detector.available_managers:
+            field_name = MANAGER_FIELDS.get(manager)
+            if field_name and field_name in facets['manager']:
+                managers.append(f"{manager}: {facets['manager'][field_name]}")
+        self.pkg_info.setToolTip('\n'.join(managers))
+        if self.detector.package_manager in MANAGER_FIELDS:
+            field_name = MANAGER_FIELDS[self.detector.package_manager]
+            self.pkg_info.setText(
+                f"⚙️ {self.detector.package_manager} ({facets['manager'].get(field_name, 0)})"
+            )
+        
+        installed = facets.get('installed')
+        if installed:
+            self.installed_info.setText(f"✅ مثبت: {installed['yes']}")
+            self.installed_info.setVisible(True)
+    
+    def _format_facets(self, facets: dict) -> str:
+        """نص مختصر لتوزيع نتائج البحث"""
+        categories = self.app_db.get_categories()
+        parts = []
+        
+        by_category = sorted(facets.get('category', {}).items(), key=lambda item: -item[1])
+        if by_category:
+            parts.append(' · '.join(
+                f"{categories.get(cat_id, {}).get('name_ar', cat_id)} {count}"
+                for cat_id, count in by_category
+            ))
+        
+        by_manager = sorted(facets.get('manager', {}).items(), key=lambda item: -item[1])
+        if by_manager:
+            parts.append(' · '.join(f"{name} {count}" for name, count in by_manager))
+        
+        installed = facets.get('installed')
+        if installed and (installed['yes'] or installed['no']):
+            parts.append(f"مثبت {installed['yes']} · غير مثبت {installed['no']}")
+        
+        return '  |  '.join(parts)
+    
+    # --- التنقل ---
+    
+    def _enter(self, location: Location, replace: bool = False):
+        """تسجيل الانتقال إلى موقع في سجل التنقل"""
+        if not self._navigating:
+            self._save_scroll()
+            if replace:
+                self.history.replace(location)
+            else:
+                self.history.push(location)
+        self._update_nav_buttons()
+    
+    def _save_scroll(self):
+        """حفظ موضع التمرير للموقع الحالي قبل مغادرته"""
+        current = self.history.current
+        state = self.page_cache.get(current)
+        if state is not None:
+            view = self.search_view if current.page == 'search' else self.category_view
+            if view.app_model() is state.model:
+                state.scroll = view.verticalScrollBar().value()
+    
+    def _update_nav_buttons(self):
+        self.nav_back_btn.setEnabled(self.history.can_go_back())
+        self.nav_forward_btn.setEnabled(self.history.can_go_forward())
+    
+    def _go_back(self):
+        """العودة للموقع السابق"""
+        self._save_scroll()
+        location = self.history.back()
+        if location is not None:
+            self._navigate(location)
+    
+    def _go_forward(self):
+        """التقدم للموقع التالي"""
+        self._save_scroll()
+        location = self.history.forward()
+        if location is not None:
+            self._navigate(location)
+    
+    def _navigate(self, location: Location):
+        """عرض موقع من السجل بدون تسجيله من جديد"""
+        self._navigating = True
+        try:
+            if location.page == 'category':
+                self._show_category(location.key)
+            elif location.page == 'filter':
+                self._show_category_filter(location.key)
+            elif location.page == 'search':
+                self._restore_search(location)
+            elif location.page == 'installed':
+                self._show_installed()
+            elif location.page == 'detail':
+                app = self.app_db.get_app(location.key)
+                if app:
+                    self._show_app_detail(app)
+                else:
+                    self._show_home()
+            else:
+                self._show_home()
+        finally:
+            self._navigating = False
+        self._update_nav_buttons()
+    
+    def _show_page_state(self, view: AppGridView, state: PageState):
+        """إعادة عرض حالة صفحة محفوظة: النموذج نفسه وموضع التمرير"""
+        if view.app_model() is not state.model:
+            view.set_app_model(state.model)
+        view.restore_scroll(state.scroll)
     
     def _show_home(self):
         """عرض الصفحة الرئيسية"""
+        self._enter(HOME)
         self.stack.setCurrentWidget(self.home_page)
         for btn in self.category_buttons.values():
             btn.setChecked(False)
@@ -949,113 +1435,252 @@ class MainWindow(QMainWindow):
         for cid, btn in self.category_buttons.items():
             btn.setChecked(cid == category_id)
         
-        # تحديث العنوان
         cat_info = self.app_db.get_categories().get(category_id, {})
-        self.category_title.setText(f"{cat_info.get('icon', '')} {cat_info.get('name_ar', category_id)}")
-        
-        # مسح المحتوى السابق
-        while self.category_grid.count():
-            item = self.category_grid.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # تحميل التطبيقات
-        apps = self.app_db.get_apps_by_category(category_id)
-        row, col = 0, 0
-        for app in apps:
-            card = AppCard(app)
-            card.clicked.connect(self._show_app_detail)
-            card.install_clicked.connect(self._on_install)
-            self.category_grid.addWidget(card, row, col)
-            col += 1
-            if col >= 4:
-                col = 0
-                row += 1
-        
-        self.stack.setCurrentWidget(self.category_page)
+        title = f"{cat_info.get('icon', '')} {cat_info.get('name_ar', category_id)}"
+        self._show_listing(Location('category', category_id), title, category=category_id)
     
     def _show_category_filter(self, filter_type: str):
         """عرض فلتر التطبيقات/الحزم"""
         for btn in self.category_buttons.values():
             btn.setChecked(False)
         
-        if filter_type == 'apps':
-            self.category_title.setText("📱 جميع التطبيقات")
-            apps = self.app_db.get_applications()
-        else:
-            self.category_title.setText("📦 جميع الحزم")
-            apps = self.app_db.get_packages()
-        
-        # مسح المحتوى السابق
-        while self.category_grid.count():
-            item = self.category_grid.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # تحميل التطبيقات
-        row, col = 0, 0
-        for app in apps:
-            card = AppCard(app)
-            card.clicked.connect(self._show_app_detail)
-            card.install_clicked.connect(self._on_install)
-            self.category_grid.addWidget(card, row, col)
-            col += 1
-            if col >= 4:
-                col = 0
-                row += 1
-        
-        self.stack.setCurrentWidget(self.category_page)
+        title = "📱 جميع التطبيقات" if filter_type == 'apps' else "📦 جميع الحزم"
+        self._show_listing(Location('filter', filter_type), title, is_app=filter_type == 'apps')
+    
+    def _show_listing(self, location: Location, title: str, **query):
+        """عرض استعلام في صفحة التصنيف؛ يُعاد النموذج المحفوظ إن وُجد"""
+        self._enter(location)
+        state = self.page_cache.get(location)
+        if state is None:
+            # الصفحات التالية تُجلب عند التمرير
+            model = AppListModel(self.CATEGORY_PAGE_SIZE)
+            model.set_installed_ids(self.installed_ids)
+            model.set_query(self.app_db, **query)
+            state = PageState(model, title)
+            self.page_cache.put(location, state)
+        self.stack.setCurrentWidget(self._page('category'))
+        self.category_title.setText(state.title)
+        self._show_page_state(self.category_view, state)
+    
+    def _show_installed(self):
+        """عرض التطبيقات المثبتة من آخر نتيجة معروفة"""
+        for btn in self.category_buttons.values():
+            btn.setChecked(False)
+        self._enter(Location('installed'))
+        self.stack.setCurrentWidget(self._page('installed'))
+        self._fill_installed_page()
+    
+    def _fill_installed_page(self):
+        """عرض قائمة المثبتة الحالية (لا يُعاد الملء إن لم تتغير)"""
+        if self._installed_shown is self.installed_apps:
+            return
+        self._installed_shown = self.installed_apps
+        self.installed_title.setText(f"✅ التطبيقات المثبتة ({len(self.installed_apps)})")
+        self.installed_view.app_model().set_apps(self.installed_apps)
+    
+    def _refresh_installed(self):
+        """فحص ملفات .desktop وحالة التثبيت في الخلفية"""
+        if self.desktop_scanner is None or self.app_db is None:
+            # الإقلاع لم يكتمل (أو فشل قبل هذه المرحلة)
+            return
+        if self.installed_thread is not None and self.installed_thread.isRunning():
+            self._rescan_installed = True
+            return
+        self.installed_thread = InstalledScanThread(self.desktop_scanner, self.app_db, self.pkg_manager)
+        self.installed_thread.apps_ready.connect(self._on_installed_ready)
+        self.installed_thread.start()
+    
+    def _on_installed_ready(self, apps: list):
+        """تحديث قائمة المثبتة بعد انتهاء الفحص"""
+        if 'installed_scan' not in self.startup_timings:
+            self._mark('installed_scan')
+        self._apply_installed(apps)
+        if self._rescan_installed:
+            self._rescan_installed = False
+            QTimer.singleShot(0, self._refresh_installed)
+    
+    def _apply_installed(self, apps: list):
+        """نشر قائمة المثبتة على النماذج والعدادات"""
+        self.installed_apps = apps
+        self.installed_ids = {app.id for app in apps}
+        for view in self._grid_views():
+            view.app_model().set_installed_ids(self.installed_ids)
+        for state in self.page_cache.states():
+            state.model.set_installed_ids(self.installed_ids)
+        self._update_facet_counts()
+        if self._is_current('installed'):
+            self._fill_installed_page()
+        if 'detail' in self._pages and self.detail_page.app_entry is not None:
+            self.detail_page.update_status(self.detail_page.app_entry.id in self.installed_ids)
     
     def _show_app_detail(self, app_entry: AppEntry):
         """عرض تفاصيل التطبيق"""
-        self.detail_page.set_app(app_entry)
-        self.stack.setCurrentWidget(self.detail_page)
-    
-    def _go_back(self):
-        """العودة للصفحة السابقة"""
-        self.stack.setCurrentWidget(self.home_page)
+        # نتائج بحث بدأ قبل فتح التفاصيل لا تنقل الواجهة بعيداً عنها
+        self.search_timer.stop()
+        self._cancel_searches()
+        self.search_generation += 1
+        self._enter(Location('detail', app_entry.id))
+        self.stack.setCurrentWidget(self._page('detail'))
+        self.detail_page.set_app(app_entry, app_entry.id in self.installed_ids)
     
+    def _on_search_text_changed(self, text: str):
+        """إعادة تشغيل مؤقت البحث مع كل تعديل على النص"""
+        if self._applying_completion:
+            return
+        if text.strip():
+            self.search_timer.start()
+            return
+
+        # مسح النص يلغي أي بحث جارٍ
+        self.search_timer.stop()
+        self._cancel_searches()
+        self.search_generation += 1
+        self.last_search_query = None
+        self.last_search_results = None
+        if self._is_current('search'):
+            self._show_home()
+
+    def _update_suggestions(self, text: str):
+        """تحديث الاقتراحات حسب النص المكتوب"""
+        self.suggestion_ids = {}
+        names = []
+        for app in self.search_trie.suggest(text):
+            # تمييز التطبيقات ذات الأسماء المتطابقة
+            label = app.name if app.name not in self.suggestion_ids else f"{app.name} ({app.id})"
+            self.suggestion_ids[label] = app.id
+            names.append(label)
+        self.suggestion_model.setStringList(names)
+
+    def _on_suggestion_selected(self, text: str):
+        """فتح التطبيق المقترح مباشرة بدون بحث كامل"""
+        app_id = self.suggestion_ids.get(text)
+        app = self.app_db.get_app(app_id) if app_id else None
+        if not app:
+            return
+
+        # الاختيار لا يحتاج بحثاً: تجاهل textChanged من setText الذي ينفذه
+        # QLineEdit بعد هذه الدالة حتى تعود حلقة الأحداث
+        self._applying_completion = True
+        QTimer.singleShot(0, self._end_completion)
+        self.search_trie.record_selection(app.id)
+        self._show_app_detail(app)
+
+    def _end_completion(self):
+        """انتهاء تطبيق نص الاقتراح المختار على حقل البحث"""
+        self._applying_completion = False
+
+    def _on_catalog_changed(self, changed_ids: list, removed_ids: list):
+        """تحديث الفهارس بعد تعديل الكتالوج"""
+        self.search_trie.update_apps(self.app_db.apps, changed_ids, removed_ids)
+        self.resolutions.update_apps(changed_ids, removed_ids)
+        self._update_facet_counts()
+        # نتائج البحث والتصنيفات المحفوظة لم تعد صالحة
+        self.last_search_query = None
+        self.last_search_results = None
+        self.page_cache.clear()
+
+    def _cancel_searches(self):
+        """إلغاء عمليات البحث الجارية"""
+        for thread in self.search_threads:
+            thread.requestInterruption()
+
     def _do_search(self):
         """تنفيذ البحث"""
+        self.search_timer.stop()
         query = self.search_input.text().strip()
         if not query:
             return
-        
-        # البحث
-        results = self.app_db.search(query)
-        
-        # تحديث العنوان
-        self.search_title.setText(f"نتائج البحث عن: {query} ({len(results)} نتيجة)")
-        
-        # مسح المحتوى السابق
-        while self.search_grid.count():
-            item = self.search_grid.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # عرض النتائج
-        row, col = 0, 0
-        for app in results:
-            card = AppCard(app)
-            card.clicked.connect(self._show_app_detail)
-            card.install_clicked.connect(self._on_install)
-            self.search_grid.addWidget(card, row, col)
-            col += 1
-            if col >= 4:
-                col = 0
-                row += 1
-        
-        self.stack.setCurrentWidget(self.search_page)
-    
+
+        query_key = query.lower()
+        # بحث سابق محفوظ يُعاد عرضه بدون تنفيذ
+        location = Location('search', query_key)
+        state = self.page_cache.get(location)
+        if state is not None:
+            self._show_search_state(location, state)
+            return
+
+        # الاستعلام ذو المرشحات يُنفذ كتقاطع فهارس بدل المطابقة النصية
+        search_query = parse_query(query_key)
+        if not search_query.has_filters():
+            search_query = None
+
+        # تضييق النتائج السابقة إذا كان الاستعلام الجديد يحتوي القديم
+        # (فقط إن كانت مطابقة القاعدة بالسلاسل الجزئية، وليست FTS5)
+        candidates = None
+        if (search_query is None
+                and self.app_db.narrows_search
+                and self.last_search_query and self.last_search_results is not None
+                and self.last_search_query in query_key
+                and not parse_query(self.last_search_query).has_filters()):
+            candidates = self.last_search_results
+
+        self._cancel_searches()
+        self.search_generation += 1
+
+        thread = SearchThread(
+            self.app_db, query_key, self.search_generation, candidates,
+            search_query=search_query, pkg_manager=self.pkg_manager
+        )
+        thread.results_ready.connect(self._on_search_results)
+        thread.finished.connect(lambda t=thread: self._on_search_thread_finished(t))
+        self.search_threads.append(thread)
+        thread.start()
+
+    def _on_search_thread_finished(self, thread: SearchThread):
+        """تحرير خيط البحث بعد انتهائه"""
+        if thread in self.search_threads:
+            self.search_threads.remove(thread)
+        thread.deleteLater()
+
+    def _on_search_results(self, generation: int, query: str, results: list, facets: dict):
+        """عرض نتائج البحث"""
+        # تجاهل نتائج الاستعلامات القديمة
+        if generation != self.search_generation:
+            return
+
+        self.last_search_query = query
+        self.last_search_results = results
+
+        if 'installed' in facets:
+            # قد تكون حالة التثبيت قُرئت للتو من أجل هذا البحث
+            self._update_facet_counts()
+
+        model = AppListModel(self.SEARCH_FILL_BATCH)
+        model.set_installed_ids(self.installed_ids)
+        model.set_apps(results)
+        state = PageState(
+            model,
+            title=f"نتائج البحث عن: {self.search_input.text().strip()} ({len(results)} نتيجة)",
+            subtitle=self._format_facets(facets),
+        )
+        location = Location('search', query)
+        self.page_cache.put(location, state)
+        self._show_search_state(location, state)
+
+    def _show_search_state(self, location: Location, state: PageState):
+        """عرض نتائج بحث محفوظة"""
+        # تضييق البحث أثناء الكتابة يستبدل موقع البحث السابق في السجل
+        self._enter(location, replace=self.history.current.page == 'search')
+        self.stack.setCurrentWidget(self._page('search'))
+        self.search_title.setText(state.title)
+        self.search_facets.setText(state.subtitle)
+        self._show_page_state(self.search_view, state)
+
+    def _restore_search(self, location: Location):
+        """العودة إلى بحث من السجل؛ يُعاد تنفيذه إن خرج من الذاكرة"""
+        self.search_input.blockSignals(True)
+        self.search_input.setText(location.key)
+        self.search_input.blockSignals(False)
+        state = self.page_cache.get(location)
+        if state is not None:
+            self._show_search_state(location, state)
+        else:
+            self._do_search()
+
     def _on_install(self, app_entry: AppEntry):
         """معالجة طلب التثبيت/الإزالة"""
-        # التحقق من عدم وجود عملية جارية
-        if self.install_thread and self.install_thread.isRunning():
-            QMessageBox.warning(self, "تحذير", "هناك عملية جارية، يرجى الانتظار")
-            return
-        
         # تحديد نوع العملية
-        action = 'remove' if self.pkg_manager.is_installed(self._create_pkg_info(app_entry)) else 'install'
+        action = 'remove' if app_entry.id in self.installed_ids else 'install'
         action_text = "إزالة" if action == 'remove' else "تثبيت"
         
         # تأكيد العملية
@@ -1069,47 +1694,83 @@ class MainWindow(QMainWindow):
         if reply != (QMessageBox.StandardButton.Yes if PYQT_VERSION == 6 else QMessageBox.Yes):
             return
         
-        # بدء العملية
-        self.status_label.setText(f"جاري {action_text} {app_entry.name}...")
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # وضع غير محدد
+        self._submit_operation(action, app_entry)
+    
+    def _on_bulk_action(self, view: AppGridView, action: str, apps: List[AppEntry]):
+        """تثبيت/إزالة التطبيقات المحددة بعملية واحدة لكل مدير حزم"""
+        if not apps:
+            return
+        action_text = "إزالة" if action == 'remove' else "تثبيت"
+        
+        names = [app.name for app in apps[:10]]
+        if len(apps) > len(names):
+            names.append(f"و{len(apps) - len(names)} أخرى")
+        reply = QMessageBox.question(
+            self,
+            f"تأكيد {action_text}",
+            f"هل تريد {action_text} {len(apps)} تطبيقات؟\n\n" + '\n'.join(names),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No if PYQT_VERSION == 6 else QMessageBox.Yes | QMessageBox.No
+        )
         
-        self.install_thread = InstallThread(self.pkg_manager, app_entry, action)
-        self.install_thread.finished_signal.connect(self._on_install_finished)
-        self.install_thread.start()
+        if reply != (QMessageBox.StandardButton.Yes if PYQT_VERSION == 6 else QMessageBox.Yes):
+            return
+        
+        self.scheduler.submit_group(action, [(app.id, self._create_pkg_info(app), app.name) for app in apps])
+        view.clearSelection()
+        self.operations_panel.setVisible(True)
+    
+    def _submit_operation(self, action: str, app_entry: AppEntry) -> Operation:
+        """إضافة عملية إلى المجدول؛ العمليات على واجهات مختلفة تعمل معاً"""
+        operation = self.scheduler.submit(action, self._create_pkg_info(app_entry), app_entry.id, app_entry.name)
+        self.operations_panel.setVisible(True)
+        return operation
     
     def _create_pkg_info(self, app_entry: AppEntry) -> PackageInfo:
-        """إنشاء PackageInfo من AppEntry"""
-        return PackageInfo(
-            name=app_entry.id,
-            display_name=app_entry.name,
-            description=app_entry.description,
-            category=app_entry.category,
-            icon=app_entry.icon,
-            package_names={
-                'pacman': app_entry.pacman,
-                'apt': app_entry.apt,
-                'dnf': app_entry.dnf,
-                'zypper': app_entry.zypper,
-            },
-            flatpak_id=app_entry.flatpak,
-            snap_name=app_entry.snap,
-        )
+        """PackageInfo للتطبيق من جدول الاختيار"""
+        return self.resolutions.package_info(app_entry)
     
-    def _on_install_finished(self, success: bool, message: str):
-        """معالجة انتهاء التثبيت"""
-        self.progress_bar.setVisible(False)
-        
-        if success:
-            self.status_label.setText(f"تم بنجاح: {message}")
-            QMessageBox.information(self, "نجاح", f"تمت العملية بنجاح: {message}")
+    def _on_operation_updated(self, operation: Operation):
+        """تحديث صف العملية وعداد العمليات الجارية"""
+        self.operations_panel.update_operation(operation)
+        active = self.scheduler.active_count()
+        self.operations_btn.setText(f"📥 العمليات ({active})" if active else "📥 العمليات")
+    
+    def _on_operation_finished(self, operation: Operation):
+        """تحديث حالة التثبيت بعد انتهاء عملية"""
+        if operation.ran:
+            # حتى الفاشلة والملغاة قد تكون طبقت جزءاً من حزمها
+            # نتائج مرشح installed: المحفوظة لم تعد صحيحة
+            self.last_search_query = None
+            self.last_search_results = None
+            self._refresh_installed()
+        if operation.state == OperationState.DONE:
+            self.status_label.setText(f"تم بنجاح: {operation.title}")
+        elif operation.state == OperationState.FAILED:
+            self.status_label.setText(f"فشل: {operation.title}")
         else:
-            self.status_label.setText(f"فشل: {message}")
-            QMessageBox.critical(self, "خطأ", f"فشلت العملية: {message}")
-        
+            return
         # إعادة تعيين الحالة بعد 3 ثواني
         QTimer.singleShot(3000, lambda: self.status_label.setText("جاهز"))
     
+    def _cancel_operation(self, operation_id: int):
+        """إلغاء عملية، أو إبلاغ المستخدم إن كانت تعمل بصلاحيات الجذر"""
+        operation = self.scheduler.get(operation_id)
+        if operation is None or not operation.active:
+            return
+        if not self.scheduler.cancel(operation_id):
+            self.status_label.setText("تعذر الإلغاء: العملية تعمل بصلاحيات النظام ولا يمكن إيقافها")
+            QTimer.singleShot(3000, lambda: self.status_label.setText("جاهز"))
+    
+    def _retry_operation(self, operation_id: int):
+        """إعادة محاولة عملية ما لم يكن لتطبيقاتها طلب آخر جارٍ"""
+        if not self.scheduler.retry(operation_id):
+            self.status_label.setText("لا يمكن إعادة المحاولة: يوجد طلب جارٍ لنفس التطبيق")
+            QTimer.singleShot(3000, lambda: self.status_label.setText("جاهز"))
+    
+    def _clear_finished_operations(self):
+        for operation in self.scheduler.clear_finished():
+            self.operations_panel.remove_operation(operation.id)
+    
     def _update_system(self):
         """تحديث النظام"""
         reply = QMessageBox.question(
@@ -1138,6 +1799,7 @@ class MainWindow(QMainWindow):
 
 
 def main():
+    started_at = time.perf_counter()
     app = QApplication(sys.argv)
     app.setApplicationName("Linux Store")
     app.setOrganizationName("LinuxStore")
@@ -1148,7 +1810,7 @@ def main():
     font.setPointSize(10)
     app.setFont(font)
     
-    window = MainWindow()
+    window = MainWindow(started_at)
     window.show()
     
     sys.exit(app.exec() if PYQT_VERSION == 6 else app.exec_())
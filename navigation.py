@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Navigation
+سجل التنقل (رجوع/تقدم) وذاكرة حالة الصفحات
+
+كل موقع في الواجهة يُمثل بـ Location (نوع الصفحة ومفتاحها: التصنيف أو نص
+البحث أو معرف التطبيق). حالة صفحات القوائم (النموذج وموضع التمرير) تُحفظ
+بمفتاح الموقع، فالعودة إلى تصنيف أو بحث سابق لا تعيد الاستعلام ولا البناء.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class Location:
+    """موقع في الواجهة"""
+    page: str       # home, category, filter, search, installed, detail
+    key: str = ''
+
+
+HOME = Location('home')
+
+
+@dataclass
+class PageState:
+    """حالة صفحة قائمة محفوظة للعودة إليها"""
+    model: Any
+    title: str = ''
+    subtitle: str = ''
+    scroll: int = 0
+
+
+class NavigationHistory:
+    """سجل رجوع/تقدم بطول محدود"""
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._entries: List[Location] = [HOME]
+        self._index = 0
+
+    @property
+    def current(self) -> Location:
+        return self._entries[self._index]
+
+    def push(self, location: Location):
+        """زيارة موقع جديد تحذف مواقع التقدم"""
+        if location == self.current:
+            return
+        del self._entries[self._index + 1:]
+        self._entries.append(location)
+        if len(self._entries) > self.max_entries:
+            del self._entries[0]
+        self._index = len(self._entries) - 1
+
+    def replace(self, location: Location):
+        """استبدال الموقع الحالي (مثلاً بحث أدق من نفس الصفحة)"""
+        self._entries[self._index] = location
+
+    def can_go_back(self) -> bool:
+        return self._index > 0
+
+    def can_go_forward(self) -> bool:
+        return self._index < len(self._entries) - 1
+
+    def back(self) -> Optional[Location]:
+        if not self.can_go_back():
+            return None
+        self._index -= 1
+        return self.current
+
+    def forward(self) -> Optional[Location]:
+        if not self.can_go_forward():
+            return None
+        self._index += 1
+        return self.current
+
+
+class PageCache:
+    """ذاكرة LRU لحالات صفحات القوائم بمفتاح الموقع"""
+
+    def __init__(self, max_pages: int = 8):
+        self.max_pages = max_pages
+        self._pages: 'OrderedDict[Location, PageState]' = OrderedDict()
+
+    def get(self, location: Location) -> Optional[PageState]:
+        state = self._pages.get(location)
+        if state is not None:
+            self._pages.move_to_end(location)
+        return state
+
+    def put(self, location: Location, state: PageState):
+        self._pages[location] = state
+        self._pages.move_to_end(location)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def states(self) -> Iterator[PageState]:
+        return iter(list(self._pages.values()))
+
+    def clear(self):
+        self._pages.clear()
+
+    def __contains__(self, location: Location) -> bool:
+        return location in self._pages
+
+    def __len__(self) -> int:
+        return len(self._pages)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Operations
+جدولة عمليات التثبيت والإزالة
+
+كل طلب يصبح Operation في طابور واحد، والطلب المجمع يصبح عملية واحدة لكل
+مدير حزم بأمر يحمل كل حزمه. العمليات على واجهات خلفية مستقلة
+(حزم النظام، flatpak، snap) تعمل بالتوازي، أما عمليات نفس الواجهة فتنتظر
+دورها لأنها تتشارك قفل قاعدة الحزم. يمكن إلغاء أي عملية منتظرة، والجارية
+ما لم تعمل بصلاحيات الجذر، وإعادة محاولة الفاشلة والملغاة.
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import re
+import threading
+
+from package_manager import PackageInfo, MANAGER_FIELDS, is_privileged_command
+
+
+# الواجهات التي لا تتشارك قفلاً يمكن أن تعمل معاً
+PARALLEL_BACKENDS = {'flatpak', 'snap'}
+
+# نسبة التقدم كما تطبعها معظم مديري الحزم
+PERCENT_RE = re.compile(r'(\d{1,3})\s?%')
+
+# عدد أسطر الناتج المحفوظة لكل عملية
+OUTPUT_TAIL = 20
+
+
+def backend_of(manager: str) -> str:
+    """مجموعة القفل لمدير حزم: مديرو النظام يتشاركون قاعدة حزم واحدة"""
+    field_name = MANAGER_FIELDS.get(manager, manager)
+    return field_name if field_name in PARALLEL_BACKENDS else 'system'
+
+
+class OperationState(Enum):
+    """حالة العملية"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+ACTIVE_STATES = {OperationState.QUEUED, OperationState.RUNNING}
+
+
+def group_title(titles: List[str]) -> str:
+    """عنوان عملية مجمعة من أسماء تطبيقاتها"""
+    if len(titles) <= 3:
+        return '، '.join(titles)
+    return f"{titles[0]}، {titles[1]} و{len(titles) - 2} أخرى"
+
+
+@dataclass
+class Operation:
+    """عملية تثبيت أو إزالة بأمر واحد، لتطبيق واحد أو مجموعة على نفس المدير"""
+    id: int
+    action: str                     # install أو remove
+    keys: List[str]                 # معرفات التطبيقات
+    title: str
+    packages: List[PackageInfo]
+    manager: str = ''
+    command: Optional[str] = None
+    state: OperationState = OperationState.QUEUED
+    percent: int = -1               # -1 تعني تقدماً غير محدد
+    last_line: str = ''
+    message: str = ''
+    output: List[str] = field(default_factory=list)
+    ran: bool = False               # بدأ أمرها فعلاً (قد تكون غيّرت الحزم حتى لو فشلت)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def backend(self) -> str:
+        return backend_of(self.manager)
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    @property
+    def cancellable(self) -> bool:
+        """المنتظرة تُلغى دائماً، والجارية فقط إن لم تعمل بصلاحيات الجذر"""
+        if self.state == OperationState.QUEUED:
+            return True
+        return self.state == OperationState.RUNNING and not is_privileged_command(self.command or '')
+
+
+class OperationScheduler:
+    """طابور عمليات يشغّل واجهة خلفية واحدة لكل قفل في نفس الوقت"""
+
+    def __init__(self, pkg_manager, max_parallel: int = 3):
+        self.pkg_manager = pkg_manager
+        self.max_parallel = max_parallel
+        self.operations: List[Operation] = []
+        self._next_id = 1
+        self._busy: Set[str] = set()
+        self._lock = threading.RLock()
+        self.callbacks = {
+            # on_update(operation) من أي خيط، بعد كل تغيير في حالة العملية أو تقدمها
+            'on_update': None,
+            # on_finished(operation) عند انتهاء العملية بأي حالة
+            'on_finished': None,
+        }
+
+    def set_callback(self, event: str, callback: Callable):
+        """تعيين callback لحدث معين"""
+        if event in self.callbacks:
+            self.callbacks[event] = callback
+
+    def _notify(self, event: str, *args, **kwargs):
+        """إرسال إشعار"""
+        if self.callbacks.get(event):
+            self.callbacks[event](*args, **kwargs)
+
+    # --- واجهة الطابور ---
+
+    def submit(self, action: str, package_info: PackageInfo, key: str, title: str = '') -> Operation:
+        """إضافة عملية؛ يُعاد الطلب الجاري نفسه إن وُجد لنفس التطبيق"""
+        existing = self.active_for(key)
+        if existing is not None:
+            return existing
+        return self.submit_group(action, [(key, package_info, title)])[0]
+
+    def submit_group(self, action: str, items: List[Tuple[str, PackageInfo, str]]) -> List[Operation]:
+        """إضافة عدة تطبيقات (المعرف، الحزمة، الاسم) كعملية واحدة لكل مدير حزم
+
+        التطبيقات التي لها عملية جارية تُتجاوز.
+        """
+        seen = set()
+        unique = []
+        for item in items:
+            if item[0] not in seen and self.active_for(item[0]) is None:
+                seen.add(item[0])
+                unique.append(item)
+        items = unique
+        if not items:
+            return []
+        batches = self.pkg_manager.prepare_batch(action, [package_info for _, package_info, _ in items])
+
+        operations = []
+        with self._lock:
+            for manager, command, indexes in batches:
+                group = [items[index] for index in indexes]
+                operation = Operation(
+                    self._next_id, action,
+                    keys=[key for key, _, _ in group],
+                    title=group_title([title or key for key, _, title in group]),
+                    packages=[package_info for _, package_info, _ in group],
+                    manager=manager or '',
+                    command=command,
+                )
+                self._next_id += 1
+                if not command:
+                    operation.state = OperationState.FAILED
+                    operation.message = "لم يتم العثور على اسم الحزمة"
+                self.operations.append(operation)
+                operations.append(operation)
+
+        for operation in operations:
+            self._notify('on_update', operation)
+        self._dispatch()
+        return operations
+
+    def active_for(self, key: str) -> Optional[Operation]:
+        """العملية المنتظرة أو الجارية لتطبيق إن وُجدت"""
+        with self._lock:
+            for operation in self.operations:
+                if operation.active and key in operation.keys:
+                    return operation
+        return None
+
+    def cancel(self, operation_id: int) -> bool:
+        """إلغاء عملية منتظرة فوراً، أو إنهاء أمر عملية جارية
+
+        العملية الجارية بصلاحيات الجذر لا تصلها إشارة الإنهاء، فتُرفض
+        بدل ادعاء إلغاء لم يحدث. تعيد False إن لم يمكن الإلغاء.
+        """
+        operation = self.get(operation_id)
+        if operation is None:
+            return False
+        with self._lock:
+            if not operation.cancellable:
+                return False
+            queued = operation.state == OperationState.QUEUED
+            if queued:
+                operation.state = OperationState.CANCELLED
+                operation.message = "أُلغيت"
+        operation.cancel_event.set()
+        if queued:
+            self._notify('on_update', operation)
+            self._notify('on_finished', operation)
+        return True
+
+    def retry(self, operation_id: int) -> bool:
+        """إعادة عملية فاشلة أو ملغاة إلى الطابور
+
+        تُرفض إذا كان لأحد تطبيقاتها عملية أخرى منتظرة أو جارية.
+        """
+        operation = self.get(operation_id)
+        if operation is None or operation.active or operation.state == OperationState.DONE:
+            return False
+        if any(self.active_for(key) is not None for key in operation.keys):
+            return False
+        if not operation.command:
+            # لم يُبنَ أمر من قبل: إعادة الاختيار قد تنجح بعد تحديث الكتالوج
+            batches = self.pkg_manager.prepare_batch(operation.action, operation.packages)
+            if len(batches) != 1 or not batches[0][1]:
+                return False
+            operation.manager, operation.command = batches[0][0] or '', batches[0][1]
+        with self._lock:
+            if any(op.active and op is not operation and set(op.keys) & set(operation.keys)
+                   for op in self.operations):
+                return False
+            operation.state = OperationState.QUEUED
+            operation.percent = -1
+            operation.last_line = ''
+            operation.message = ''
+            operation.output = []
+            operation.ran = False
+            operation.cancel_event = threading.Event()
+        self._notify('on_update', operation)
+        self._dispatch()
+        return True
+
+    def clear_finished(self) -> List[Operation]:
+        """حذف العمليات المنتهية من القائمة"""
+        with self._lock:
+            removed = [op for op in self.operations if not op.active]
+            self.operations = [op for op in self.operations if op.active]
+        return removed
+
+    def get(self, operation_id: int) -> Optional[Operation]:
+        with self._lock:
+            for operation in self.operations:
+                if operation.id == operation_id:
+                    return operation
+        return None
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for op in self.operations if op.active)
+
+    def counts(self) -> Dict[OperationState, int]:
+        with self._lock:
+            counts = {state: 0 for state in OperationState}
+            for operation in self.operations:
+                counts[operation.state] += 1
+            return counts
+
+    # --- التنفيذ ---
+
+    def _dispatch(self):
+        """تشغيل أول عملية منتظرة لكل واجهة خلفية غير مشغولة"""
+        started = []
+        with self._lock:
+            running = sum(1 for op in self.operations if op.state == OperationState.RUNNING)
+            for operation in self.operations:
+                if running >= self.max_parallel:
+                    break
+                if operation.state != OperationState.QUEUED or operation.backend in self._busy:
+                    continue
+                operation.state = OperationState.RUNNING
+                operation.ran = True
+                self._busy.add(operation.backend)
+                running += 1
+                started.append(operation)
+
+        for operation in started:
+            self._notify('on_update', operation)
+            threading.Thread(target=self._run, args=(operation,), daemon=True).start()
+
+    def _run(self, operation: Operation):
+        def on_line(line: str):
+            if not line:
+                return
+            operation.last_line = line
+            operation.output.append(line)
+            del operation.output[:-OUTPUT_TAIL]
+            match = PERCENT_RE.search(line)
+            if match:
+                operation.percent = min(int(match.group(1)), 100)
+            self._notify('on_update', operation)
+
+        try:
+            returncode, _ = self.pkg_manager.run_command(operation.command, on_line, operation.cancel_event)
+            error = None
+        except Exception as e:
+            returncode, error = -1, str(e)
+
+        with self._lock:
+            if returncode == 0:
+                # أمر انتهى بنجاح قبل وصول الإلغاء يبقى ناجحاً
+                operation.state = OperationState.DONE
+                operation.percent = 100
+                operation.message = "تمت بنجاح"
+            elif operation.cancel_event.is_set():
+                operation.state = OperationState.CANCELLED
+                operation.message = "أُلغيت"
+            else:
+                operation.state = OperationState.FAILED
+                operation.message = error or '\n'.join(operation.output[-5:]) or "Unknown error"
+            self._busy.discard(operation.backend)
+
+        # عملية فاشلة أو ملغاة قد تكون طبقت جزءاً من حزمها
+        self.pkg_manager.invalidate_installed()
+        self._notify('on_update', operation)
+        self._notify('on_finished', operation)
+        self._dispatch()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Operations Panel
+لوحة عمليات التثبيت والإزالة: صف لكل عملية بحالتها وتقدمها مع الإلغاء
+وإعادة المحاولة. التحديثات تصل من خيوط OperationScheduler عبر إشارات Qt.
+"""
+
+from typing import Dict
+
+# محاولة استخدام PyQt6 أو PyQt5
+try:
+    from PyQt6.QtWidgets import (
+        QWidget, QFrame, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+        QProgressBar, QScrollArea
+    )
+    from PyQt6.QtCore import Qt, QObject, pyqtSignal
+    PYQT_VERSION = 6
+except ImportError:
+    from PyQt5.QtWidgets import (
+        QWidget, QFrame, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+        QProgressBar, QScrollArea
+    )
+    from PyQt5.QtCore import Qt, QObject, pyqtSignal
+    PYQT_VERSION = 5
+
+from operations import Operation, OperationState
+
+
+STATE_TEXT = {
+    OperationState.QUEUED: "في الانتظار",
+    OperationState.RUNNING: "جارٍ التنفيذ",
+    OperationState.DONE: "تمت",
+    OperationState.FAILED: "فشلت",
+    OperationState.CANCELLED: "أُلغيت",
+}
+
+ACTION_TEXT = {'install': "تثبيت", 'remove': "إزالة"}
+
+
+class SchedulerBridge(QObject):
+    """نقل callbacks المجدول من خيوطه إلى خيط الواجهة"""
+
+    updated = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def attach(self, scheduler):
+        scheduler.set_callback('on_update', self.updated.emit)
+        scheduler.set_callback('on_finished', self.finished.emit)
+
+
+class OperationRow(QFrame):
+    """صف عملية واحدة"""
+
+    cancel_clicked = pyqtSignal(int)
+    retry_clicked = pyqtSignal(int)
+
+    def __init__(self, operation: Operation, parent=None):
+        super().__init__(parent)
+        self.operation_id = operation.id
+        self.setObjectName("operationRow")
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(10, 6, 10, 6)
+        layout.setSpacing(10)
+
+        text_layout = QVBoxLayout()
+        text_layout.setSpacing(2)
+        self.title_label = QLabel()
+        self.title_label.setObjectName("operationTitle")
+        text_layout.addWidget(self.title_label)
+        self.detail_label = QLabel()
+        self.detail_label.setObjectName("operationDetail")
+        text_layout.addWidget(self.detail_label)
+        layout.addLayout(text_layout, 1)
+
+        self.progress = QProgressBar()
+        self.progress.setObjectName("operationProgress")
+        self.progress.setFixedWidth(160)
+        self.progress.setTextVisible(False)
+        layout.addWidget(self.progress)
+
+        self.cancel_btn = QPushButton("إلغاء")
+        self.cancel_btn.setObjectName("operationCancelBtn")
+        self.cancel_btn.clicked.connect(lambda: self.cancel_clicked.emit(self.operation_id))
+        layout.addWidget(self.cancel_btn)
+
+        self.retry_btn = QPushButton("إعادة المحاولة")
+        self.retry_btn.setObjectName("operationRetryBtn")
+        self.retry_btn.clicked.connect(lambda: self.retry_clicked.emit(self.operation_id))
+        layout.addWidget(self.retry_btn)
+
+        self.update_from(operation)
+
+    def update_from(self, operation: Operation):
+        """عرض حالة العملية الحالية"""
+        self.title_label.setText(f"{ACTION_TEXT.get(operation.action, operation.action)} {operation.title}")
+        state_text = STATE_TEXT[operation.state]
+        if operation.manager:
+            state_text += f" · {operation.manager}"
+        detail = operation.last_line if operation.state == OperationState.RUNNING else operation.message
+        self.detail_label.setText(f"{state_text}  {detail}".strip())
+        self.detail_label.setToolTip('\n'.join(operation.output))
+
+        running = operation.state == OperationState.RUNNING
+        self.progress.setVisible(operation.active)
+        if running and operation.percent < 0:
+            self.progress.setRange(0, 0)
+        else:
+            self.progress.setRange(0, 100)
+            self.progress.setValue(max(operation.percent, 0))
+
+        self.cancel_btn.setVisible(operation.cancellable)
+        self.retry_btn.setVisible(operation.state in (OperationState.FAILED, OperationState.CANCELLED))
+        if self.property("state") != operation.state.value:
+            # لون الصف من قواعد [state="..."] في الأنماط العامة
+            self.setProperty("state", operation.state.value)
+            self.style().unpolish(self)
+            self.style().polish(self)
+
+
+class OperationsPanel(QFrame):
+    """قائمة العمليات الجارية والمنتهية"""
+
+    cancel_requested = pyqtSignal(int)
+    retry_requested = pyqtSignal(int)
+    clear_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("operationsPanel")
+        self._rows: Dict[int, OperationRow] = {}
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 10, 20, 10)
+        layout.setSpacing(6)
+
+        header = QHBoxLayout()
+        title = QLabel("📥 العمليات")
+        title.setObjectName("operationsTitle")
+        header.addWidget(title)
+        header.addStretch()
+        clear_btn = QPushButton("مسح المنتهية")
+        clear_btn.setObjectName("operationClearBtn")
+        clear_btn.clicked.connect(self.clear_requested.emit)
+        header.addWidget(clear_btn)
+        layout.addLayout(header)
+
+        scroll = QScrollArea()
+        scroll.setObjectName("operationsScroll")
+        scroll.setWidgetResizable(True)
+        scroll.setFrameShape(QFrame.Shape.NoFrame if PYQT_VERSION == 6 else QFrame.NoFrame)
+        container = QWidget()
+        self.rows_layout = QVBoxLayout(container)
+        self.rows_layout.setContentsMargins(0, 0, 0, 0)
+        self.rows_layout.setSpacing(4)
+        self.rows_layout.addStretch()
+        scroll.setWidget(container)
+        layout.addWidget(scroll)
+
+        self.setFixedHeight(200)
+
+    def update_operation(self, operation: Operation):
+        """إضافة صف العملية أو تحديثه"""
+        row = self._rows.get(operation.id)
+        if row is None:
+            row = OperationRow(operation)
+            row.cancel_clicked.connect(self.cancel_requested)
+            row.retry_clicked.connect(self.retry_requested)
+            self._rows[operation.id] = row
+            self.rows_layout.insertWidget(self.rows_layout.count() - 1, row)
+        else:
+            row.update_from(operation)
+
+    def remove_operation(self, operation_id: int):
+        row = self._rows.pop(operation_id, None)
+        if row is not None:
+            row.deleteLater()
@@ -4,13 +4,79 @@ Linux Store - Package Manager
 مدير الحزم للتثبيت والإزالة والبحث
 """
 
+import os
+import re
+import shutil
+import signal
 import subprocess
 import threading
 import queue
-from typing import Callable, Optional, List, Dict
+from typing import Callable, Optional, List, Dict, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+# حقل اسم الحزمة في الكتالوج الذي يستخدمه كل مدير حزم
+MANAGER_FIELDS = {
+    'pacman': 'pacman',
+    'yay': 'pacman',
+    'paru': 'pacman',
+    'apt': 'apt',
+    'apt-get': 'apt',
+    'nala': 'apt',
+    'dnf': 'dnf',
+    'yum': 'dnf',
+    'zypper': 'zypper',
+    'flatpak': 'flatpak',
+    'snap': 'snap',
+}
+
+# sudo في بداية كل أمر من سلسلة أوامر (cmd1 && cmd2)
+SUDO_RE = re.compile(r'(^|[;&|]\s*)sudo\s+')
+PKEXEC_RE = re.compile(r'(^|[;&|]\s*)pkexec\s+')
+# مساعدات AUR تستدعي sudo بنفسها ولا تقبل العمل كجذر (makepkg يرفض)
+AUR_HELPER_RE = re.compile(r'(^|[;&|]\s*)(yay|paru)\s+')
+
+
+def is_privileged_command(cmd: str) -> bool:
+    """هل يعمل جزء من الأمر كجذر (sudo أو pkexec أو مساعد AUR)
+    
+    إشارات المستخدم لا تصل لهذه العمليات، فلا يمكن إلغاؤها أثناء عملها.
+    """
+    return bool(SUDO_RE.search(cmd) or PKEXEC_RE.search(cmd) or AUR_HELPER_RE.search(cmd))
+
+
+def gui_privileged_command(cmd: str) -> Optional[str]:
+    """الأمر برفع صلاحيات لا يحتاج طرفية، أو None إن لم يُعد كتابته
+    
+    sudo يصبح sudo -A إن ضُبط SUDO_ASKPASS، وإلا pkexec (نافذة polkit).
+    مساعدات AUR تحتاج SUDO_ASKPASS لتمرير -A إلى sudo الذي تستدعيه.
+    """
+    askpass = bool(os.environ.get('SUDO_ASKPASS'))
+    rewritten = cmd
+    if AUR_HELPER_RE.search(rewritten):
+        if not askpass:
+            return None
+        rewritten = AUR_HELPER_RE.sub(r'\1\2 --sudoflags -A ', rewritten)
+    if SUDO_RE.search(rewritten):
+        if askpass:
+            rewritten = SUDO_RE.sub(r'\1sudo -A ', rewritten)
+        elif shutil.which('pkexec'):
+            rewritten = SUDO_RE.sub(r'\1pkexec ', rewritten)
+        else:
+            return None
+    return rewritten if rewritten != cmd else None
+
+
+# أوامر سرد الحزم المثبتة دفعة واحدة لكل حقل
+LIST_INSTALLED_COMMANDS = {
+    'pacman': 'pacman -Qq 2>/dev/null',
+    'apt': "dpkg-query -W -f='${Status} ${Package}\\n' 2>/dev/null",
+    'dnf': "rpm -qa --qf '%{NAME}\\n' 2>/dev/null",
+    'zypper': "rpm -qa --qf '%{NAME}\\n' 2>/dev/null",
+    'flatpak': 'flatpak list --columns=application 2>/dev/null',
+    'snap': 'snap list 2>/dev/null',
+}
+
 class PackageStatus(Enum):
     """حالة الحزمة"""
     NOT_INSTALLED = "not_installed"
@@ -51,6 +117,11 @@ class PackageManager:
         }
         self._worker_thread = None
         self._running = False
+        # الحزم المثبتة لكل حقل، تُقرأ عند أول طلب وتُلغى بعد كل عملية
+        self._installed: Optional[Dict[str, Set[str]]] = None
+        self._installed_lock = threading.Lock()
+        # جدول الاختيار المحسوب مسبقاً (ResolutionTable) إن وُجد
+        self.resolutions = None
     
     def set_callback(self, event: str, callback: Callable):
         """تعيين callback لحدث معين"""
@@ -65,38 +136,87 @@ class PackageManager:
     def install_package(self, package_info: PackageInfo, 
                        preferred_manager: str = None) -> bool:
         """تثبيت حزمة"""
-        manager = preferred_manager or self._get_best_manager(package_info)
-        package_name = self._get_package_name(package_info, manager)
-        
-        if not package_name:
-            self._notify('on_error', package_info, "لم يتم العثور على اسم الحزمة")
-            return False
-        
-        cmd = self.detector.get_install_command(package_name, manager)
-        return self._execute_operation(
-            'install', 
-            package_info, 
-            cmd, 
-            manager
-        )
+        return self._run_action('install', package_info, preferred_manager)
     
     def remove_package(self, package_info: PackageInfo,
                       preferred_manager: str = None) -> bool:
         """إزالة حزمة"""
+        return self._run_action('remove', package_info, preferred_manager)
+    
+    def install_packages(self, package_infos: List[PackageInfo]) -> bool:
+        """تثبيت عدة حزم بأمر واحد لكل مدير"""
+        return self._run_batch('install', package_infos)
+    
+    def remove_packages(self, package_infos: List[PackageInfo]) -> bool:
+        """إزالة عدة حزم بأمر واحد لكل مدير"""
+        return self._run_batch('remove', package_infos)
+    
+    def _run_batch(self, action: str, package_infos: List[PackageInfo]) -> bool:
+        success = True
+        for manager, cmd, indexes in self.prepare_batch(action, package_infos):
+            if not cmd:
+                self._notify('on_error', package_infos[indexes[0]], "لم يتم العثور على اسم الحزمة")
+                success = False
+                continue
+            # الإشعارات تحمل أول حزمة في المجموعة
+            success = self._execute_operation(action, package_infos[indexes[0]], cmd, manager) and success
+        return success
+    
+    def operation_target(self, action: str, package_info: PackageInfo,
+                         preferred_manager: str = None) -> Tuple[str, Optional[str]]:
+        """(المدير، ما يُمرر لأمره) لعملية تثبيت أو إزالة؛ None إن لم يوجد اسم حزمة"""
         manager = preferred_manager or self._get_best_manager(package_info)
         package_name = self._get_package_name(package_info, manager)
+        if package_name and action == 'install' and self.resolutions is not None:
+            package_name = self.resolutions.install_target(manager, package_name)
+        return manager, package_name or None
+    
+    def _operation_command(self, action: str, target: str, manager: str) -> str:
+        if action == 'install':
+            return self.detector.get_install_command(target, manager)
+        return self.detector.get_remove_command(target, manager)
+    
+    def prepare_operation(self, action: str, package_info: PackageInfo,
+                          preferred_manager: str = None) -> Tuple[str, Optional[str]]:
+        """(المدير، الأمر) لعملية تثبيت أو إزالة؛ الأمر None إن لم يوجد اسم حزمة"""
+        manager, target = self.operation_target(action, package_info, preferred_manager)
+        if not target:
+            return manager, None
+        return manager, self._operation_command(action, target, manager)
+    
+    def prepare_batch(self, action: str,
+                      package_infos: List[PackageInfo]) -> List[Tuple[str, Optional[str], List[int]]]:
+        """أوامر مجمعة: أمر واحد لكل مدير بدلاً من أمر لكل حزمة
         
-        if not package_name:
+        يُعاد (المدير، الأمر، مواضع الحزم في القائمة) لكل مجموعة. أهداف flatpak
+        من نوع "remote ref" تُجمع لكل مستودع، والحزم بلا اسم تُعاد منفردة بأمر None.
+        """
+        groups: Dict[Tuple[str, str], Tuple[List[str], List[int]]] = {}
+        batches = []
+        for index, package_info in enumerate(package_infos):
+            manager, target = self.operation_target(action, package_info)
+            if not target:
+                batches.append((manager, None, [index]))
+                continue
+            remote = ''
+            if manager == 'flatpak' and ' ' in target:
+                remote, target = target.split(' ', 1)
+            targets, indexes = groups.setdefault((manager, remote), ([], []))
+            targets.append(target)
+            indexes.append(index)
+        
+        for (manager, remote), (targets, indexes) in groups.items():
+            target = ' '.join(([remote] if remote else []) + targets)
+            batches.append((manager, self._operation_command(action, target, manager), indexes))
+        return batches
+    
+    def _run_action(self, action: str, package_info: PackageInfo,
+                    preferred_manager: str = None) -> bool:
+        manager, cmd = self.prepare_operation(action, package_info, preferred_manager)
+        if not cmd:
             self._notify('on_error', package_info, "لم يتم العثور على اسم الحزمة")
             return False
-        
-        cmd = self.detector.get_remove_command(package_name, manager)
-        return self._execute_operation(
-            'remove', 
-            package_info, 
-            cmd, 
-            manager
-        )
+        return self._execute_operation(action, package_info, cmd, manager)
     
     def search_packages(self, query: str, 
                        manager: str = None) -> List[Dict]:
@@ -130,8 +250,26 @@ class PackageManager:
             manager
         )
     
+    def set_resolution_table(self, table):
+        """استخدام جدول اختيار محسوب مسبقاً بدلاً من الاختيار مع كل عملية"""
+        self.resolutions = table
+    
+    def _resolve(self, package_info: PackageInfo):
+        """صف التطبيق في جدول الاختيار (name هو معرف التطبيق)"""
+        if self.resolutions is None or package_info is None:
+            return None
+        return self.resolutions.resolve(package_info.name)
+    
     def is_installed(self, package_info: PackageInfo) -> bool:
         """التحقق من تثبيت حزمة"""
+        resolution = self._resolve(package_info)
+        if resolution is not None:
+            # الخيارات المحسوبة مسبقاً فقط، بدون المرور على كل المديرين
+            return any(
+                self._check_installed(package_name, manager)
+                for manager, package_name in resolution.candidates()
+            )
+        
         # التحقق من جميع مديري الحزم المتاحين
         for manager in self.detector.available_managers:
             package_name = self._get_package_name(package_info, manager)
@@ -140,6 +278,57 @@ class PackageManager:
                     return True
         return False
     
+    def get_installed_packages(self, refresh: bool = False) -> Dict[str, Set[str]]:
+        """أسماء الحزم المثبتة لكل حقل من حقول الكتالوج
+        
+        يُنفذ أمر واحد لكل مدير متاح بدلاً من أمر لكل حزمة، وتُعاد
+        نفس النتيجة المحفوظة حتى تنجح عملية تثبيت أو إزالة.
+        """
+        with self._installed_lock:
+            if self._installed is not None and not refresh:
+                return self._installed
+            
+            fields = []
+            for manager in self.detector.available_managers:
+                field_name = MANAGER_FIELDS.get(manager)
+                if field_name and field_name not in fields:
+                    fields.append(field_name)
+            
+            self._installed = {
+                field_name: self._list_installed(field_name) for field_name in fields
+            }
+            return self._installed
+    
+    def _list_installed(self, field_name: str) -> Set[str]:
+        """تشغيل أمر سرد الحزم المثبتة وتحليل ناتجه"""
+        try:
+            result = subprocess.run(
+                LIST_INSTALLED_COMMANDS[field_name],
+                shell=True,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return set()
+        
+        names = set()
+        lines = result.stdout.splitlines()
+        if field_name == 'snap':
+            # السطر الأول عناوين الأعمدة
+            lines = lines[1:]
+        for line in lines:
+            parts = line.split()
+            if not parts:
+                continue
+            if field_name == 'apt':
+                # "install ok installed name"
+                if len(parts) == 4 and parts[2] == 'installed':
+                    names.add(parts[3].split(':')[0])
+            else:
+                names.add(parts[0])
+        return names
+    
     def _check_installed(self, package_name: str, manager: str) -> bool:
         """التحقق من تثبيت حزمة بمدير معين"""
         check_commands = {
@@ -174,6 +363,10 @@ class PackageManager:
     
     def _get_best_manager(self, package_info: PackageInfo) -> str:
         """الحصول على أفضل مدير حزم للتطبيق"""
+        resolution = self._resolve(package_info)
+        if resolution is not None:
+            return resolution.manager
+        
         # الأولوية: مدير النظام > flatpak > snap
         for manager in self.detector.available_managers:
             if manager in package_info.package_names:
@@ -188,6 +381,12 @@ class PackageManager:
     def _get_package_name(self, package_info: PackageInfo, 
                          manager: str) -> Optional[str]:
         """الحصول على اسم الحزمة لمدير معين"""
+        resolution = self._resolve(package_info)
+        if resolution is not None:
+            package_name = resolution.package_for(manager)
+            if package_name:
+                return package_name
+        
         # التحقق من الاسم المحدد للمدير
         if manager in package_info.package_names:
             return package_info.package_names[manager]
@@ -203,29 +402,71 @@ class PackageManager:
         # استخدام الاسم الافتراضي
         return package_info.name
     
+    def invalidate_installed(self):
+        """حالة التثبيت المحفوظة لم تعد صحيحة بعد تثبيت أو إزالة"""
+        self._installed = None
+    
+    def run_command(self, cmd: str, on_line: Optional[Callable[[str], None]] = None,
+                    cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+        """تشغيل أمر وقراءة ناتجه سطراً بسطر
+        
+        يُعاد (رمز الخروج، الأسطر). ضبط cancel_event ينهي الأمر.
+        مع cancel_event يُفصل الأمر عن الطرفية (ليشمل الإلغاء مجموعة عملياته)
+        فقط إذا أُعيدت كتابة رفع صلاحياته بـ pkexec أو sudo -A؛ غير ذلك يبقى
+        على الطرفية ليسأل sudo (أو yay/paru) عن كلمة المرور كما كان.
+        """
+        detach = False
+        if cancel_event is not None:
+            rewritten = gui_privileged_command(cmd)
+            if rewritten is not None:
+                cmd, detach = rewritten, True
+        
+        process = subprocess.Popen(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            # مجموعة عمليات مستقلة ليشمل الإلغاء الأوامر الفرعية
+            start_new_session=detach
+        )
+        
+        if cancel_event is not None:
+            def watch():
+                while process.poll() is None:
+                    if cancel_event.wait(0.2):
+                        try:
+                            if detach:
+                                os.killpg(process.pid, signal.SIGTERM)
+                            else:
+                                process.terminate()
+                        except OSError:
+                            pass
+                        return
+            threading.Thread(target=watch, daemon=True).start()
+        
+        output_lines = []
+        for line in iter(process.stdout.readline, ''):
+            output_lines.append(line)
+            if on_line:
+                on_line(line.strip())
+        
+        process.wait()
+        return process.returncode, output_lines
+    
     def _execute_operation(self, operation: str, package_info: PackageInfo,
                           cmd: str, manager: str) -> bool:
         """تنفيذ عملية"""
         self._notify('on_start', operation, package_info, manager)
         
         try:
-            process = subprocess.Popen(
-                cmd,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
+            returncode, output_lines = self.run_command(
+                cmd, lambda line: self._notify('on_progress', operation, package_info, line)
             )
             
-            output_lines = []
-            for line in iter(process.stdout.readline, ''):
-                output_lines.append(line)
-                self._notify('on_progress', operation, package_info, line.strip())
-            
-            process.wait()
-            
-            if process.returncode == 0:
+            if returncode == 0:
+                self.invalidate_installed()
                 self._notify('on_complete', operation, package_info, True)
                 return True
             else:
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Package Mapping
+بناء جدول أسماء الحزم عبر التوزيعات من بيانات المستودعات المحلية
+
+لكل توزيعة يُقرأ ملف بيانات المستودع ويُطابق كل تطبيق في الكتالوج
+ليس له اسم حزمة في حقلها، بالترتيب:
+    desktop  ملف .desktop في الحزمة يطابق معرف التطبيق
+    name     اسم حزمة معروف في توزيعة أخرى موجود كما هو
+    url      رابط المشروع يطابق موقع التطبيق؛ الرابط المشترك بين عدة حزم
+             (gnome.org، github.com/<org>) يُقبل فقط إن شابه اسمُ الحزمة
+             اسمَ التطبيق
+    similar  تشابه الاسم بعد التطبيع
+
+الصيغ المدعومة:
+    pacman   قاعدة sync (*.db أو *.files، أرشيف tar)
+    apt      ملف Packages (مع ضغط اختياري)
+    dnf/zypper  ملف primary.xml من repodata (مع ضغط اختياري)
+
+الاستخدام:
+    python3 package_mapping.py [حقل=مسار ...] [-o ملف الناتج]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import glob
+import json
+import os
+import re
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+
+from app_database import AppEntry, PACKAGE_FIELDS, _DATACLASS_SLOTS
+from catalog_io import COMPRESSORS, detect_compression, open_catalog
+
+
+MAP_FORMAT = 'linux-store-package-map'
+MAP_VERSION = 1
+
+# الموقع الافتراضي للجدول الذي تحمله الواجهة عند البدء
+PACKAGE_MAP_FILE = os.path.expanduser('~/.local/share/linux-store/package-map.json')
+
+# الحقول التي تُبنى من بيانات المستودعات (flatpak وsnap لها مصادرها)
+REPO_FIELDS = ('pacman', 'apt', 'dnf', 'zypper')
+
+# أقل نسبة تشابه مقبولة في المطابقة بالاسم
+SIMILARITY_THRESHOLD = 0.9
+
+# عدد الثلاثيات الأندر في الاسم التي تُجمع منها الأسماء المرشحة للتشابه
+RARE_TRIGRAMS = 3
+
+# مواقع بيانات المستودعات على الأنظمة المختلفة
+DEFAULT_SOURCES = {
+    'pacman': ['/var/lib/pacman/sync/*.db'],
+    'apt': ['/var/lib/apt/lists/*_Packages', '/var/lib/apt/lists/*_Packages.*'],
+    'dnf': ['/var/cache/dnf/*/repodata/*primary.xml*',
+            '/var/cache/libdnf5/*/repodata/*primary.xml*'],
+    'zypper': ['/var/cache/zypp/raw/*/repodata/*primary.xml*'],
+}
+
+_RPM_NS = '{http://linux.duke.edu/metadata/common}'
+_DESKTOP_DIR = 'usr/share/applications/'
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class RepoPackage:
+    """حزمة من بيانات مستودع"""
+    name: str
+    url: str = ""
+    desktop_ids: Tuple[str, ...] = ()
+
+
+@dataclass
+class AppSignals:
+    """ما يُطابق به التطبيق، بدون نقل AppEntry كاملاً للعمليات الفرعية"""
+    id: str
+    name: str
+    website: str
+    names: Dict[str, str] = field(default_factory=dict)
+    desktop_ids: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_app(cls, app: AppEntry) -> 'AppSignals':
+        names = {name: getattr(app, name) for name in PACKAGE_FIELDS if getattr(app, name)}
+        desktop_ids = [app.id]
+        if app.flatpak:
+            desktop_ids.append(app.flatpak)
+        desktop_ids.extend(names.get(name, '') for name in REPO_FIELDS)
+        return cls(
+            id=app.id,
+            name=app.name,
+            website=app.website,
+            names=names,
+            desktop_ids=tuple(dict.fromkeys(d.lower() for d in desktop_ids if d)),
+        )
+
+
+def normalize_url(url: str) -> str:
+    """توحيد الرابط للمقارنة (بدون البروتوكول وwww والشرطة الأخيرة)"""
+    url = url.strip().lower()
+    url = re.sub(r'^[a-z+]+://', '', url)
+    if url.startswith('www.'):
+        url = url[4:]
+    return url.rstrip('/')
+
+
+def normalize_name(name: str) -> str:
+    """توحيد اسم الحزمة للمقارنة بالتشابه"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def trigrams(name: str) -> List[str]:
+    """الثلاثيات الحرفية لاسم مطبع (مع حدود البداية والنهاية)"""
+    padded = f"^{name}$"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def _open_binary(path: str):
+    """فتح ملف ثنائي مع فك الضغط حسب الامتداد"""
+    compression = detect_compression(path)
+    if compression:
+        return COMPRESSORS[compression].open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _desktop_id(path: str) -> Optional[str]:
+    """معرف ملف .desktop من مساره داخل الحزمة"""
+    path = path.lstrip('/')
+    if path.startswith(_DESKTOP_DIR) and path.endswith('.desktop'):
+        return os.path.basename(path)[:-len('.desktop')].lower()
+    return None
+
+
+def parse_pacman_db(path: str) -> Iterator[RepoPackage]:
+    """قراءة قاعدة sync لـ pacman (ملفات desc وfiles داخل الأرشيف)"""
+    packages: Dict[str, Dict[str, List[str]]] = {}
+    with tarfile.open(path, 'r:*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            directory, _, filename = member.name.rpartition('/')
+            if filename not in ('desc', 'files'):
+                continue
+            data = archive.extractfile(member).read().decode('utf-8', 'replace')
+            sections = packages.setdefault(directory, {})
+            current = None
+            for line in data.splitlines():
+                if line.startswith('%') and line.endswith('%'):
+                    current = sections.setdefault(line.strip('%'), [])
+                elif line and current is not None:
+                    current.append(line)
+
+    for sections in packages.values():
+        names = sections.get('NAME')
+        if not names:
+            continue
+        desktop_ids = tuple(filter(None, map(_desktop_id, sections.get('FILES', ()))))
+        yield RepoPackage(
+            name=names[0],
+            url=(sections.get('URL') or [''])[0],
+            desktop_ids=desktop_ids,
+        )
+
+
+def parse_deb_packages(path: str) -> Iterator[RepoPackage]:
+    """قراءة ملف Packages لـ apt فقرةً بفقرة"""
+    name = url = ''
+    with open_catalog(path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                if name:
+                    yield RepoPackage(name=name, url=url)
+                name = url = ''
+            elif line.startswith('Package:'):
+                name = line[8:].strip()
+            elif line.startswith('Homepage:'):
+                url = line[9:].strip()
+    if name:
+        yield RepoPackage(name=name, url=url)
+
+
+def parse_rpm_primary(path: str) -> Iterator[RepoPackage]:
+    """قراءة primary.xml لـ dnf/zypper بشكل متدفق"""
+    with _open_binary(path) as f:
+        for _, element in ET.iterparse(f, events=('end',)):
+            if element.tag != f'{_RPM_NS}package':
+                continue
+            desktop_ids = tuple(filter(None, (
+                _desktop_id(item.text or '') for item in element.iter(f'{_RPM_NS}file')
+            )))
+            yield RepoPackage(
+                name=element.findtext(f'{_RPM_NS}name', ''),
+                url=element.findtext(f'{_RPM_NS}url', '') or '',
+                desktop_ids=desktop_ids,
+            )
+            element.clear()
+
+
+_PARSERS = {
+    'pacman': parse_pacman_db,
+    'apt': parse_deb_packages,
+    'dnf': parse_rpm_primary,
+    'zypper': parse_rpm_primary,
+}
+
+
+class RepoIndex:
+    """فهارس حزم توزيعة واحدة للمطابقة"""
+
+    def __init__(self, packages: Iterable[RepoPackage]):
+        self.names: Dict[str, RepoPackage] = {}
+        self.by_url: Dict[str, List[str]] = {}
+        self.by_desktop: Dict[str, List[str]] = {}
+        # فهرس الثلاثيات للأسماء المطبعة: ثلاثي -> أرقام الأسماء
+        self.normalized: List[Tuple[str, str]] = []
+        self.by_trigram: Dict[str, List[int]] = {}
+
+        for package in packages:
+            if not package.name or package.name in self.names:
+                continue
+            self.names[package.name] = package
+            if package.url:
+                self.by_url.setdefault(normalize_url(package.url), []).append(package.name)
+            for desktop_id in package.desktop_ids:
+                self.by_desktop.setdefault(desktop_id, []).append(package.name)
+            normalized = normalize_name(package.name)
+            if normalized:
+                number = len(self.normalized)
+                self.normalized.append((normalized, package.name))
+                for trigram in trigrams(normalized):
+                    self.by_trigram.setdefault(trigram, []).append(number)
+
+    def _closest(self, candidates: List[str], keys: List[str]) -> Tuple[str, float]:
+        """أقرب اسم لأسماء التطبيق بين المرشحين مع نسبة تشابهه"""
+        scored = [
+            (max((SequenceMatcher(None, normalize_name(name), key).ratio() for key in keys), default=0.0), name)
+            for name in candidates
+        ]
+        score, name = max(scored, key=lambda item: (item[0], -len(item[1])))
+        return name, score
+
+    def match(self, app: AppSignals) -> Optional[Tuple[str, str, float]]:
+        """مطابقة تطبيق: (اسم الحزمة، الطريقة، الدرجة)"""
+        keys = [normalize_name(app.id), normalize_name(app.name)]
+        keys.extend(normalize_name(name) for name in app.names.values())
+        keys = [key for key in dict.fromkeys(keys) if key]
+
+        for desktop_id in app.desktop_ids:
+            candidates = self.by_desktop.get(desktop_id)
+            if candidates:
+                return self._closest(candidates, keys)[0], 'desktop', 1.0
+
+        for name in list(app.names.values()) + [app.id, app.name.lower()]:
+            if name in self.names:
+                return name, 'name', 0.95
+
+        if app.website:
+            candidates = self.by_url.get(normalize_url(app.website))
+            if candidates:
+                # رابط لحزمة واحدة يخص مشروعها، أما المشترك فيحتاج تشابه الاسم
+                if len(candidates) == 1:
+                    return candidates[0], 'url', 1.0
+                name, score = self._closest(candidates, keys)
+                if score >= SIMILARITY_THRESHOLD:
+                    return name, 'url', round(score, 3)
+
+        best = None
+        for key in keys:
+            # اسم مشابه بنسبة عالية يشترك مع المفتاح في أغلب ثلاثياته،
+            # فيكفي جمع المرشحين من قوائم الثلاثيات الأقصر
+            postings = sorted(
+                (self.by_trigram[trigram] for trigram in trigrams(key) if trigram in self.by_trigram),
+                key=len
+            )
+            candidates = set()
+            for numbers in postings[:RARE_TRIGRAMS]:
+                candidates.update(numbers)
+            # المفتاح هو التسلسل الثاني حتى يُبنى جدوله مرة واحدة
+            matcher = SequenceMatcher(None, '', key)
+            for number in candidates:
+                normalized, name = self.normalized[number]
+                # الحد الأعلى للنسبة من الطولين فقط
+                if 2 * min(len(key), len(normalized)) < SIMILARITY_THRESHOLD * (len(key) + len(normalized)):
+                    continue
+                matcher.set_seq1(normalized)
+                if matcher.quick_ratio() < SIMILARITY_THRESHOLD:
+                    continue
+                score = matcher.ratio()
+                if score >= SIMILARITY_THRESHOLD and (best is None or score > best[2]):
+                    best = (name, 'similar', round(score, 3))
+        return best
+
+
+def _match_field(task: Tuple[str, List[str], List[AppSignals]]) -> Tuple[str, Dict, Dict]:
+    """قراءة مستودعات حقل واحد ومطابقة التطبيقات الناقصة (في عملية منفصلة)"""
+    field_name, paths, apps = task
+    start = time.perf_counter()
+
+    parser = _PARSERS[field_name]
+    index = RepoIndex(package for path in paths for package in parser(path))
+    parsed = time.perf_counter()
+
+    matches = {}
+    for app in apps:
+        result = index.match(app)
+        if result is not None:
+            name, method, score = result
+            matches[app.id] = {'name': name, 'method': method, 'score': score}
+
+    stats = {
+        'files': len(paths),
+        'packages': len(index.names),
+        'candidates': len(apps),
+        'matched': len(matches),
+        'parse_seconds': round(parsed - start, 3),
+        'match_seconds': round(time.perf_counter() - parsed, 3),
+    }
+    return field_name, matches, stats
+
+
+def discover_sources() -> Dict[str, List[str]]:
+    """البحث عن بيانات المستودعات المحلية المتاحة"""
+    sources = {}
+    for field_name, patterns in DEFAULT_SOURCES.items():
+        paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+        if paths:
+            sources[field_name] = paths
+    return sources
+
+
+def build_package_map(apps: Iterable[AppEntry], sources: Mapping[str, List[str]],
+                      max_workers: Optional[int] = None) -> Dict:
+    """بناء جدول الأسماء لكل التوزيعات بالتوازي (عملية لكل توزيعة)"""
+    start = time.perf_counter()
+    signals = [AppSignals.from_app(app) for app in apps]
+
+    tasks = []
+    for field_name, paths in sources.items():
+        if field_name not in _PARSERS:
+            raise ValueError(f"حقل غير مدعوم: {field_name}")
+        missing = [app for app in signals if field_name not in app.names]
+        # لا حاجة لقراءة مستودع كل تطبيقاته معروفة الاسم
+        if missing and paths:
+            tasks.append((field_name, list(paths), missing))
+
+    packages: Dict[str, Dict] = {}
+    stats = {}
+    if tasks:
+        workers = max_workers or len(tasks)
+        if workers == 1:
+            results = map(_match_field, tasks)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_match_field, tasks)
+        try:
+            for field_name, matches, field_stats in results:
+                stats[field_name] = field_stats
+                for app_id, match in matches.items():
+                    packages.setdefault(app_id, {})[field_name] = match
+        finally:
+            if workers != 1:
+                pool.shutdown()
+
+    return {
+        'format': MAP_FORMAT,
+        'version': MAP_VERSION,
+        'sources': {field_name: list(paths) for field_name, paths in sources.items()},
+        'stats': stats,
+        'build_seconds': round(time.perf_counter() - start, 3),
+        'packages': packages,
+    }
+
+
+def save_package_map(package_map: Dict, filepath: str = PACKAGE_MAP_FILE):
+    """حفظ الجدول"""
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(package_map, f, ensure_ascii=False, indent=1)
+
+
+def load_package_map(filepath: str = PACKAGE_MAP_FILE,
+                     min_score: float = SIMILARITY_THRESHOLD) -> Dict[str, Dict[str, str]]:
+    """قراءة الجدول: معرف التطبيق -> حقل -> اسم الحزمة"""
+    from catalog_io import CatalogFormatError
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise CatalogFormatError(str(e)) from e
+    if data.get('format') != MAP_FORMAT or data.get('version') != MAP_VERSION:
+        raise CatalogFormatError("الملف ليس جدول أسماء حزم مدعوماً")
+
+    mapping = {}
+    for app_id, fields in data.get('packages', {}).items():
+        names = {
+            field_name: match['name']
+            for field_name, match in fields.items()
+            if field_name in REPO_FIELDS and match.get('score', 0) >= min_score
+        }
+        if names:
+            mapping[app_id] = names
+    return mapping
+
+
+def fill_from_map(app: AppEntry, names: Mapping[str, str]) -> AppEntry:
+    """نسخة من التطبيق بعد ملء حقوله الفارغة فقط، أو التطبيق نفسه إن لم يتغير"""
+    import dataclasses
+
+    changes = {name: value for name, value in names.items() if not getattr(app, name)}
+    return dataclasses.replace(app, **changes) if changes else app
+
+
+def mapped_entries(apps: Mapping[str, AppEntry],
+                   mapping: Mapping[str, Dict[str, str]]) -> List[AppEntry]:
+    """نسخ التطبيقات بعد ملء الحقول الفارغة فقط من الجدول"""
+    entries = []
+    for app_id, names in mapping.items():
+        app = apps.get(app_id)
+        if app is None:
+            continue
+        filled = fill_from_map(app, names)
+        if filled is not app:
+            entries.append(filled)
+    return entries
+
+
+if __name__ == '__main__':
+    import argparse
+    from app_database import AppDatabase
+
+    parser = argparse.ArgumentParser(description="بناء جدول أسماء الحزم عبر التوزيعات")
+    parser.add_argument('sources', nargs='*', help="حقل=مسار، مثل apt=/tmp/Packages.gz")
+    parser.add_argument('-o', '--output', default=PACKAGE_MAP_FILE)
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.sources:
+        sources: Dict[str, List[str]] = {}
+        for item in args.sources:
+            field_name, _, path = item.partition('=')
+            sources.setdefault(field_name, []).append(path)
+    else:
+        sources = discover_sources()
+
+    result = build_package_map(AppDatabase().apps.values(), sources, args.jobs)
+    save_package_map(result, args.output)
+    for field_name, field_stats in result['stats'].items():
+        print(f"{field_name:7} {field_stats['packages']:7} حزمة  "
+              f"{field_stats['matched']}/{field_stats['candidates']} مطابقة")
+    print(f"زمن البناء: {result['build_seconds']} s -> {args.output}")
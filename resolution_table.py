@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Resolution Table
+جدول محسوب مسبقاً لكل جهاز: لكل تطبيق مدير الحزم المختار واسم الحزمة
+والبدائل بالترتيب، بدلاً من إعادة الاختيار مع كل تثبيت أو إزالة أو فحص.
+
+يُبنى من مديري الحزم المتاحين في DistroDetector ومن الكتالوج، ويُعاد
+بناؤه فقط عند تغير المديرين أو الكتالوج.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app_database import AppEntry
+from package_manager import MANAGER_FIELDS, PackageInfo
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """نتيجة اختيار مدير الحزم لتطبيق"""
+    manager: str
+    package: str
+    # (مدير، اسم حزمة) للمحاولة بعد الخيار الأول بالترتيب
+    fallbacks: Tuple[Tuple[str, str], ...] = ()
+    # لا يوجد اسم حزمة معروف: الاسم مخمن من معرف التطبيق
+    guessed: bool = False
+
+    def candidates(self) -> Tuple[Tuple[str, str], ...]:
+        """كل الخيارات بالترتيب بدءاً بالمختار"""
+        return ((self.manager, self.package),) + self.fallbacks
+
+    def package_for(self, manager: str) -> Optional[str]:
+        """اسم الحزمة لمدير معين إن كان ضمن الخيارات"""
+        for candidate, package in self.candidates():
+            if candidate == manager:
+                return package
+        return None
+
+
+def package_info_for(app: AppEntry) -> PackageInfo:
+    """إنشاء PackageInfo من AppEntry"""
+    return PackageInfo(
+        name=app.id,
+        display_name=app.name,
+        description=app.description,
+        category=app.category,
+        icon=app.icon,
+        package_names={
+            'pacman': app.pacman,
+            'apt': app.apt,
+            'dnf': app.dnf,
+            'zypper': app.zypper,
+        },
+        flatpak_id=app.flatpak,
+        snap_name=app.snap,
+        website=app.website,
+        is_app=app.is_app,
+    )
+
+
+class ResolutionTable:
+    """جدول الاختيار لكل تطبيق في الكتالوج على هذا الجهاز"""
+
+    def __init__(self, detector, app_db):
+        self.detector = detector
+        self.app_db = app_db
+        self._entries: Dict[str, Resolution] = {}
+        self._package_infos: Dict[str, PackageInfo] = {}
+        # المفتاح الذي بُني عليه الجدول: (المديرون المتاحون، جيل الكتالوج)
+        self._managers: Tuple[str, ...] = ()
+        self._generation = -1
+        # (المستودع، المرجع الكامل) لكل معرف flatpak من بيانات المستودعات المحلية
+        self.flatpak_refs: Dict[str, Tuple[str, str]] = {}
+
+    def set_flatpak_refs(self, refs: Dict[str, Tuple[str, str]]):
+        """استخدام مراجع مستودعات flatpak للتحقق من المعرفات وللتثبيت"""
+        self.flatpak_refs = refs
+        self.rebuild()
+
+    def _resolve_app(self, app: AppEntry, managers: Tuple[str, ...]) -> Resolution:
+        """اختيار المدير واسم الحزمة لتطبيق واحد"""
+        candidates: List[Tuple[str, str]] = []
+        used_fields = set()
+        # ترتيب المديرين المتاحين هو الأولوية: مدير النظام ثم flatpak ثم snap.
+        # مساعدات AUR تستخدم اسم pacman، ولا يُكرر نفس الحقل لمديرين
+        for manager in managers:
+            field_name = MANAGER_FIELDS.get(manager)
+            if field_name is None or field_name in used_fields:
+                continue
+            package = getattr(app, field_name)
+            # معرف flatpak غير موجود في أي مستودع معروف لا يمكن تثبيته
+            if field_name == 'flatpak' and self.flatpak_refs and package not in self.flatpak_refs:
+                continue
+            if package:
+                candidates.append((manager, package))
+                used_fields.add(field_name)
+
+        if not candidates:
+            # نفس السلوك السابق: مدير النظام مع معرف التطبيق كاسم حزمة
+            return Resolution(self.detector.package_manager or '', app.id, guessed=True)
+
+        manager, package = candidates[0]
+        return Resolution(manager, package, tuple(candidates[1:]))
+
+    def _current_managers(self) -> Tuple[str, ...]:
+        return tuple(self.detector.available_managers)
+
+    def _ensure_current(self):
+        """إعادة البناء إذا تغير المديرون أو تغير الكتالوج دون إشعار"""
+        managers = self._current_managers()
+        if managers != self._managers or self.app_db.generation != self._generation:
+            self.rebuild()
+
+    def rebuild(self):
+        """بناء الجدول لكل تطبيقات الكتالوج"""
+        managers = self._current_managers()
+        self._entries = {
+            app.id: self._resolve_app(app, managers) for app in self.app_db.apps.values()
+        }
+        self._package_infos = {}
+        self._managers = managers
+        self._generation = self.app_db.generation
+
+    def update_apps(self, changed_ids: Iterable[str], removed_ids: Iterable[str]):
+        """تحديث صفوف التطبيقات المعدلة فقط بعد تغيير الكتالوج"""
+        managers = self._current_managers()
+        if managers != self._managers:
+            self.rebuild()
+            return
+
+        for app_id in removed_ids:
+            self._entries.pop(app_id, None)
+            self._package_infos.pop(app_id, None)
+        for app_id in changed_ids:
+            self._package_infos.pop(app_id, None)
+            app = self.app_db.get_app(app_id)
+            if app is None:
+                self._entries.pop(app_id, None)
+            else:
+                self._entries[app_id] = self._resolve_app(app, managers)
+        self._generation = self.app_db.generation
+
+    def resolve(self, app_id: str) -> Optional[Resolution]:
+        """اختيار المدير واسم الحزمة لتطبيق"""
+        self._ensure_current()
+        return self._entries.get(app_id)
+
+    def install_target(self, manager: str, package: str) -> str:
+        """وسيط أمر التثبيت: المستودع والمرجع الكامل لتطبيقات flatpak المعروفة"""
+        if MANAGER_FIELDS.get(manager) == 'flatpak' and package in self.flatpak_refs:
+            remote, ref = self.flatpak_refs[package]
+            return f"{remote} {ref}"
+        return package
+
+    def package_info(self, app: AppEntry) -> PackageInfo:
+        """PackageInfo محفوظ للتطبيق بدلاً من إنشائه مع كل نقرة"""
+        self._ensure_current()
+        info = self._package_infos.get(app.id)
+        if info is None:
+            info = package_info_for(app)
+            self._package_infos[app.id] = info
+        return info
+
+
+if __name__ == '__main__':
+    from app_database import AppDatabase
+    from distro_detector import DistroDetector
+
+    table = ResolutionTable(DistroDetector(), AppDatabase())
+    table.rebuild()
+    print(f"المديرون: {', '.join(table._managers) or '-'}")
+    for app_id in ['firefox', 'vscode', 'git', 'mongodb']:
+        print(app_id, '->', table.resolve(app_id))
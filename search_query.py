@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Search Query
+تحليل استعلامات البحث ذات المرشحات مثل:
+
+    category:development manager:flatpak installed:no editor
+
+المرشحات المدعومة:
+    category:<تصنيف>        معرف التصنيف أو اسمه بالإنجليزية
+    manager:<مدير>[,<مدير>]  التطبيقات المتوفرة لأي من المديرين
+    installed:yes|no         حسب حالة التثبيت على النظام
+    is:app|package|featured|popular
+
+الكلمات الأخرى (وأي مرشح غير معروف) تبقى نص بحث عادي.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app_database import AppDatabase
+from package_manager import MANAGER_FIELDS
+
+
+_TRUE_VALUES = frozenset(('yes', 'y', 'true', '1', 'نعم'))
+_FALSE_VALUES = frozenset(('no', 'n', 'false', '0', 'لا'))
+
+# قيم is: وما يقابلها في query_apps
+_IS_VALUES = {
+    'app': ('is_app', True),
+    'package': ('is_app', False),
+    'featured': ('featured', True),
+    'popular': ('popular', True),
+}
+
+
+@dataclass
+class SearchQuery:
+    """استعلام بحث بعد فصل المرشحات عن النص"""
+    text: str = ""
+    category: Optional[str] = None
+    managers: Tuple[str, ...] = ()
+    installed: Optional[bool] = None
+    is_app: Optional[bool] = None
+    featured: Optional[bool] = None
+    popular: Optional[bool] = None
+    # المرشحات كما كُتبت، لعرضها للمستخدم
+    terms: List[str] = field(default_factory=list)
+
+    def has_filters(self) -> bool:
+        """هل يحتوي الاستعلام مرشحات غير النص"""
+        return bool(self.terms)
+
+    def filters(self) -> Dict:
+        """وسائط query_apps المقابلة للاستعلام"""
+        return {
+            'text': self.text or None,
+            'category': self.category,
+            'managers': self.managers or None,
+            'installed': self.installed,
+            'is_app': self.is_app,
+            'featured': self.featured,
+            'popular': self.popular,
+        }
+
+
+def _parse_bool(value: str) -> Optional[bool]:
+    """تحويل قيمة نعم/لا"""
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    return None
+
+
+def _parse_category(value: str) -> str:
+    """قبول معرف التصنيف أو اسمه بالإنجليزية"""
+    if value in AppDatabase.CATEGORIES:
+        return value
+    for category_id, info in AppDatabase.CATEGORIES.items():
+        if info['name'].lower() == value:
+            return category_id
+    # تصنيف غير معروف يبقى كما هو (ولا يطابق أي تطبيق)
+    return value
+
+
+def _parse_managers(value: str) -> Optional[Tuple[str, ...]]:
+    """تحويل أسماء المديرين إلى حقول الكتالوج"""
+    managers = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        field_name = MANAGER_FIELDS.get(name)
+        if field_name is None:
+            return None
+        if field_name not in managers:
+            managers.append(field_name)
+    return tuple(managers) or None
+
+
+def parse_query(text: str) -> SearchQuery:
+    """فصل المرشحات عن نص البحث
+
+    المرشح المكرر يأخذ آخر قيمة، عدا manager: الذي تُجمع قيمه.
+    """
+    query = SearchQuery()
+    words = []
+
+    for token in text.split():
+        key, sep, value = token.partition(':')
+        key = key.lower()
+        value = value.lower()
+        if not sep or not value:
+            words.append(token)
+            continue
+
+        if key == 'category':
+            query.category = _parse_category(value)
+        elif key == 'manager':
+            managers = _parse_managers(value)
+            if managers is None:
+                words.append(token)
+                continue
+            query.managers = tuple(dict.fromkeys(query.managers + managers))
+        elif key == 'installed':
+            installed = _parse_bool(value)
+            if installed is None:
+                words.append(token)
+                continue
+            query.installed = installed
+        elif key == 'is' and value in _IS_VALUES:
+            name, flag = _IS_VALUES[value]
+            setattr(query, name, flag)
+        else:
+            words.append(token)
+            continue
+
+        query.terms.append(token)
+
+    query.text = ' '.join(words)
+    return query
+
+
+if __name__ == '__main__':
+    import sys
+
+    db = AppDatabase()
+    parsed = parse_query(' '.join(sys.argv[1:]) or 'category:development manager:flatpak editor')
+    print(parsed)
+    page = db.query_apps(limit=20, **parsed.filters())
+    print(page.total, [app.name for app in page.items])
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Linux Store - Search Trie
+شجرة بادئات لاقتراحات الإكمال التلقائي في شريط البحث
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app_database import AppDatabase, AppEntry, PACKAGE_FIELDS
+
+
+class _TrieNode:
+    """عقدة في شجرة البادئات"""
+    __slots__ = ('children', 'ids', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.ids: List[str] = []
+        # أفضل التطبيقات في هذا الفرع مرتبة مسبقاً
+        self.top: Tuple[str, ...] = ()
+
+
+class AppTrie:
+    """شجرة بادئات مبنية من أسماء التطبيقات والحزم والكلمات المفتاحية"""
+
+    # عدد التطبيقات المحفوظة مسبقاً في كل عقدة
+    TOP_K = 10
+
+    HISTORY_FILE = os.path.expanduser('~/.config/linux-store/search_history.json')
+
+    def __init__(self, history_file: Optional[str] = None):
+        self.root = _TrieNode()
+        self.apps: Dict[str, AppEntry] = {}
+        self.terms: Dict[str, List[str]] = {}
+        self.history_file = history_file or self.HISTORY_FILE
+        self.selections: Dict[str, int] = {}
+        self._load_history()
+
+    @classmethod
+    def from_database(cls, app_db: AppDatabase,
+                      history_file: Optional[str] = None) -> 'AppTrie':
+        """بناء الشجرة مرة واحدة من قاعدة التطبيقات"""
+        trie = cls(history_file)
+        for app in app_db.apps.values():
+            trie._insert_app(app)
+        trie._build_top(trie.root)
+        return trie
+
+    def _app_terms(self, app: AppEntry) -> List[str]:
+        """استخراج الكلمات القابلة للإكمال من تطبيق"""
+        terms = [app.name.lower()]
+        # كل كلمة في الاسم حتى يطابق "chr" تطبيق Google Chrome
+        terms.extend(word for word in app.name.lower().split() if word)
+        for field_name in PACKAGE_FIELDS:
+            value = getattr(app, field_name)
+            if value:
+                terms.append(value.lower())
+        terms.extend(kw.lower() for kw in app.keywords)
+        # إزالة التكرار مع الحفاظ على الترتيب
+        return list(dict.fromkeys(terms))
+
+    def _insert_app(self, app: AppEntry):
+        """إضافة تطبيق للشجرة"""
+        self.apps[app.id] = app
+        terms = self._app_terms(app)
+        self.terms[app.id] = terms
+        for term in terms:
+            node = self.root
+            for char in term:
+                child = node.children.get(char)
+                if child is None:
+                    child = _TrieNode()
+                    node.children[char] = child
+                node = child
+            if app.id not in node.ids:
+                node.ids.append(app.id)
+
+    def _static_rank(self, app_id: str) -> Tuple[int, int, str]:
+        """ترتيب ثابت حسب التمييز والشعبية"""
+        app = self.apps[app_id]
+        return (-(app.featured + app.popular), -app.featured, app.name.lower())
+
+    def _build_top(self, root: _TrieNode):
+        """حساب أفضل التطبيقات لكل عقدة من الأسفل للأعلى"""
+        # ترتيب ما بعد العقد بدون تعاود لتفادي تجاوز حد التعاود
+        order = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+
+        for node in reversed(order):
+            self._compute_top(node)
+
+    def _compute_top(self, node: _TrieNode):
+        """حساب أفضل التطبيقات لعقدة من أبنائها"""
+        candidates = set(node.ids)
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = tuple(sorted(candidates, key=self._static_rank)[:self.TOP_K])
+
+    def _path(self, term: str) -> List[_TrieNode]:
+        """العقد من الجذر حتى نهاية كلمة"""
+        path = [self.root]
+        node = self.root
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                break
+            path.append(node)
+        return path
+
+    def update_apps(self, apps: Mapping[str, AppEntry],
+                    changed_ids: Iterable[str], removed_ids: Iterable[str]):
+        """تحديث الشجرة في مكانها لتطبيقات معدلة أو محذوفة
+
+        تُعاد حساب قوائم الأفضل للعقد الواقعة على مسارات الكلمات
+        المتأثرة فقط، من الأعمق إلى الجذر.
+        """
+        changed_ids = list(changed_ids)
+        dirty: Dict[int, Tuple[int, _TrieNode]] = {}
+
+        def mark(term: str):
+            for depth, node in enumerate(self._path(term)):
+                dirty[id(node)] = (depth, node)
+
+        for app_id in changed_ids + list(removed_ids):
+            for term in self.terms.pop(app_id, ()):
+                path = self._path(term)
+                if len(path) == len(term) + 1 and app_id in path[-1].ids:
+                    path[-1].ids.remove(app_id)
+                mark(term)
+            self.apps.pop(app_id, None)
+
+        for app_id in changed_ids:
+            app = apps.get(app_id)
+            if app is None:
+                continue
+            self._insert_app(app)
+            for term in self.terms[app_id]:
+                mark(term)
+
+        for _, node in sorted(dirty.values(), key=lambda item: -item[0]):
+            self._compute_top(node)
+
+    def _find_node(self, prefix: str) -> Optional[_TrieNode]:
+        """الوصول للعقدة المقابلة لبادئة"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[AppEntry]:
+        """اقتراح تطبيقات تبدأ إحدى كلماتها بالبادئة"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+
+        candidates = set(node.top)
+        # التطبيقات المختارة سابقاً تُضاف حتى لو لم تكن ضمن الأفضل ثابتاً
+        for app_id in self.selections:
+            if app_id in self.apps and any(
+                term.startswith(prefix) for term in self.terms[app_id]
+            ):
+                candidates.add(app_id)
+
+        ranked = sorted(
+            candidates,
+            key=lambda app_id: (-self.selections.get(app_id, 0),) + self._static_rank(app_id)
+        )
+        return [self.apps[app_id] for app_id in ranked[:limit]]
+
+    def record_selection(self, app_id: str):
+        """تسجيل اختيار المستخدم لاقتراح"""
+        self.selections[app_id] = self.selections.get(app_id, 0) + 1
+        self._save_history()
+
+    def _load_history(self):
+        """تحميل عدد مرات الاختيار"""
+        if not os.path.exists(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.selections = {
+                str(app_id): int(count)
+                for app_id, count in data.get('selections', {}).items()
+            }
+        except (OSError, ValueError, AttributeError):
+            self.selections = {}
+
+    def _save_history(self):
+        """حفظ عدد مرات الاختيار"""
+        try:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump({'selections': self.selections}, f)
+        except OSError:
+            pass
+
+
+if __name__ == '__main__':
+    trie = AppTrie.from_database(AppDatabase(), history_file=os.devnull)
+    for prefix in ['f', 'co', 'org.', 'brow']:
+        print(prefix, '->', [app.name for app in trie.suggest(prefix)])
@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+"""
+Linux Store - SQLite Application Database
+قاعدة بيانات التطبيقات المخزنة في ملف SQLite مع فهرس FTS5 للبحث
+"""
+
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+import json
+import os
+import sqlite3
+import threading
+
+from app_database import AppDatabase, AppEntry, AppPage, PACKAGE_FIELDS, entry_digest
+from catalog_io import iter_catalog, write_catalog
+
+
+# أعمدة جدول التطبيقات بنفس ترتيب حقول AppEntry
+_COLUMNS = (
+    'id', 'name', 'description', 'description_ar', 'category', 'icon',
+    'is_app', 'website',
+) + PACKAGE_FIELDS + ('keywords', 'featured', 'popular')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS apps (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    description_ar TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL,
+    icon TEXT NOT NULL DEFAULT '',
+    is_app INTEGER NOT NULL DEFAULT 1,
+    website TEXT NOT NULL DEFAULT '',
+    pacman TEXT NOT NULL DEFAULT '',
+    apt TEXT NOT NULL DEFAULT '',
+    dnf TEXT NOT NULL DEFAULT '',
+    zypper TEXT NOT NULL DEFAULT '',
+    flatpak TEXT NOT NULL DEFAULT '',
+    snap TEXT NOT NULL DEFAULT '',
+    keywords TEXT NOT NULL DEFAULT '[]',
+    featured INTEGER NOT NULL DEFAULT 0,
+    popular INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_apps_category ON apps(category);
+CREATE INDEX IF NOT EXISTS idx_apps_is_app ON apps(is_app);
+CREATE INDEX IF NOT EXISTS idx_apps_featured ON apps(featured) WHERE featured = 1;
+CREATE INDEX IF NOT EXISTS idx_apps_popular ON apps(popular) WHERE popular = 1;
+CREATE INDEX IF NOT EXISTS idx_apps_pacman ON apps(pacman) WHERE pacman != '';
+CREATE INDEX IF NOT EXISTS idx_apps_apt ON apps(apt) WHERE apt != '';
+CREATE INDEX IF NOT EXISTS idx_apps_dnf ON apps(dnf) WHERE dnf != '';
+CREATE INDEX IF NOT EXISTS idx_apps_zypper ON apps(zypper) WHERE zypper != '';
+CREATE INDEX IF NOT EXISTS idx_apps_flatpak ON apps(flatpak) WHERE flatpak != '';
+CREATE INDEX IF NOT EXISTS idx_apps_snap ON apps(snap) WHERE snap != '';
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS apps_fts USING fts5(
+    name, description, description_ar, keywords,
+    content='apps', content_rowid='rowid', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS apps_fts_insert AFTER INSERT ON apps BEGIN
+    INSERT INTO apps_fts(rowid, name, description, description_ar, keywords)
+    VALUES (new.rowid, new.name, new.description, new.description_ar, new.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS apps_fts_delete AFTER DELETE ON apps BEGIN
+    INSERT INTO apps_fts(apps_fts, rowid, name, description, description_ar, keywords)
+    VALUES ('delete', old.rowid, old.name, old.description, old.description_ar, old.keywords);
+END;
+
+CREATE TRIGGER IF NOT EXISTS apps_fts_update AFTER UPDATE ON apps BEGIN
+    INSERT INTO apps_fts(apps_fts, rowid, name, description, description_ar, keywords)
+    VALUES ('delete', old.rowid, old.name, old.description, old.description_ar, old.keywords);
+    INSERT INTO apps_fts(rowid, name, description, description_ar, keywords)
+    VALUES (new.rowid, new.name, new.description, new.description_ar, new.keywords);
+END;
+"""
+
+
+class _SQLiteAppMapping(Mapping):
+    """واجهة قاموس للقراءة فوق جدول التطبيقات بدلاً من self.apps"""
+
+    def __init__(self, db: 'SQLiteAppDatabase'):
+        self._db = db
+
+    def __getitem__(self, app_id: str) -> AppEntry:
+        app = self._db.get_app(app_id)
+        if app is None:
+            raise KeyError(app_id)
+        return app
+
+    def __contains__(self, app_id) -> bool:
+        return bool(self._db._fetch('SELECT 1 FROM apps WHERE id = ?', (app_id,)))
+
+    def __iter__(self) -> Iterator[str]:
+        for row in self._db._fetch('SELECT id FROM apps ORDER BY rowid'):
+            yield row['id']
+
+    def __len__(self) -> int:
+        return self._db._fetch('SELECT COUNT(*) AS n FROM apps')[0]['n']
+
+    def values(self) -> List[AppEntry]:
+        return self._db.get_all_apps()
+
+    def items(self) -> List:
+        return [(app.id, app) for app in self._db.get_all_apps()]
+
+
+class SQLiteAppDatabase:
+    """قاعدة تطبيقات في ملف SQLite بنفس واجهة AppDatabase"""
+
+    CATEGORIES = AppDatabase.CATEGORIES
+
+    SCHEMA_VERSION = 1
+
+    # البحث يتم بطلب واحد عبر الفهرس بدلاً من المسح على دفعات
+    chunked_search = False
+
+    # يُعطل مع FTS5: مطابقة بادئات الكلمات لا تُضيق بالسلاسل الجزئية
+    # ("fire" ثم "campfire")، أما بدونه فمطابقة LIKE سلاسل جزئية أيضاً
+    narrows_search = True
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(filepath, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+
+        self.has_fts = False
+        self.apps = _SQLiteAppMapping(self)
+        self.generation = 0
+        self.callbacks: Dict[str, Optional[Callable]] = {
+            'on_change': None,
+        }
+        self._init_schema()
+        self.installed_packages: Dict[str, Set[str]] = {}
+        self.installed_known = False
+        # أوجه الكتالوج الكامل: ((الجيل، حالة التثبيت)، الأوجه)
+        self._facet_cache = None
+
+    def _init_schema(self):
+        """إنشاء الجداول عند أول فتح للملف فقط"""
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            # الحزم المثبتة خاصة بالجلسة ولا تُحفظ في الملف
+            self._conn.execute(
+                'CREATE TEMP TABLE IF NOT EXISTS installed '
+                '(field TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (field, name))'
+            )
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite مبني بدون FTS5: البحث عبر LIKE
+                self.has_fts = False
+            self.narrows_search = not self.has_fts
+
+            version = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+
+        if version is None:
+            # ملف جديد: تعبئته بالكتالوج المدمج مرة واحدة
+            self.import_apps(AppDatabase().apps.values())
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)",
+                    (str(self.SCHEMA_VERSION),)
+                )
+
+    def _fetch(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        """تنفيذ استعلام قراءة"""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> AppEntry:
+        """تحويل صف إلى AppEntry"""
+        data = {column: row[column] for column in _COLUMNS}
+        data['is_app'] = bool(data['is_app'])
+        data['featured'] = bool(data['featured'])
+        data['popular'] = bool(data['popular'])
+        data['keywords'] = json.loads(data['keywords'])
+        return AppEntry(**data)
+
+    @staticmethod
+    def _entry_to_row(app: AppEntry) -> tuple:
+        """تحويل AppEntry إلى قيم صف"""
+        values = []
+        for column in _COLUMNS:
+            value = getattr(app, column)
+            if column == 'keywords':
+                value = json.dumps(list(value), ensure_ascii=False)
+            elif isinstance(value, bool):
+                value = int(value)
+            values.append(value)
+        return tuple(values)
+
+    def _select(self, where: str = '', params: Iterable = ()) -> List[AppEntry]:
+        """جلب تطبيقات بشرط"""
+        sql = f"SELECT * FROM apps {where} ORDER BY rowid"
+        return [self._row_to_entry(row) for row in self._fetch(sql, params)]
+
+    def _add_app(self, app: AppEntry):
+        """إضافة تطبيق للقاعدة"""
+        self.import_apps([app])
+
+    def _upsert_sql(self) -> str:
+        """جملة إضافة أو تحديث تطبيق"""
+        placeholders = ', '.join('?' for _ in _COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in _COLUMNS[1:])
+        return (
+            f"INSERT INTO apps ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}"
+        )
+
+    def import_apps(self, apps: Iterable[AppEntry]):
+        """إضافة أو تحديث مجموعة تطبيقات في معاملة واحدة"""
+        with self._lock, self._conn:
+            self._conn.executemany(self._upsert_sql(), (self._entry_to_row(app) for app in apps))
+            # الاستيراد الكامل يلغي البصمة المحفوظة وتُحسب عند الطلب
+            self._conn.execute("DELETE FROM meta WHERE key = 'content_hash'")
+            self.generation += 1
+
+    def set_callback(self, event: str, callback: Callable):
+        """تعيين callback لحدث معين"""
+        if event in self.callbacks:
+            self.callbacks[event] = callback
+
+    def _notify(self, event: str, *args, **kwargs):
+        """إرسال إشعار"""
+        if self.callbacks.get(event):
+            self.callbacks[event](*args, **kwargs)
+
+    def content_hash(self) -> str:
+        """بصمة محتوى الكتالوج المحفوظة في جدول meta"""
+        rows = self._fetch("SELECT value FROM meta WHERE key = 'content_hash'")
+        if rows:
+            return rows[0]['value']
+
+        value = 0
+        for app in self.iter_apps():
+            value ^= entry_digest(app)
+        digest = f"{value:016x}"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('content_hash', ?)", (digest,)
+            )
+        return digest
+
+    def apply_delta(self, delta) -> int:
+        """تطبيق تحديث تفاضلي في معاملة واحدة تُلغى عند عدم التطابق"""
+        from catalog_delta import DeltaMismatchError
+
+        current = self.content_hash()
+        if delta.base != current:
+            raise DeltaMismatchError(
+                f"بصمة الكتالوج {current} لا تطابق أساس التحديث {delta.base}"
+            )
+        delta.check_against(self.apps)
+
+        value = int(current, 16)
+        with self._lock, self._conn:
+            for app_id in delta.removed:
+                row = self._conn.execute('SELECT * FROM apps WHERE id = ?', (app_id,)).fetchone()
+                value ^= entry_digest(self._row_to_entry(row))
+                self._conn.execute('DELETE FROM apps WHERE id = ?', (app_id,))
+
+            for app in delta.added + delta.modified:
+                row = self._conn.execute('SELECT * FROM apps WHERE id = ?', (app.id,)).fetchone()
+                if row is not None:
+                    value ^= entry_digest(self._row_to_entry(row))
+                value ^= entry_digest(app)
+                self._conn.execute(self._upsert_sql(), self._entry_to_row(app))
+
+            digest = f"{value:016x}"
+            if delta.target and digest != delta.target:
+                # الخروج باستثناء يلغي المعاملة كاملة
+                raise DeltaMismatchError(
+                    f"نتيجة التحديث لا تطابق البصمة الهدف {delta.target}"
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('content_hash', ?)", (digest,)
+            )
+            self.generation += 1
+
+        self._notify('on_change', [app.id for app in delta.added + delta.modified], list(delta.removed))
+        return delta.operation_count()
+
+    def get_app(self, app_id: str) -> Optional[AppEntry]:
+        """الحصول على تطبيق بالمعرف"""
+        rows = self._fetch('SELECT * FROM apps WHERE id = ?', (app_id,))
+        return self._row_to_entry(rows[0]) if rows else None
+
+    def find_by_package(self, field_name: str, name: str) -> List[AppEntry]:
+        """التطبيقات التي اسم حزمتها في حقل معين يساوي name"""
+        if field_name not in PACKAGE_FIELDS:
+            return []
+        return self._select(f'WHERE {field_name} = ?', (name,))
+
+    def get_all_apps(self) -> List[AppEntry]:
+        """الحصول على جميع التطبيقات"""
+        return self._select()
+
+    def get_apps_by_category(self, category: str) -> List[AppEntry]:
+        """الحصول على تطبيقات حسب التصنيف"""
+        return self._select('WHERE category = ?', (category,))
+
+    def get_featured_apps(self) -> List[AppEntry]:
+        """الحصول على التطبيقات المميزة"""
+        return self._select('WHERE featured = 1')
+
+    def get_popular_apps(self) -> List[AppEntry]:
+        """الحصول على التطبيقات الشائعة"""
+        return self._select('WHERE popular = 1')
+
+    def get_applications(self) -> List[AppEntry]:
+        """الحصول على التطبيقات فقط (ليس الحزم)"""
+        return self._select('WHERE is_app = 1')
+
+    def get_packages(self) -> List[AppEntry]:
+        """الحصول على الحزم فقط"""
+        return self._select('WHERE is_app = 0')
+
+    def set_installed_packages(self, packages: Dict[str, Set[str]]):
+        """تعيين الحزم المثبتة التي يعتمد عليها مرشح installed"""
+        if packages is self.installed_packages:
+            return
+        self.installed_packages = packages
+        self.installed_known = True
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM temp.installed')
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO temp.installed(field, name) VALUES (?, ?)',
+                (
+                    (field_name, name)
+                    for field_name, names in packages.items()
+                    if field_name in PACKAGE_FIELDS
+                    for name in names
+                )
+            )
+
+    def _installed_clause(self) -> str:
+        """شرط تثبيت التطبيق بأي من حقول الحزم عبر فهارسها"""
+        return '(' + ' OR '.join(
+            f"{field_name} IN (SELECT name FROM temp.installed WHERE field = '{field_name}')"
+            for field_name in PACKAGE_FIELDS
+        ) + ')'
+
+    def get_installed_apps(self) -> List[AppEntry]:
+        """الحصول على التطبيقات المثبتة حسب آخر حالة تثبيت معروفة"""
+        return self._select(f'WHERE {self._installed_clause()}')
+
+    def _facets_where(self, where: str, params: List) -> Dict[str, Dict[str, int]]:
+        """حساب الأوجه لشرط معين باستعلامي تجميع"""
+        where_sql = f'WHERE {where}' if where else ''
+        categories = {
+            row['category']: row['n']
+            for row in self._fetch(
+                f'SELECT category, COUNT(*) AS n FROM apps {where_sql} GROUP BY category',
+                params
+            )
+        }
+
+        sums = [f"COALESCE(SUM({name} != ''), 0)" for name in PACKAGE_FIELDS]
+        sums.append('COALESCE(SUM(is_app), 0)')
+        sums.append('COUNT(*)')
+        if self.installed_known:
+            sums.append(f'COALESCE(SUM({self._installed_clause()}), 0)')
+        values = list(self._fetch(f"SELECT {', '.join(sums)} FROM apps {where_sql}", params)[0])
+
+        total = values[len(PACKAGE_FIELDS) + 1]
+        apps = values[len(PACKAGE_FIELDS)]
+        facets = {
+            'category': categories,
+            'manager': {
+                name: count for name, count in zip(PACKAGE_FIELDS, values[:len(PACKAGE_FIELDS)])
+                if count
+            },
+            'kind': {'app': apps, 'package': total - apps},
+        }
+        if self.installed_known:
+            installed = values[-1]
+            facets['installed'] = {'yes': installed, 'no': total - installed}
+        return facets
+
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """عدد التطبيقات لكل تصنيف ومدير حزم ونوع وحالة تثبيت
+
+        تُحسب بالتجميع عبر الفهارس مرة لكل جيل من القاعدة.
+        """
+        key = (self.generation, id(self.installed_packages))
+        if self._facet_cache is not None and self._facet_cache[0] == key:
+            return self._facet_cache[1]
+
+        facets = self._facets_where('', [])
+        categories = {category_id: 0 for category_id in self.CATEGORIES}
+        categories.update(facets['category'])
+        facets['category'] = categories
+        facets['manager'] = {name: facets['manager'].get(name, 0) for name in PACKAGE_FIELDS}
+        self._facet_cache = (key, facets)
+        return facets
+
+    def count_facets(self, apps: Iterable[AppEntry]) -> Dict[str, Dict[str, int]]:
+        """حساب الأوجه لقائمة تطبيقات (مثل نتائج بحث نصي)"""
+        categories: Dict[str, int] = {}
+        managers = dict.fromkeys(PACKAGE_FIELDS, 0)
+        total = 0
+        app_count = 0
+        installed = 0
+        for app in apps:
+            total += 1
+            categories[app.category] = categories.get(app.category, 0) + 1
+            for name in PACKAGE_FIELDS:
+                if getattr(app, name):
+                    managers[name] += 1
+            if app.is_app:
+                app_count += 1
+            if self.installed_known and any(
+                getattr(app, name) in names
+                for name, names in self.installed_packages.items()
+                if name in PACKAGE_FIELDS and getattr(app, name)
+            ):
+                installed += 1
+
+        facets = {
+            'category': categories,
+            'manager': {name: count for name, count in managers.items() if count},
+            'kind': {'app': app_count, 'package': total - app_count},
+        }
+        if self.installed_known:
+            facets['installed'] = {'yes': installed, 'no': total - installed}
+        return facets
+
+    def _fts_query(self, query: str) -> str:
+        """تحويل نص البحث إلى استعلام FTS5 ببادئات"""
+        tokens = [token.replace('"', '""') for token in query.split()]
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def _search_clause(self, query: str):
+        """شرط البحث النصي وقيمه"""
+        if self.has_fts:
+            return (
+                'rowid IN (SELECT rowid FROM apps_fts WHERE apps_fts MATCH ?)',
+                [self._fts_query(query)],
+            )
+        pattern = f"%{query}%"
+        return (
+            '(LOWER(name) LIKE ? OR LOWER(description) LIKE ? '
+            'OR description_ar LIKE ? OR LOWER(keywords) LIKE ?)',
+            [pattern] * 4,
+        )
+
+    def search(self, query: str,
+               candidates: Optional[Iterable[AppEntry]] = None) -> List[AppEntry]:
+        """البحث في التطبيقات
+
+        يُستخدم فهرس FTS5 (مطابقة بادئات الكلمات) إن وُجد. مع candidates
+        تُقصر النتائج عليها بنفس المطابقة التي يستخدمها البحث الكامل،
+        فلا تختلف عن نتائج بحث جديد ضمن نفس التطبيقات.
+        """
+        query = query.lower().strip()
+        if candidates is not None and not self.has_fts:
+            return [app for app in candidates if AppDatabase.matches(app, query)]
+        if not query:
+            return []
+
+        clause, params = self._search_clause(query)
+        results = self._select(f'WHERE {clause}', params)
+        if candidates is not None:
+            wanted = {app.id for app in candidates}
+            results = [app for app in results if app.id in wanted]
+        return results
+
+    # أعمدة الفرز واتجاهه لكل مفتاح (المقارنة بالمؤشر حسب الاتجاه)
+    _SORT_COLUMNS = {
+        'row': (('rowid',), 'ASC'),
+        'name': (('LOWER(name)', 'rowid'), 'ASC'),
+        '-name': (('LOWER(name)', 'rowid'), 'DESC'),
+        'popular': (('-(featured + popular)', 'LOWER(name)', 'rowid'), 'ASC'),
+    }
+
+    def query_apps(self, text: Optional[str] = None, category: Optional[str] = None,
+                   featured: Optional[bool] = None, popular: Optional[bool] = None,
+                   is_app: Optional[bool] = None,
+                   managers: Optional[Iterable[str]] = None,
+                   installed: Optional[bool] = None, sort_key: str = 'row',
+                   limit: int = 50, offset: int = 0,
+                   cursor: Optional[str] = None,
+                   facets: bool = False) -> AppPage:
+        """استعلام مقسم لصفحات بمؤشر على قيم أعمدة الفرز (keyset)"""
+        if sort_key not in self._SORT_COLUMNS:
+            raise ValueError(f"مفتاح فرز غير مدعوم: {sort_key}")
+        sort_columns, direction = self._SORT_COLUMNS[sort_key]
+
+        conditions = []
+        params: List = []
+
+        if text and text.strip():
+            clause, clause_params = self._search_clause(text.lower().strip())
+            conditions.append(clause)
+            params.extend(clause_params)
+        if category is not None:
+            conditions.append('category = ?')
+            params.append(category)
+        for column, value in (('featured', featured), ('popular', popular), ('is_app', is_app)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(int(value))
+        if managers:
+            fields = list(managers)
+            unknown = [name for name in fields if name not in PACKAGE_FIELDS]
+            if unknown:
+                raise ValueError(f"حقل مدير حزم غير معروف: {unknown[0]}")
+            conditions.append('(' + ' OR '.join(f"{name} != ''" for name in fields) + ')')
+        if installed is not None:
+            clause = self._installed_clause()
+            conditions.append(clause if installed else f'NOT {clause}')
+
+        where = ' AND '.join(conditions)
+
+        # العدد الكلي والأوجه تحسب مع الصفحة الأولى فقط
+        total = None
+        page_facets = None
+        if cursor is None:
+            count_sql = f"SELECT COUNT(*) AS n FROM apps {'WHERE ' + where if where else ''}"
+            total = self._fetch(count_sql, params)[0]['n']
+            if facets:
+                page_facets = self._facets_where(where, params)
+
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if cursor is not None:
+            comparison = '>' if direction == 'ASC' else '<'
+            values = json.loads(cursor)
+            page_conditions.append(
+                f"({', '.join(sort_columns)}) {comparison} ({', '.join('?' for _ in values)})"
+            )
+            page_params.extend(values)
+
+        page_where = ' AND '.join(page_conditions)
+        order = ', '.join(f"{column} {direction}" for column in sort_columns)
+        key_columns = ', '.join(f"{column} AS _k{i}" for i, column in enumerate(sort_columns))
+        sql = (
+            f"SELECT *, {key_columns} FROM apps "
+            f"{'WHERE ' + page_where if page_where else ''} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        rows = self._fetch(sql, page_params + [limit + 1, offset])
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = json.dumps([last[f'_k{i}'] for i in range(len(sort_columns))])
+
+        return AppPage(
+            items=[self._row_to_entry(row) for row in rows],
+            next_cursor=next_cursor,
+            total=total,
+            facets=page_facets,
+        )
+
+    def get_categories(self) -> Dict:
+        """الحصول على التصنيفات"""
+        return self.CATEGORIES
+
+    def iter_apps(self, batch_size: int = 1000) -> Iterator[AppEntry]:
+        """المرور على التطبيقات بدون تحميلها كلها في الذاكرة"""
+        last_rowid = 0
+        while True:
+            rows = self._fetch(
+                'SELECT * FROM apps WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                (last_rowid, batch_size)
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_entry(row)
+            last_rowid = rows[-1]['rowid']
+
+    def export_to_json(self, filepath: str, compression: Optional[str] = None):
+        """تصدير القاعدة إلى JSON سجلاً بسجل"""
+        write_catalog(filepath, self.iter_apps(), self.CATEGORIES, compression)
+
+    def import_from_json(self, filepath: str, compression: Optional[str] = None,
+                         strict: bool = False, errors: Optional[List[str]] = None) -> int:
+        """استيراد القاعدة من JSON بمعاملة لكل دفعة (السجلات المتخطاة تُضاف إلى errors)"""
+        if not os.path.exists(filepath):
+            return 0
+
+        count = 0
+        changed = []
+        for batch in iter_catalog(filepath, compression=compression, strict=strict, errors=errors):
+            self.import_apps(batch)
+            changed.extend(app.id for app in batch)
+            count += len(batch)
+
+        self._notify('on_change', changed, [])
+        return count
+
+    def apply_package_map(self, filepath: str) -> int:
+        """ملء أسماء الحزم الناقصة من جدول package_mapping"""
+        if not os.path.exists(filepath):
+            return 0
+
+        from package_mapping import load_package_map, mapped_entries
+        entries = mapped_entries(self.apps, load_package_map(filepath))
+        if entries:
+            self.import_apps(entries)
+            self._notify('on_change', [app.id for app in entries], [])
+        return len(entries)
+
+    def close(self):
+        """إغلاق الاتصال بالملف"""
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    path = os.path.join(tempfile.gettempdir(), 'linux-store-apps.sqlite')
+    start = time.perf_counter()
+    db = SQLiteAppDatabase(path)
+    print(f"فتح القاعدة: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"عدد التطبيقات: {len(db.apps)}")
+    print(f"FTS5: {db.has_fts}")
+    print([app.name for app in db.search('brow')])
+    page = db.query_apps(category='internet', limit=5)
+    print(page.total, [app.name for app in page.items], page.next_cursor)